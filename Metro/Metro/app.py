@@ -1,165 +1,336 @@
-from flask import Flask, render_template, request, jsonify
-import re
-import heapq
-from collections import deque
+from flask import Flask, render_template, request, jsonify, g
+import os
+import json
+import math
+import time
+import random
+import tempfile
+import hashlib
+import functools
+import threading
+import concurrent.futures
 from plotly import graph_objs as go
+from plotly.offline import get_plotlyjs
+from src.routage import dijkstra_bidirectionnel, arbre_plus_courts_chemins, chemins_par_lot, plus_court_chemin_acces
+from src.chargement import charger_reseau
+from src.cache import CacheLRU
+from src.execution import PoolCalcul, PoolSature
+from src.analyse import foret_couvrante, composantes, articulations_et_ponts
+from src.criticite import criticite
+from src.mesures import mesures
+from src.profilage import ProfilRequete
+from src.perturbations import (creer_perturbation, graphe_perturbe, comparer, trace_chemins, Invalidation,
+                                PerturbationInvalide, reporter)
+from src.rechargement import Rechargeur, Surveillance
+from src.reperes import plus_court_chemin_alt
+from src.geo import temps_marche, ACCES_MAX, RAYON_ACCES
+from src.geometrie import encoder_polyligne
+from src.alternatives import alternatives, DETOUR, PARTAGE_MAX
+from src.horaires import charger_horaires, arrivee_au_plus_tot, lire_heure, en_heure, heure_de_service
+from src.correspondances import (itineraires_pareto, meilleur_itineraire, instructions as instructions_etapes,
+                                 PENALITE_CORRESPONDANCE)
 
 
 app = Flask(__name__)
 
-# Global variables
-sommets, graphe, aretes, noms_station_to_num, lignes_station = {}, {}, [], {}, {}
-
-# Function to load graph
-def lire_graphe(fichier):
-    global sommets, graphe, aretes, noms_station_to_num, lignes_station
-    sommets, graphe, aretes, noms_station_to_num, lignes_station = {}, {}, [], {}, {}
-
-    with open(fichier, 'r', encoding='utf-8') as f:
-        for ligne in f:
-            ligne = ligne.strip()
-            if not ligne:
-                continue
-
-            if ligne.startswith("V"):
-                match = re.match(r"V (\d+) (.+) ;([\w]+) ;(True|False)\s*(\d+)", ligne)
-                if match:
-                    try:
-                        num_sommet = str(int(match.group(1)))
-                        nom_sommet = match.group(2).replace(' - ', ', ')
-                        ligne_num = match.group(3)
-                        terminus = match.group(4) == 'True'
-                        branchement = int(match.group(5))
-
-                        noms_station_to_num[num_sommet] = nom_sommet
-                        if num_sommet not in lignes_station:
-                            lignes_station[num_sommet] = []
-                        lignes_station[num_sommet].append(ligne_num)
-
-                        sommets[num_sommet] = {
-                            'nom': nom_sommet,
-                            'ligne_num': ligne_num,
-                            'terminus': terminus,
-                            'branchements': branchement,
-                        }
-                        graphe[num_sommet] = []
-                    except ValueError:
-                        continue
-
-            elif ligne.startswith("E"):
-                parts = ligne.split(" ")
-                if len(parts) == 4:
-                    try:
-                        sommet1 = str(int(parts[1]))
-                        sommet2 = str(int(parts[2]))
-                        temps = int(parts[3])
-
-                        if sommet1 not in sommets or sommet2 not in sommets:
-                            continue
-
-                        graphe[sommet1].append((sommet2, temps))
-                        graphe[sommet2].append((sommet1, temps))
-                        aretes.append((sommet1, sommet2, temps))
-                    except ValueError:
-                        continue
-
-# Bellman-Ford algorithm
-def bellman_ford(graphe, start):
-    distances = {station: float('inf') for station in graphe}
-    pred = {station: None for station in graphe}
-    distances[start] = 0
-
-    for _ in range(len(graphe) - 1):
-        for sommet1, voisins in graphe.items():
-            for sommet2, temps in voisins:
-                if distances[sommet1] + temps < distances[sommet2]:
-                    distances[sommet2] = distances[sommet1] + temps
-                    pred[sommet2] = sommet1
-
-    return distances, pred
-
-
-# Prim's algorithm
-def prim(graphe):
-    acpm = []
-    total_weight = 0
-    visited = set()
-    edges = []
-
-    start_node = next(iter(graphe))
-    visited.add(start_node)
-
-    for voisin, poids in graphe[start_node]:
-        heapq.heappush(edges, (poids, start_node, voisin))
-
-    while edges:
-        poids, parent, enfant = heapq.heappop(edges)
-        if enfant not in visited:
-            visited.add(enfant)
-            acpm.append((parent, enfant, poids))
-            total_weight += poids
-
-            for voisin, poids_voisin in graphe[enfant]:
-                if voisin not in visited:
-                    heapq.heappush(edges, (poids_voisin, enfant, voisin))
-
-    return acpm, total_weight
+# Dossier contenant metro.txt, pospoints.txt et stations_coordinates.csv
+DOSSIER_DONNEES = os.environ.get('METRO_DONNEES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+# METRO_TOUTES_PAIRES=1 active la table précalculée de toutes les paires
+TOUTES_PAIRES = os.environ.get('METRO_TOUTES_PAIRES') == '1'
+# METRO_MESURE_MEMOIRE=1 mesure la mémoire allouée au chargement (tracemalloc, bien plus lent)
+MESURE_MEMOIRE = os.environ.get('METRO_MESURE_MEMOIRE') == '1'
+# METRO_REPERES=16 construit (ou relit, metro.alt) un index de 16 repères pour guider /chemin
+REPERES = int(os.environ.get('METRO_REPERES', 0))
+# METRO_SURVEILLANCE=2 relève les fichiers de données toutes les 2 s et recharge le réseau
+# quand ils changent (0 = pas de surveillance) ; METRO_ADMIN_JETON, s'il est défini, est
+# exigé par les routes /admin (en-tête Authorization: Bearer <jeton>)
+SURVEILLANCE = float(os.environ.get('METRO_SURVEILLANCE', 0))
+ADMIN_JETON = os.environ.get('METRO_ADMIN_JETON')
+
+# Profilage échantillonné : METRO_PROFIL_TAUX est la part des requêtes profilées (0 = jamais) ;
+# celles de plus de METRO_PROFIL_SEUIL_MS écrivent un profil cProfile dans METRO_PROFIL_DOSSIER
+PROFIL_TAUX = float(os.environ.get('METRO_PROFIL_TAUX', 0))
+PROFIL_SEUIL = float(os.environ.get('METRO_PROFIL_SEUIL_MS', 100)) / 1000
+PROFIL_DOSSIER = os.environ.get('METRO_PROFIL_DOSSIER', os.path.join(tempfile.gettempdir(), 'metro-profils'))
+
+# Réseau chargé (instantané immuable, voir src/chargement.py)
+reseau = None
+
+# Réponses /chemin déjà calculées, par (version, départ, arrivée) : (JSON, trace des
+# tronçons empruntés) pour ne retirer que les réponses touchées par une perturbation
+# METRO_CACHE_TAILLE=0 désactive le cache, METRO_CACHE_TTL en secondes (0 = sans expiration)
+cache_chemins = CacheLRU(taille_max=int(os.environ.get('METRO_CACHE_TAILLE', 1024)),
+                         ttl=float(os.environ.get('METRO_CACHE_TTL', 0)) or None)
+# Arbres des plus courts chemins complets, par (version, sommets de départ)
+cache_arbres = CacheLRU(taille_max=int(os.environ.get('METRO_CACHE_ARBRES', 128)))
+# Figure de base de /plot déjà sérialisée, par version : (JSON, ETag)
+cache_carte = CacheLRU(taille_max=2)
+# Analyses du réseau (ACPM, connexité, structure) déjà sérialisées, par (version, nom)
+cache_analyses = CacheLRU(taille_max=16)
+# Horaires (flux GTFS ou fréquences générées), par version, construits à la première demande
+cache_horaires = CacheLRU(taille_max=2)
+
+# Calculs sur le graphe : METRO_CALCUL_THREADS en parallèle, au plus METRO_CALCUL_FILE
+# admis avant de répondre 429, et METRO_CALCUL_DELAI secondes d'attente au plus (503)
+pool_calcul = PoolCalcul(travailleurs=int(os.environ.get('METRO_CALCUL_THREADS', 4)),
+                         file_max=int(os.environ.get('METRO_CALCUL_FILE', 32)))
+DELAI_CALCUL = float(os.environ.get('METRO_CALCUL_DELAI', 30)) or None
+
+# Remplacement du réseau actif (chargement, perturbations) et mises en cache : un résultat
+# calculé sur un réseau déjà remplacé n'est pas gardé, l'invalidation l'aurait manqué
+verrou_reseau = threading.Lock()
+
+def vider_caches():
+    cache_chemins.vider()
+    cache_arbres.vider()
+    cache_carte.vider()
+    cache_analyses.vider()
+    cache_horaires.vider()
+
+
+def annoncer(nouveau):
+    memoire = f", {nouveau.memoire / 1024:.1f} Kio" if nouveau.memoire is not None else ""
+    print(f"Réseau v{nouveau.version} chargé depuis {nouveau.dossier} : {len(nouveau.graphe)} sommets "
+          f"en {nouveau.duree_chargement * 1000:.1f} ms{memoire}")
+
+
+# Charge le dossier de données ; la version du réseau change à chaque chargement,
+# les caches de l'ancienne version sont vidés (et les perturbations oubliées).
+def charger_donnees(dossier=DOSSIER_DONNEES, toutes_paires=TOUTES_PAIRES, reperes=REPERES):
+    global reseau
+    nouveau = charger_reseau(dossier, toutes_paires, mesurer_memoire=MESURE_MEMOIRE, reperes=reperes)
+    with verrou_reseau:
+        reseau = nouveau
+        vider_caches()
+    annoncer(nouveau)
+    return nouveau
+
+
+# Rechargement à chaud (src/rechargement.py) : le nouveau réseau du même dossier est
+# construit en arrière-plan avec sa carte, puis publié d'une seule affectation de `reseau`.
+# Chaque requête lit `reseau` une fois (courant = reseau) et garde cet instantané jusqu'au
+# bout ; ce qu'elle calcule sur l'ancien n'entre plus en cache (mettre_si_courant).
+def construire_rechargement():
+    nouveau = charger_reseau(reseau.dossier, TOUTES_PAIRES, mesurer_memoire=MESURE_MEMOIRE, reperes=REPERES)
+    if not len(nouveau.graphe):
+        raise ValueError(f"aucune station lue dans {nouveau.dossier}")
+    corps = construire_carte(nouveau)
+    return nouveau, (corps, hashlib.sha1(corps).hexdigest())
+
+
+# Les perturbations actives sont résolues à nouveau sur le nouveau graphe (reporter) sous
+# le verrou, pour qu'aucune modification ne se perde entre-temps
+def publier_rechargement(construit):
+    global reseau
+    nouveau, carte = construit
+    with verrou_reseau:
+        ancien = reseau
+        perturbations, ecartees = reporter(ancien.perturbations, nouveau.graphe_base)
+        if len(perturbations):
+            nouveau = nouveau.avec(graphe=graphe_perturbe(nouveau.graphe_base, perturbations.changements),
+                                   perturbations=perturbations)
+        reseau = nouveau
+        vider_caches()
+        cache_carte.mettre(nouveau.version, carte)
+    annoncer(nouveau)
+    return {
+        'version': nouveau.version,
+        'ancienne_version': ancien.version,
+        'perturbations_reportees': len(perturbations),
+        'perturbations_ecartees': [perturbation.resume() for perturbation in ecartees],
+        'reseau': nouveau.resume(),
+    }
+
+
+rechargeur = Rechargeur(construire_rechargement, publier_rechargement)
+surveillance = None
+
+
+# La surveillance démarre à la première requête de chaque processus : sous gunicorn
+# (preload_app), un thread lancé à l'import dans le maître ne survivrait pas au fork des
+# workers. Chaque worker a son propre réseau et le recharge lui-même ; /admin/recharger
+# ne recharge que le worker qui reçoit la requête.
+def demarrer_surveillance():
+    global surveillance
+    if SURVEILLANCE <= 0 or (surveillance is not None and surveillance.pid == os.getpid()):
+        return
+    with verrou_reseau:
+        if surveillance is None or surveillance.pid != os.getpid():
+            surveillance = Surveillance(reseau.dossier, SURVEILLANCE,
+                                        lambda: rechargeur.demander('fichiers')[1])
+            surveillance.start()
 
 # Fonction pour reconstruire le chemin à partir des prédécesseurs
+# (ajouts en fin de liste puis un seul retournement : linéaire, contrairement à insert(0))
 def reconstruire_chemin(pred, start, end):
     chemin = []
     current = end
     while current != start:
-        chemin.insert(0, current)
+        chemin.append(current)
         current = pred[current]
-    chemin.insert(0, start)
+    chemin.append(start)
+    chemin.reverse()
     return chemin
 
 
 
-# Connectivity check
-def est_connexe(graphe):
-    visited = set()
-    start_node = next(iter(graphe))
-
-    queue = deque([start_node])
-    while queue:
-        current = queue.popleft()
-        if current not in visited:
-            visited.add(current)
-            for voisin, _ in graphe[current]:
-                if voisin not in visited:
-                    queue.append(voisin)
-
-    return len(visited) == len(graphe)
+# Chargement une seule fois par processus, à l'import (y compris sous gunicorn)
+charger_donnees()
+
+
+def mettre_si_courant(cache, cle, valeur, courant):
+    with verrou_reseau:
+        if reseau is courant:
+            cache.mettre(cle, valeur)
+
+
+# Remplace les perturbations du réseau actif par modification(perturbations actives) : le
+# graphe masqué est reconstruit (même version, même carte) et seules les entrées en cache
+# que les tronçons modifiés rendent fausses sont retirées. Renvoie les perturbations, le
+# nombre d'entrées retirées par cache et la durée.
+def modifier_perturbations(modification):
+    global reseau
+    debut = time.perf_counter()
+    with verrou_reseau:
+        ancien = reseau
+        nouvelles = modification(ancien.perturbations)
+        with mesures.phase('perturbations.graphe'):
+            graphe = graphe_perturbe(ancien.graphe_base, nouvelles.changements)
+        reseau = ancien.avec(graphe=graphe, perturbations=nouvelles)
+
+        with mesures.phase('perturbations.invalidation'):
+            invalidation = Invalidation(graphe, *comparer(ancien.perturbations.changements, nouvelles.changements))
+            invalidees = {'chemins': 0, 'arbres': 0, 'analyses': 0, 'horaires': 0}
+            if invalidation:
+                fermes = {cle for cle, changement in nouvelles.changements.items() if changement is None}
+                fermes_avant = {cle for cle, changement in ancien.perturbations.changements.items() if changement is None}
+                invalidees = {
+                    'chemins': cache_chemins.invalider(lambda cle, valeur: invalidation.chemin_touche(valeur[1])),
+                    'arbres': cache_arbres.invalider(lambda cle, arbre: invalidation.arbre_touche(*arbre)),
+                    # Connexité et structure ne dépendent que des tronçons ouverts, l'ACPM et la
+                    # criticité aussi des temps
+                    'analyses': cache_analyses.invalider(
+                        lambda cle, corps: cle[1] in ('acpm', 'criticite') or fermes != fermes_avant),
+                    # Horaires générés depuis le graphe masqué à la prochaine demande
+                    'horaires': cache_horaires.invalider(lambda cle, horaires: True),
+                }
+    return {
+        'perturbations': nouvelles.resume(),
+        'invalidees': invalidees,
+        'duree_ms': round((time.perf_counter() - debut) * 1000, 3),
+    }
+
+
+# Calcul dans le pool borné ; les requêtes identiques en cours (même clé) le partagent
+def calculer(cle, fonction, *args):
+    profil = g.get('profil')
+    if profil is not None:
+        # Requête profilée : le calcul est profilé dans le thread du pool qui l'exécute
+        fonction = functools.partial(profil.executer, fonction)
+    return pool_calcul.executer(cle, fonction, *args, delai=DELAI_CALCUL)
+
+
+@app.before_request
+def debut_requete():
+    g.debut = time.perf_counter()
+    demarrer_surveillance()
+    if PROFIL_TAUX and random.random() < PROFIL_TAUX:
+        g.profil = ProfilRequete()
+        g.profil.demarrer()
+
+
+# Durée par route dans les histogrammes de /metrics ; profil écrit si la requête
+# échantillonnée a été lente (son nom est renvoyé dans l'en-tête X-Profil)
+@app.after_request
+def fin_requete(reponse):
+    duree = time.perf_counter() - g.debut
+    route = request.url_rule.rule if request.url_rule else 'inconnue'
+    mesures.observer('metro_requete_secondes', duree, route=route, methode=request.method)
+    mesures.incrementer('metro_requetes_total', route=route, statut=reponse.status_code)
+
+    profil = g.pop('profil', None)
+    if profil is not None:
+        profil.arreter()
+        if duree >= PROFIL_SEUIL:
+            fichier = profil.ecrire(PROFIL_DOSSIER, route)
+            if fichier is not None:
+                mesures.incrementer('metro_profils_total')
+                reponse.headers['X-Profil'] = os.path.basename(fichier)
+    return reponse
+
+
+# Histogrammes de latence (requêtes et phases), caches, pool de calcul et réseau,
+# au format texte de Prometheus
+@app.route('/metrics')
+def metriques():
+    courant = reseau
+    jauges = [
+        ('metro_reseau_version', {}, courant.version),
+        ('metro_reseau_sommets', {}, len(courant.graphe)),
+        ('metro_perturbations', {}, len(courant.perturbations)),
+        ('metro_rechargement_en_cours', {}, int(rechargeur.etat()['en_cours'])),
+    ]
+    for nom, cache in (('chemins', cache_chemins), ('arbres', cache_arbres),
+                       ('carte', cache_carte), ('analyses', cache_analyses)):
+        stats = cache.stats()
+        jauges += [
+            ('metro_cache_entrees', {'cache': nom}, stats['taille']),
+            ('metro_cache_succes_total', {'cache': nom}, stats['succes']),
+            ('metro_cache_echecs_total', {'cache': nom}, stats['echecs']),
+            ('metro_cache_evictions_total', {'cache': nom}, stats['evictions']),
+        ]
+    calcul = pool_calcul.stats()
+    jauges += [
+        ('metro_calcul_en_cours', {}, calcul['en_cours']),
+        ('metro_calcul_lances_total', {}, calcul['lances']),
+        ('metro_calcul_partages_total', {}, calcul['partages']),
+        ('metro_calcul_refuses_total', {}, calcul['refuses']),
+    ]
+    return app.response_class(mesures.prometheus(jauges), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-import pandas as pd
 
-def lire_pospoints(fichier):
-    points = []
-    with open(fichier, 'r', encoding='utf-8') as f:
-        for ligne in f:
-            try:
-                x, y, label = ligne.strip().split(';')
-                points.append({'x': int(x), 'y': int(y), 'label': label.replace('@', ' ')})
-            except ValueError:
-                continue
+@app.errorhandler(PoolSature)
+def pool_sature(erreur):
+    reponse = jsonify({'error': "Serveur saturé, réessayez dans un instant."})
+    reponse.status_code = 429
+    reponse.headers['Retry-After'] = '1'
+    return reponse
 
-    # Supprimer les doublons en utilisant un dictionnaire
-    unique_points = {f"{point['x']},{point['y']}": point for point in points}
-    return list(unique_points.values())
 
-# Charger les points une fois (par exemple dans une variable globale ou dans une fonction dédiée)
-pos_points = lire_pospoints('C:/Users/Joe/Desktop/Metro/Metro/data/pospoints.txt')
+# concurrent.futures.TimeoutError n'est un alias de TimeoutError qu'à partir de Python 3.11
+@app.errorhandler(TimeoutError)
+@app.errorhandler(concurrent.futures.TimeoutError)
+def delai_depasse(erreur):
+    reponse = jsonify({'error': "Le calcul a pris trop de temps."})
+    reponse.status_code = 503
+    return reponse
 
 
+# Figure de base (stations seules) en JSON Plotly, construite une fois par version du réseau.
+# Le navigateur la revalide par ETag (304 sans corps) ; les chemins y sont ajoutés côté client.
 @app.route('/plot')
 def plot():
+    courant = reseau
+    carte = cache_carte.get(courant.version)
+    if carte is None:
+        with mesures.phase('plot.construction'):
+            corps = construire_carte(courant)
+        carte = (corps, hashlib.sha1(corps).hexdigest())
+        mettre_si_courant(cache_carte, courant.version, carte, courant)
+    corps, etag = carte
+
+    reponse = app.response_class(corps, mimetype='application/json')
+    reponse.set_etag(etag)
+    reponse.cache_control.no_cache = True
+    return reponse.make_conditional(request)
+
+
+def construire_carte(reseau):
     # Chargement des données sans doublons
     unique_points = {}
-    for point in pos_points:
-        if point["label"] not in unique_points:
-            unique_points[point["label"]] = (point["x"], -point["y"])
+    for x, y, label in reseau.pos_points:
+        if label not in unique_points:
+            unique_points[label] = (x, -y)
 
     x_values = [coord[0] for coord in unique_points.values()]
     y_values = [coord[1] for coord in unique_points.values()]
@@ -189,16 +360,31 @@ def plot():
         height=600
     )
 
-    # Retourner la figure comme un HTML Plotly
-    return fig.to_html(full_html=True)
+    return fig.to_json().encode('utf-8')
+
+
+# plotly.js de la version de plotly installée (celle qui produit le JSON de /plot),
+# servi comme un fichier statique au lieu d'être recopié dans chaque page
+@functools.lru_cache(maxsize=None)
+def contenu_plotly_js():
+    corps = get_plotlyjs().encode('utf-8')
+    return corps, hashlib.sha1(corps).hexdigest()
+
+
+@app.route('/plotly.min.js')
+def plotly_js():
+    corps, etag = contenu_plotly_js()
+    reponse = app.response_class(corps, mimetype='application/javascript')
+    reponse.set_etag(etag)
+    reponse.cache_control.public = True
+    reponse.cache_control.max_age = 86400
+    return reponse.make_conditional(request)
 
 
 @app.route('/stations', methods=['GET'])
 def get_stations():
-    fichier_pospoints = "C:/Users/Joe/Desktop/Metro/Metro/data/pospoints.txt"  # Chemin du fichier
-    points = lire_pospoints(fichier_pospoints)
-    # Renvoie les données au format JSON
-    return jsonify(points)
+    # Liste sérialisée une fois au chargement du réseau
+    return app.response_class(reseau.stations_json, mimetype='application/json')
 
 
 
@@ -207,131 +393,827 @@ def index():
     return render_template('index.html')
 
 
+# Analyses : fonctions pures du réseau, calculées et sérialisées une fois par version
+def reponse_analyse(nom, fonction):
+    courant = reseau
+    cle = (courant.version, nom)
+    corps = cache_analyses.get(cle)
+    if corps is None:
+        with mesures.phase(f'analyse.{nom}'):
+            corps = jsonify(calculer(('analyse', courant.perturbations.generation) + cle, fonction, courant)).get_data()
+        mettre_si_courant(cache_analyses, cle, corps, courant)
+    return app.response_class(corps, mimetype='application/json')
+
+
+def analyse_connexite(reseau):
+    nombre = len(composantes(reseau.graphe))
+    return {'connexe': nombre == 1, 'composantes': nombre}
+
+
+# Forêt couvrante minimale (Kruskal), un arbre par composante
+def analyse_acpm(reseau):
+    graphe = reseau.graphe
+    foret, total_weight = foret_couvrante(graphe)
+    acpm_list = [
+        {
+            'parent': graphe.nom(parent),
+            'child': graphe.nom(enfant),
+            'poids': poids
+        }
+        for parent, enfant, poids in foret
+    ]
+    return {'acpm': acpm_list, 'total_weight': total_weight, 'arbres': len(graphe) - len(foret)}
+
+
+# Composantes, points d'articulation (stations dont la fermeture coupe le réseau)
+# et ponts (tronçons dont la coupure coupe le réseau)
+def analyse_structure(reseau):
+    graphe = reseau.graphe
+    articulations, ponts = articulations_et_ponts(graphe)
+    return {
+        'composantes': [
+            {'taille': len(composante), 'stations': sorted({graphe.nom(sommet) for sommet in composante})}
+            for composante in composantes(graphe)
+        ],
+        'articulations': [
+            {'station': graphe.nom(sommet), 'ligne': graphe.stations[sommet].ligne} for sommet in articulations
+        ],
+        'ponts': [
+            {'de': graphe.nom(u), 'vers': graphe.nom(v), 'ligne': graphe.stations[v].ligne} for u, v in ponts
+        ],
+    }
+
+
+# Stations et tronçons par lesquels passent le plus de trajets, et effet de la fermeture
+# de chaque tronçon sur les trajets (src/criticite.py)
+def analyse_criticite(reseau):
+    debut = time.perf_counter()
+    resultat = criticite(reseau.graphe)
+    resultat['duree_ms'] = round((time.perf_counter() - debut) * 1000, 1)
+    return resultat
+
+
 @app.route('/connexite', methods=['GET'])
 def verifier_connexite():
-    connected = est_connexe(graphe)
-    return jsonify({'connexe': connected})
+    return reponse_analyse('connexite', analyse_connexite)
 
 
-@app.route('/chemin', methods=['POST'])
-def chemin_court():
-    data = request.json
-    start_name = data['start'].strip().lower()
-    end_name = data['end'].strip().lower()
+@app.route('/analyse', methods=['GET'])
+def analyse_reseau():
+    return reponse_analyse('structure', analyse_structure)
 
-    start_station = None
-    end_station = None
 
-    # Recherche des stations
-    for num_sommet, nom_sommet in noms_station_to_num.items():
-        if nom_sommet.lower() == start_name:
-            start_station = num_sommet
-        if nom_sommet.lower() == end_name:
-            end_station = num_sommet
+@app.route('/analyse/criticite', methods=['GET'])
+def analyse_criticite_reseau():
+    return reponse_analyse('criticite', analyse_criticite)
+
+
+# Paramètre de requête invalide : 400 avec le message
+def requete_invalide(message):
+    reponse = jsonify({'error': message})
+    reponse.status_code = 400
+    return reponse
 
-    if not start_station or not end_station:
-        return jsonify({'error': "Une ou les deux stations ne sont pas dans le réseau."})
 
-    # Calcul du plus court chemin
-    distances, pred = bellman_ford(graphe, start_station)
-    if distances[end_station] == float('inf'):
-        return jsonify({'error': "Il n'y a pas de chemin entre ces deux stations."})
+# Nombre fini lu dans une requête (nombre JSON ou texte), toujours rendu en float ; None
+# pour un booléen, un texte qui n'est pas un nombre, NaN ou un infini
+def nombre_fini(valeur):
+    if isinstance(valeur, bool):
+        return None
+    try:
+        nombre = float(valeur)
+    except (TypeError, ValueError):
+        return None
+    return nombre if math.isfinite(nombre) else None
 
-    chemin = reconstruire_chemin(pred, start_station, end_station)
+
+# Pénalité par correspondance en secondes : nombre fini, positif ou nul, toujours rendu
+# en float (120 et 120.0 partagent la même entrée de cache). Lève ValueError avec le message.
+def lire_penalite(valeur):
+    penalite = nombre_fini(valeur)
+    if penalite is None or penalite < 0:
+        raise ValueError(f"Pénalité de correspondance invalide : {valeur} (nombre de secondes positif ou nul).")
+    return penalite
+
+
+@app.route('/chemin', methods=['POST'])
+def chemin_court():
+    data = request.json
+    courant = reseau
+    # Position GPS {"lat": .., "lon": ..} ou point de la carte {"x": .., "y": ..} à la place
+    # d'un nom de station, d'un côté ou des deux
+    if isinstance(data.get('start'), dict) or isinstance(data.get('end'), dict):
+        return chemin_positions(courant, data)
+    start_name = data['start']
+    end_name = data['end']
+    graphe = courant.graphe
+
+    # Recherche des stations dans l'index des noms
+    with mesures.phase('chemin.noms'):
+        start_ids = graphe.ids_par_nom(start_name)
+        end_ids = graphe.ids_par_nom(end_name)
+
+    if not start_ids or not end_ids:
+        return jsonify({'error': "Une ou les deux stations ne sont pas dans le réseau."})
+    start_station = start_ids[0]
+    end_station = end_ids[0]
+
+    # Modes avec correspondances : "correspondances" (temps + pénalité par changement)
+    # ou "moins_de_correspondances" ; "rapide" (par défaut) garde le plus court chemin.
+    mode = data.get('mode', 'rapide')
+    if mode not in ('rapide', 'correspondances', 'moins_de_correspondances'):
+        return jsonify({'error': f"Mode inconnu : {mode}."})
+    try:
+        penalite = lire_penalite(data.get('penalite', PENALITE_CORRESPONDANCE))
+    except ValueError as erreur:
+        return requete_invalide(str(erreur))
+
+    # Heure de départ "HH:MM" : arrivée au plus tôt selon les horaires, attentes comprises
+    # (00:00 vaut 0 : une heure est donnée si depart n'est pas None)
+    depart = data.get('depart')
+    if depart in (None, ''):
+        depart = None
+    else:
+        try:
+            depart = lire_heure(str(depart))
+        except ValueError as erreur:
+            return requete_invalide(str(erreur))
+
+    # Réponse déjà rendue pour cette paire et cette version du graphe
+    if depart is not None:
+        cle = (courant.version, tuple(start_ids), tuple(end_ids), 'horaires', depart)
+    elif mode == 'rapide':
+        cle = (courant.version, start_station, end_station)
+    else:
+        cle = (courant.version, tuple(start_ids), tuple(end_ids), mode, penalite)
+    en_cache = cache_chemins.get(cle)
+    if en_cache is None:
+        # Deux requêtes identiques ne partagent un calcul que sur les mêmes perturbations
+        cle_calcul = ('chemin', courant.perturbations.generation) + cle
+        # chemin.calcul inclut l'attente dans le pool ; ses étapes ont leurs propres phases
+        with mesures.phase('chemin.calcul'):
+            if depart is not None:
+                horaires = horaires_reseau(courant)
+                resultat, trace = calculer(cle_calcul, calculer_itineraire_horaire,
+                                           courant, horaires, start_ids, end_ids, depart)
+            elif mode == 'rapide':
+                resultat, trace = calculer(cle_calcul, calculer_itineraire, courant, start_station, end_station)
+            else:
+                resultat, trace = calculer(cle_calcul, calculer_itineraire_correspondances,
+                                           courant, start_ids, end_ids, mode, penalite)
+        with mesures.phase('chemin.serialisation'):
+            en_cache = (jsonify(resultat).get_data(), trace)
+        mettre_si_courant(cache_chemins, cle, en_cache, courant)
+    return app.response_class(en_cache[0], mimetype='application/json')
+
+
+class PositionInvalide(ValueError):
+    pass
+
+
+# Position {"lat", "lon"} ou {"x", "y"} : (gps, a, b) en nombres finis, la latitude et la
+# longitude dans leurs bornes. Lève PositionInvalide avant toute recherche dans la grille.
+def lire_position(position):
+    if not isinstance(position, dict):
+        raise PositionInvalide("Position invalide : {lat, lon} ou {x, y}, en nombres finis.")
+    gps = 'lat' in position
+    a, b = (position.get('lat'), position.get('lon')) if gps else (position.get('x'), position.get('y'))
+    a, b = nombre_fini(a), nombre_fini(b)
+    if a is None or b is None or (gps and (abs(a) > 90 or abs(b) > 180)):
+        raise PositionInvalide("Position invalide : {lat, lon} ou {x, y}, en nombres finis.")
+    return gps, a, b
+
+
+# Stations les plus proches d'une position : {"lat", "lon"} (distance en mètres et temps de
+# marche) ou {"x", "y"} sur la carte (distance dans les unités de la carte, schématique :
+# pas de temps de marche). Lève PositionInvalide avec le message d'erreur.
+def stations_proches(courant, position, k=1, rayon=None):
+    graphe = courant.graphe
+    gps, a, b = lire_position(position)
+    index = courant.index_gps if gps else courant.index_carte
+    proches = index.proches(a, b, k=k, rayon=rayon)
+
+    stations = []
+    for distance, nom in proches:
+        ids = graphe.ids_par_nom(nom)
+        if not ids:
+            continue
+        station = {'name': graphe.nom(ids[0]), 'distance': round(distance, 1)}
+        if gps:
+            station['walk_time'] = temps_marche(distance)
+            station['lat'], station['lon'] = courant.index_gps.coordonnees[nom]
+        stations.append(station)
+    return stations
+
+
+# Nombre de résultats demandés (stations proches, itinéraires alternatifs) : entier d'au
+# moins 1, ramené à `maximum` au plus. Lève ValueError avec le message.
+K_MAX = 50
+
+
+def lire_k(valeur, defaut=1, maximum=K_MAX):
+    if valeur is None:
+        return defaut
+    try:
+        if isinstance(valeur, bool) or (isinstance(valeur, float) and not valeur.is_integer()):
+            raise ValueError
+        k = int(valeur)
+    except (TypeError, ValueError):
+        k = None
+    if k is None or k < 1:
+        raise ValueError(f"k doit être un entier entre 1 et {maximum}.")
+    return min(k, maximum)
+
+
+# ?lat=..&lon=.. ou ?x=..&y=.., avec &k= (1 à 50) et &rayon= (mètres ou unités de la carte)
+@app.route('/nearest', methods=['GET'])
+def plus_proches():
+    try:
+        k = lire_k(request.args.get('k'))
+    except ValueError as erreur:
+        return requete_invalide(str(erreur))
+    try:
+        stations = stations_proches(reseau, request.args, k, request.args.get('rayon', type=float))
+    except PositionInvalide as erreur:
+        return requete_invalide(str(erreur))
+    return jsonify({'stations': stations})
+
+
+# Par lots : {"points": [{"lat": .., "lon": ..}, {"x": .., "y": ..}, ...], "k": 1, "rayon": ..}
+# Un résultat par point, dans l'ordre, avec son erreur éventuelle.
+@app.route('/nearest', methods=['POST'])
+def plus_proches_lot():
+    data = request.json or {}
+    courant = reseau
+    try:
+        k = lire_k(data.get('k'))
+    except ValueError as erreur:
+        return requete_invalide(str(erreur))
+    try:
+        rayon = float(data['rayon']) if data.get('rayon') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': "Paramètres invalides."})
+    resultats = []
+    with mesures.phase('nearest.lot'):
+        for position in data.get('points', []):
+            try:
+                resultats.append({'stations': stations_proches(courant, position, k, rayon)})
+            except PositionInvalide as erreur:
+                resultats.append({'error': str(erreur)})
+    return jsonify({'results': resultats})
+
+
+# Sommets d'accès d'une extrémité du trajet, avec le temps pour les rejoindre : tous les
+# sommets d'une station nommée (0 s), ceux des ACCES_MAX stations à moins de RAYON_ACCES
+# mètres d'une position GPS (marche), ou ceux de la station la plus proche d'un point de
+# la carte (0 s). Renvoie ({sommet: secondes}, {nom de station: (mètres, secondes)}).
+def sommets_acces(courant, extremite):
+    graphe = courant.graphe
+    if not isinstance(extremite, dict):
+        ids = graphe.ids_par_nom(str(extremite))
+        if not ids:
+            raise ValueError("Une ou les deux stations ne sont pas dans le réseau.")
+        return {sommet: 0 for sommet in ids}, {}
+
+    if 'lat' in extremite:
+        stations = stations_proches(courant, extremite, ACCES_MAX, RAYON_ACCES)
+        if not stations:
+            raise ValueError(f"Aucune station à moins de {RAYON_ACCES} m de cette position.")
+    else:
+        stations = stations_proches(courant, extremite, 1)[:1]
+        if not stations:
+            raise ValueError("Aucune station sur la carte.")
+    acces, marches = {}, {}
+    for station in stations:
+        secondes = station.get('walk_time', 0)
+        marches[station['name']] = (station['distance'], secondes)
+        for sommet in graphe.ids_par_nom(station['name']):
+            acces[sommet] = min(secondes, acces.get(sommet, secondes))
+    return acces, marches
+
+
+# /chemin depuis ou vers une position : la recherche part de toutes les stations d'accès
+# à la fois, chacune avec son temps de marche, et s'arrête à la meilleure arrivée marche comprise
+def chemin_positions(courant, data):
+    try:
+        departs, marches_depart = sommets_acces(courant, data.get('start'))
+        arrivees, marches_arrivee = sommets_acces(courant, data.get('end'))
+    except PositionInvalide as erreur:
+        return requete_invalide(str(erreur))
+    except ValueError as erreur:
+        return jsonify({'error': str(erreur)})
+
+    # Deux positions voisines qui mènent aux mêmes stations avec les mêmes marches partagent l'entrée
+    cle = (courant.version, 'acces', tuple(sorted(departs.items())), tuple(sorted(arrivees.items())))
+    en_cache = cache_chemins.get(cle)
+    if en_cache is None:
+        with mesures.phase('chemin.calcul'):
+            resultat, trace = calculer(('chemin', courant.perturbations.generation) + cle, calculer_itineraire_acces,
+                                       courant, departs, arrivees, marches_depart, marches_arrivee)
+        en_cache = (jsonify(resultat).get_data(), trace)
+        mettre_si_courant(cache_chemins, cle, en_cache, courant)
+    return app.response_class(en_cache[0], mimetype='application/json')
+
+
+def calculer_itineraire_acces(reseau, departs, arrivees, marches_depart, marches_arrivee):
+    graphe = reseau.graphe
+    with mesures.phase('chemin.recherche'):
+        total_time, chemin = plus_court_chemin_acces(graphe, departs, arrivees)
+    # Temps marche comprise : une borne prudente pour l'invalidation
+    trace = trace_chemins([chemin] if chemin else [], departs, arrivees, total_time)
+    if chemin is None:
+        return {'error': "Il n'y a pas de chemin entre ces deux positions."}, trace
+
+    debut, fin = chemin[0], chemin[-1]
+    instructions = []
+    if graphe.nom(debut) in marches_depart and departs[debut]:
+        metres, secondes = marches_depart[graphe.nom(debut)]
+        instructions.append(f"Marchez jusqu'à {graphe.nom(debut)} ({metres:.0f} m, {secondes // 60} min {secondes % 60} s).")
+    if len(chemin) > 1:
+        instructions += instructions_chemin(graphe, chemin, debut, fin)
+    if graphe.nom(fin) in marches_arrivee and arrivees[fin]:
+        metres, secondes = marches_arrivee[graphe.nom(fin)]
+        instructions.append(f"Marchez de {graphe.nom(fin)} jusqu'à destination ({metres:.0f} m, "
+                            f"{secondes // 60} min {secondes % 60} s).")
+
+    minutes, seconds = divmod(total_time, 60)
+    with mesures.phase('chemin.trace'):
+        trace_carte = tracer_chemin(reseau, chemin)
+    return {
+        'instructions': instructions,
+        'time': f"{minutes} minutes et {seconds} secondes",
+        'start': graphe.nom(debut),
+        'end': graphe.nom(fin),
+        'walk_times': {'start': departs[debut], 'end': arrivees[fin]},
+        'polyline': trace_carte
+    }, trace
+
+
+# Calcul du chemin, des instructions et du tracé entre deux sommets.
+# Renvoie (résultat, trace des tronçons empruntés pour l'invalidation du cache).
+def calculer_itineraire(reseau, start_station, end_station):
+    graphe = reseau.graphe
+    sans_chemin = ({'error': "Il n'y a pas de chemin entre ces deux stations."},
+                   trace_chemins([], [start_station], [end_station], float('inf')))
+    chemin = None
+    explores = None
+    if reseau.table_chemins is not None:
+        # Mode toutes paires : lecture dans la table précalculée (graphe de base)
+        with mesures.phase('chemin.recherche'):
+            total_time = reseau.table_chemins.distance(start_station, end_station)
+        if total_time == float('inf'):
+            return sans_chemin
+        with mesures.phase('chemin.reconstruction'):
+            chemin = reseau.table_chemins.chemin(start_station, end_station)
+        # Les perturbations ne font qu'allonger des tronçons : un chemin de la table qui
+        # n'en emprunte aucun reste le plus court, sinon on le recalcule
+        if reseau.perturbations:
+            aretes, _, _, _ = trace_chemins([chemin], [], [], total_time)
+            if not aretes.isdisjoint(reseau.perturbations.changements):
+                chemin = None
+
+    if chemin is None and reseau.reperes is not None:
+        # Index de repères : A* guidé par les bornes (valables aussi avec des perturbations)
+        with mesures.phase('chemin.recherche'):
+            total_time, chemin, explores = plus_court_chemin_alt(
+                reseau.reperes, graphe, [start_station], [end_station])
+        mesures.incrementer('metro_alt_requetes_total')
+        mesures.incrementer('metro_alt_sommets_fixes_total', explores)
+        if chemin is None:
+            return sans_chemin
+    elif chemin is None:
+        # Calcul du plus court chemin (Dijkstra bidirectionnel)
+        with mesures.phase('chemin.recherche'):
+            distances, pred = dijkstra_bidirectionnel(graphe, start_station, end_station)
+        if distances[end_station] == float('inf'):
+            return sans_chemin
+
+        with mesures.phase('chemin.reconstruction'):
+            chemin = reconstruire_chemin(pred, start_station, end_station)
+        total_time = distances[end_station]
 
     # Préparer le format des résultats
-    total_time = distances[end_station]
     minutes, seconds = divmod(total_time, 60)
 
+    with mesures.phase('chemin.instructions'):
+        instructions = instructions_chemin(graphe, chemin, start_station, end_station)
+    with mesures.phase('chemin.trace'):
+        trace_carte = tracer_chemin(reseau, chemin)
+
+    resultat = {
+        'instructions': instructions,
+        'time': f"{minutes} minutes et {seconds} secondes",
+        'polyline': trace_carte
+    }
+    if explores is not None:
+        # Sommets fixés par la recherche guidée, pour suivre le gain de l'index
+        resultat['explores'] = explores
+    return resultat, trace_chemins([chemin], [start_station], [end_station], total_time)
+
+
+# Une instruction par ligne empruntée le long du chemin
+def instructions_chemin(graphe, chemin, start_station, end_station):
     instructions = []  # Liste pour stocker les instructions d'itinéraire
     ligne_active = None
-    current_start = noms_station_to_num[start_station]
-
-    # Tracé du chemin sur la carte
-    chemin_coords = []
-    station_coords = {point["label"].lower(): (point["x"], -point["y"]) for point in pos_points}
+    current_start = graphe.nom(start_station)
 
     for i in range(len(chemin) - 1):
-        station1 = chemin[i]
-        station2 = chemin[i + 1]
-
-        for voisin, temps in graphe[station1]:
-            if voisin == station2:
-                lignes_communes = set(lignes_station[station1]) & set(lignes_station[station2])
-                if lignes_communes:
-                    ligne = list(lignes_communes)[0]
-                    if ligne_active is None:
-                        ligne_active = ligne
-                    elif ligne != ligne_active:
-                        # Si la ligne change, on ajoute une instruction
-                        instructions.append(
-                            f"Prenez la ligne {ligne_active} de {current_start} jusqu'à {noms_station_to_num[station1]}."
-                        )
-                        current_start = noms_station_to_num[station1]
-                        ligne_active = ligne
-
-                # Ajouter les coordonnées pour le tracé
-                if noms_station_to_num[station1].lower() in station_coords:
-                    chemin_coords.append(station_coords[noms_station_to_num[station1].lower()])
-                if noms_station_to_num[station2].lower() in station_coords:
-                    chemin_coords.append(station_coords[noms_station_to_num[station2].lower()])
-                break
+        station1 = graphe.stations[chemin[i]]
+        station2 = graphe.stations[chemin[i + 1]]
+
+        # Même ligne des deux côtés : on roule ; sinon c'est une correspondance à pied
+        if station1.ligne == station2.ligne:
+            ligne = station1.ligne
+            if ligne_active is None:
+                ligne_active = ligne
+            elif ligne != ligne_active:
+                # Si la ligne change, on ajoute une instruction
+                instructions.append(
+                    f"Prenez la ligne {ligne_active} de {current_start} jusqu'à {station1.nom}."
+                )
+                current_start = station1.nom
+                ligne_active = ligne
 
     # Ajouter la dernière instruction
     instructions.append(
-        f"Prenez la ligne {ligne_active} de {current_start} jusqu'à {noms_station_to_num[end_station]}."
+        f"Prenez la ligne {ligne_active} de {current_start} jusqu'à {graphe.nom(end_station)}."
     )
+    return instructions
+
+
+# Recherche multicritère (temps, correspondances) ; les instructions viennent
+# directement des étapes de l'itinéraire retenu.
+def calculer_itineraire_correspondances(reseau, start_ids, end_ids, mode, penalite):
+    graphe = reseau.graphe
+    with mesures.phase('chemin.recherche'):
+        itineraires = itineraires_pareto(graphe, start_ids, end_ids)
+    itineraire = meilleur_itineraire(itineraires, penalite,
+                                     moins_de_correspondances=(mode == 'moins_de_correspondances'))
+    # Un tronçon rouvert peut ajouter au front un itinéraire plus lent mais avec moins de
+    # correspondances : temps infini, la trace est retirée à toute baisse
+    trace = trace_chemins([i.chemin for i in itineraires], start_ids, end_ids, float('inf'))
+    if itineraire is None:
+        return {'error': "Il n'y a pas de chemin entre ces deux stations."}, trace
+
+    minutes, seconds = divmod(itineraire.temps, 60)
+    with mesures.phase('chemin.trace'):
+        trace_carte = tracer_chemin(reseau, itineraire.chemin)
+    return {
+        'instructions': instructions_etapes(graphe, itineraire),
+        'time': f"{minutes} minutes et {seconds} secondes",
+        'transfers': itineraire.correspondances,
+        # Tous les compromis temps / correspondances, du moins de changements au plus rapide
+        'pareto': [{'time': i.temps, 'transfers': i.correspondances} for i in itineraires],
+        'polyline': trace_carte
+    }, trace
+
+
+# Nombre maximal d'itinéraires alternatifs par demande
+K_ALTERNATIVES = 10
+
+
+# Détour : nombre fini d'au moins 1 ; part partagée : nombre fini de 0 à 1, toujours
+# rendus en float (clés de cache). Lèvent ValueError avec le message.
+def lire_detour(valeur):
+    detour = nombre_fini(valeur)
+    if detour is None or detour < 1:
+        raise ValueError(f"Détour invalide : {valeur} (nombre d'au moins 1).")
+    return detour
+
+
+def lire_partage_max(valeur):
+    partage_max = nombre_fini(valeur)
+    if partage_max is None or not 0 <= partage_max <= 1:
+        raise ValueError(f"Part partagée invalide : {valeur} (nombre de 0 à 1).")
+    return partage_max
+
+
+# Itinéraires alternatifs : {"start": ..., "end": ..., "k": 3, "detour": 1.4, "partage_max": 0.6}
+# Au plus k itinéraires (1 à K_ALTERNATIVES) d'au plus `detour` fois le temps du plus
+# court, dont au plus `partage_max` du temps sur des tronçons d'un itinéraire déjà proposé.
+@app.route('/chemin/alternatives', methods=['POST'])
+def chemin_alternatives():
+    data = request.json or {}
+    courant = reseau
+    graphe = courant.graphe
+    try:
+        k = lire_k(data.get('k'), 3, K_ALTERNATIVES)
+        detour = lire_detour(data.get('detour', DETOUR))
+        partage_max = lire_partage_max(data.get('partage_max', PARTAGE_MAX))
+    except ValueError as erreur:
+        return requete_invalide(str(erreur))
+    start_ids = graphe.ids_par_nom(str(data.get('start', '')))
+    end_ids = graphe.ids_par_nom(str(data.get('end', '')))
+    if not start_ids or not end_ids:
+        return jsonify({'error': "Une ou les deux stations ne sont pas dans le réseau."})
 
-    # Ajouter les coordonnées de la dernière station
-    if noms_station_to_num[end_station].lower() in station_coords:
-        chemin_coords.append(station_coords[noms_station_to_num[end_station].lower()])
-
-    # Préparer les coordonnées X et Y pour le tracé
-    x_coords = [coord[0] for coord in chemin_coords]
-    y_coords = [coord[1] for coord in chemin_coords]
-
-    return jsonify({
+    cle = (courant.version, 'alternatives', tuple(start_ids), tuple(end_ids), k, detour, partage_max)
+    en_cache = cache_chemins.get(cle)
+    if en_cache is None:
+        with mesures.phase('chemin.calcul'):
+            resultat, trace = calculer(('chemin', courant.perturbations.generation) + cle, calculer_alternatives,
+                                       courant, start_ids, end_ids, k, detour, partage_max)
+        en_cache = (jsonify(resultat).get_data(), trace)
+        mettre_si_courant(cache_chemins, cle, en_cache, courant)
+    return app.response_class(en_cache[0], mimetype='application/json')
+
+
+def calculer_alternatives(reseau, start_ids, end_ids, k, detour, partage_max):
+    graphe = reseau.graphe
+    with mesures.phase('chemin.recherche'):
+        itineraires = alternatives(graphe, start_ids, end_ids, k, detour, partage_max)
+    if not itineraires:
+        return ({'error': "Il n'y a pas de chemin entre ces deux stations."},
+                trace_chemins([], start_ids, end_ids, float('inf')))
+
+    plus_court = itineraires[0][0]
+    routes = []
+    for temps, chemin in itineraires:
+        minutes, seconds = divmod(temps, 60)
+        trace_carte = tracer_chemin(reseau, chemin)
+        routes.append({
+            'instructions': instructions_chemin(graphe, chemin, chemin[0], chemin[-1]),
+            'time': f"{minutes} minutes et {seconds} secondes",
+            'detour': round(temps / plus_court, 3) if plus_court else 1.0,
+            'polyline': trace_carte
+        })
+    # Tout chemin plus court que la limite de détour peut devenir candidat
+    trace = trace_chemins([chemin for _, chemin in itineraires], start_ids, end_ids, plus_court * detour)
+    return {'routes': routes}, trace
+
+
+# Horaires du réseau actif, construits une fois par version (GTFS du dossier de
+# données, sinon fréquences par ligne)
+def horaires_reseau(courant):
+    horaires = cache_horaires.get(courant.version)
+    if horaires is None:
+        with mesures.phase('horaires.chargement'):
+            horaires = calculer(('horaires', courant.version, courant.perturbations.generation),
+                                charger_horaires, courant.dossier, courant.graphe, courant.perturbations.changements)
+        mettre_si_courant(cache_horaires, courant.version, horaires, courant)
+    return horaires
+
+
+# Arrivée au plus tôt pour un départ à une heure donnée. Sans train à cette heure (après
+# le dernier), repli sur les temps fixes de metro.txt, sans attente.
+# Sans trace : les horaires sont reconstruits à chaque changement de perturbations.
+def calculer_itineraire_horaire(reseau, horaires, start_ids, end_ids, depart):
+    graphe = reseau.graphe
+    with mesures.phase('chemin.recherche'):
+        arrivee, etapes = arrivee_au_plus_tot(horaires, start_ids, end_ids, depart)
+    if not etapes:
+        resultat, _ = calculer_itineraire(reseau, start_ids[0], end_ids[0])
+        resultat['horaires'] = False
+        if arrivee == float('inf') and 'error' not in resultat:
+            resultat['avertissement'] = "Pas de train à cette heure : temps de parcours sans attente."
+        return resultat, None
+
+    instructions, chemin = [], []
+    for course, de, vers, heure_depart, heure_arrivee, parcours in etapes:
+        if course == -1:
+            instructions.append(f"Correspondance à pied à {graphe.nom(de)} ({heure_arrivee - heure_depart} s).")
+        else:
+            instructions.append(
+                f"Prenez la ligne {graphe.stations[parcours[0]].ligne} de {graphe.nom(de)} à "
+                f"{en_heure(heure_depart)} jusqu'à {graphe.nom(vers)} (arrivée {en_heure(heure_arrivee)})."
+            )
+        chemin.extend(parcours[1:] if chemin else parcours)
+
+    minutes, seconds = divmod(arrivee - heure_de_service(depart), 60)
+    with mesures.phase('chemin.trace'):
+        trace_carte = tracer_chemin(reseau, chemin)
+    return {
         'instructions': instructions,
         'time': f"{minutes} minutes et {seconds} secondes",
-        'x_coords': x_coords,
-        'y_coords': y_coords
-    })
+        'depart': en_heure(depart),
+        'arrivee': en_heure(arrivee),
+        'horaires': True,
+        'source_horaires': horaires.source,
+        'polyline': trace_carte
+    }, None
+
+
+# Tracé d'un chemin sur la carte : polylignes précalculées des arêtes (src/geometrie.py),
+# encodées en polyligne compacte (écarts entre points successifs)
+def tracer_chemin(reseau, chemin):
+    x_coords, y_coords = reseau.geometrie.tracer(chemin)
+    return encoder_polyligne(x_coords, y_coords)
+
+
+# Paire d'une demande par lots : {"start": .., "end": ..} ou [départ, arrivée] ; None si
+# elle n'a aucune de ces deux formes
+def lire_paire(paire):
+    if isinstance(paire, dict):
+        return str(paire.get('start', '')), str(paire.get('end', ''))
+    if isinstance(paire, list) and len(paire) == 2:
+        return str(paire[0]), str(paire[1])
+    return None
+
+
+# Calcul d'une liste de paires : {"pairs": [["Bastille", "Nation"], ...], "paths": true}
+# Chaque résultat est dans l'ordre de la demande, avec son erreur éventuelle (une paire
+# mal formée n'empêche pas de calculer les autres).
+@app.route('/chemin/batch', methods=['POST'])
+def chemin_batch():
+    data = request.json
+    if not isinstance(data, dict) or not isinstance(data.get('pairs'), list):
+        return requete_invalide("Corps attendu : {\"pairs\": [[départ, arrivée], ...]}.")
+    lues = [lire_paire(paire) for paire in data['pairs']]
+    paires = [paire for paire in lues if paire is not None]
+
+    avec_chemins = bool(data.get('paths', True))
+    courant = reseau
+    calcules = iter(calculer((courant.version, courant.perturbations.generation, 'lot', tuple(paires), avec_chemins),
+                             chemins_par_lot, courant.graphe, paires, avec_chemins))
+    resultats = [next(calcules) if paire is not None else
+                 {'error': "Paire invalide : {\"start\": .., \"end\": ..} ou [départ, arrivée] attendu."}
+                 for paire in lues]
+    return jsonify({'results': resultats})
+
+
+# Limite de temps de /distances en minutes : nombre fini, positif ou nul ; None (absente
+# ou vide) pour aucune limite. Lève ValueError avec le message.
+def lire_max_minutes(valeur):
+    if valeur in (None, ''):
+        return None
+    max_minutes = nombre_fini(valeur)
+    if max_minutes is None or max_minutes < 0:
+        raise ValueError(f"Limite de temps invalide : {valeur} (nombre de minutes positif ou nul).")
+    return max_minutes
+
+
+# Temps de trajet depuis une station vers toutes les autres, en une seule recherche.
+# ?from=<station>&max_minutes=<n> ; la réponse JSON est envoyée au fil de l'eau.
+@app.route('/distances', methods=['GET'])
+def distances_depuis():
+    courant = reseau
+    graphe = courant.graphe
+    try:
+        max_minutes = lire_max_minutes(request.args.get('max_minutes'))
+    except ValueError as erreur:
+        return requete_invalide(str(erreur))
+    sources = graphe.ids_par_nom(request.args.get('from', ''))
+    if not sources:
+        return jsonify({'error': "La station n'est pas dans le réseau."})
+
+    # L'arbre complet est mis en cache : toutes les limites de temps s'en servent
+    cle = (courant.version, tuple(sources))
+    arbre = cache_arbres.get(cle)
+    if arbre is None:
+        arbre = calculer(('arbre', courant.perturbations.generation) + cle, arbre_plus_courts_chemins, graphe, sources)
+        mettre_si_courant(cache_arbres, cle, arbre, courant)
+    distances, _ = arbre
+
+    limite = max_minutes * 60 if max_minutes is not None else float('inf')
+    # Une entrée par nom de station : le plus proche de ses sommets
+    par_nom = {}
+    for sommet, distance in enumerate(distances):
+        if distance != float('inf') and distance <= limite:
+            nom = graphe.nom(sommet)
+            if distance < par_nom.get(nom, float('inf')):
+                par_nom[nom] = distance
+    resultats = sorted(par_nom.items(), key=lambda item: item[1])
+
+    def generer():
+        yield '{"from": %s, "stations": [' % json.dumps(graphe.nom(sources[0]), ensure_ascii=False)
+        for i, (nom, temps) in enumerate(resultats):
+            yield (',' if i else '') + json.dumps({'name': nom, 'time': temps}, ensure_ascii=False)
+        yield ']}'
+
+    return app.response_class(generer(), mimetype='application/json')
+
+
+@app.route('/cache/stats', methods=['GET'])
+def statistiques_cache():
+    stats = cache_chemins.stats()
+    stats['version_graphe'] = reseau.version
+    stats['arbres'] = cache_arbres.stats()
+    stats['calcul'] = pool_calcul.stats()
+    stats['analyses'] = cache_analyses.stats()
+    return jsonify(stats)
 
 
 
 @app.route('/acpm', methods=['GET'])
 def calculer_acpm():
-    acpm, total_weight = prim(graphe)
-    acpm_list = [
-        {
-            'parent': noms_station_to_num[parent],
-            'child': noms_station_to_num[enfant],
-            'poids': poids
-        }
-        for parent, enfant, poids in acpm
-    ]
-    return jsonify({'acpm': acpm_list, 'total_weight': total_weight})
+    return reponse_analyse('acpm', analyse_acpm)
 
 @app.route('/search_stations')
 def search_stations():
-    query = request.args.get('q', '').strip().lower()
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 10, type=int)
+    graphe = reseau.graphe
     if not query:
         return jsonify([])
 
-    seen = set()  # Utilisé pour éviter les doublons
+    # Un résultat par nom, classé (exact, préfixe, mot, sous-chaîne, approché),
+    # avec tous les sommets qui portent ce nom
     matching_stations = []
-
-    for num, name in noms_station_to_num.items():
-        lower_name = name.lower()
-        if lower_name.startswith(query) and lower_name not in seen:
-            matching_stations.append({'id': num, 'name': name})
-            seen.add(lower_name)  # Ajoute le nom à l'ensemble pour éviter les doublons
+    for cle in graphe.noms.rechercher(query, limite=limit):
+        nums = [str(graphe.stations[i].num) for i in graphe.noms.ids_par_cle[cle]]
+        matching_stations.append({'id': nums[0], 'ids': nums, 'name': graphe.noms.nom(cle)})
 
     return jsonify(matching_stations)
 
 
+# Perturbations actives (fermetures, ralentissements), appliquées sans recharger le réseau
+@app.route('/perturbations', methods=['GET'])
+def lister_perturbations():
+    return jsonify({'perturbations': reseau.perturbations.resume()})
+
+
+# Ajout d'une perturbation (format dans src/perturbations.py, creer_perturbation)
+@app.route('/perturbations', methods=['POST'])
+def ajouter_perturbation():
+    donnees = request.json or {}
+    if not isinstance(donnees, dict):
+        return requete_invalide("Le corps doit être un objet JSON.")
+    ajoutee = []
+
+    # Résolue et ajoutée sous le verrou de modifier_perturbations : sur le graphe et les
+    # perturbations du moment, même si un rechargement vient de les remplacer
+    def ajouter(perturbations):
+        ajoutee.append(creer_perturbation(reseau.graphe_base, donnees))
+        return perturbations.ajouter(ajoutee[0])
+
+    try:
+        resultat = modifier_perturbations(ajouter)
+    except PerturbationInvalide as erreur:
+        reponse = jsonify({'error': str(erreur)})
+        reponse.status_code = 400
+        return reponse
+    resultat['perturbation'] = ajoutee[0].resume()
+    reponse = jsonify(resultat)
+    reponse.status_code = 201
+    return reponse
+
+
+@app.route('/perturbations/<int:identifiant>', methods=['DELETE'])
+def retirer_perturbation(identifiant):
+    try:
+        resultat = modifier_perturbations(lambda perturbations: perturbations.retirer(identifiant))
+    except KeyError:
+        reponse = jsonify({'error': f"Perturbation inconnue : {identifiant}."})
+        reponse.status_code = 404
+        return reponse
+    return jsonify(resultat)
+
+
+@app.route('/perturbations', methods=['DELETE'])
+def retirer_perturbations():
+    return jsonify(modifier_perturbations(lambda perturbations: perturbations.vider()))
+
+
+# Version, taille, durée et mémoire du chargement du réseau actif
+@app.route('/reseau', methods=['GET'])
+def informations_reseau():
+    return jsonify(reseau.resume())
+
+
+def reserve_admin(route):
+    @functools.wraps(route)
+    def verifier(*args, **kwargs):
+        if ADMIN_JETON and request.headers.get('Authorization') != f"Bearer {ADMIN_JETON}":
+            reponse = jsonify({'error': "Jeton d'administration manquant ou invalide."})
+            reponse.status_code = 401
+            return reponse
+        return route(*args, **kwargs)
+    return verifier
+
+
+def etat_rechargement():
+    etat = rechargeur.etat()
+    etat['version'] = reseau.version
+    etat['surveillance'] = SURVEILLANCE if surveillance is not None and surveillance.is_alive() else None
+    return etat
+
+
+# Rechargement du dossier de données sans redémarrer : 202 et rechargement en arrière-plan
+# (état sur GET /admin/rechargement), ou ?attendre=1 pour recevoir son rapport (version
+# publiée, durée ; 500 si le nouveau réseau n'a pas pu être chargé, l'ancien reste actif)
+@app.route('/admin/recharger', methods=['POST'])
+@reserve_admin
+def recharger():
+    fini, _ = rechargeur.demander('admin')
+    if request.args.get('attendre') not in ('1', 'true'):
+        reponse = jsonify(etat_rechargement())
+        reponse.status_code = 202
+        reponse.headers['Location'] = '/admin/rechargement'
+        return reponse
+    fini.wait()
+    etat = etat_rechargement()
+    reponse = jsonify(etat)
+    reponse.status_code = 200 if etat['dernier']['statut'] == 'ok' else 500
+    return reponse
+
+
+@app.route('/admin/rechargement', methods=['GET'])
+@reserve_admin
+def suivre_rechargement():
+    return jsonify(etat_rechargement())
+
+
 
 if __name__ == '__main__':
-    lire_graphe("C:/Users/Joe/Desktop/Metro/Metro/data/metro.txt")  # Load graph data
     app.run(debug=True)
 
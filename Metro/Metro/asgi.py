@@ -0,0 +1,12 @@
+# Point d'entrée ASGI (serveur asynchrone) : uvicorn asgi:asgi_app --workers 2
+# Chaque requête Flask s'exécute dans un thread de l'adaptateur ; les calculs sur le
+# graphe passent par le pool borné de app.py (429 quand il est saturé).
+# asgiref et uvicorn ne servent qu'à ce point d'entrée : pip install asgiref uvicorn
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as erreur:
+    raise ImportError("Le point d'entrée ASGI demande asgiref : pip install asgiref uvicorn") from erreur
+
+from app import app
+
+asgi_app = WsgiToAsgi(app)
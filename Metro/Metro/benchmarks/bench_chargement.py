@@ -0,0 +1,94 @@
+# Benchmark : lecture de metro.txt + pospoints.txt par expressions régulières (et calcul de
+# la géométrie des chemins) contre chargement de l'instantané binaire (mmap), à chaud dans le processus et à froid dans
+# un interpréteur neuf (import compris, comme au démarrage d'un worker).
+#
+# Usage : python benchmarks/bench_chargement.py [--repetitions N] [--froid N]
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+from src.chargement import lire_graphe, lire_traces, lire_pospoints, FICHIER_METRO, FICHIER_POSPOINTS
+from src.geometrie import construire_geometrie
+from src.instantane import chemin_instantane, construire_instantane, lire_instantane
+
+DOSSIER_DONNEES = os.path.join(RACINE, 'data')
+
+FROID_TEXTE = ("import os, time; t0 = time.perf_counter(); "
+               "from src.chargement import lire_graphe, lire_traces, lire_pospoints; "
+               "from src.geometrie import construire_geometrie; "
+               "g = lire_graphe(os.path.join({d!r}, 'metro.txt')); t = lire_traces(os.path.join({d!r}, 'pospoints.txt')); "
+               "lire_pospoints(None, t); construire_geometrie(g, t); "
+               "print(time.perf_counter() - t0)")
+FROID_INSTANTANE = ("import time; t0 = time.perf_counter(); "
+                    "from src.instantane import lire_instantane; "
+                    "lire_instantane({f!r}); "
+                    "print(time.perf_counter() - t0)")
+
+
+def mesurer(fonction, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - t0)
+    return meilleur
+
+
+def mesurer_froid(code, repetitions):
+    return min(
+        float(subprocess.run([sys.executable, '-c', code], cwd=RACINE, check=True,
+                             capture_output=True, text=True).stdout)
+        for _ in range(repetitions)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare la lecture texte et l'instantané binaire")
+    parser.add_argument('--dossier', default=DOSSIER_DONNEES)
+    parser.add_argument('--repetitions', type=int, default=50)
+    parser.add_argument('--froid', type=int, default=5,
+                        help="Nombre de démarrages d'interpréteur mesurés (0 pour ne pas mesurer)")
+    args = parser.parse_args()
+
+    # Copie des données : le benchmark n'écrit pas d'instantané dans le vrai dossier
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom in (FICHIER_METRO, FICHIER_POSPOINTS):
+            shutil.copy2(os.path.join(args.dossier, nom), dossier)
+        fichier_metro = os.path.join(dossier, FICHIER_METRO)
+        fichier_points = os.path.join(dossier, FICHIER_POSPOINTS)
+
+        t0 = time.perf_counter()
+        fichier = construire_instantane(dossier)
+        print(f"Instantané construit en {(time.perf_counter() - t0) * 1000:.1f} ms "
+              f"({os.path.getsize(fichier)} octets)")
+
+        graphe, _, _ = lire_instantane(chemin_instantane(dossier))
+        print(f"{len(graphe)} sommets, {len(graphe.cibles)} arcs, meilleur de {args.repetitions}")
+
+        def lire_texte():
+            graphe, traces = lire_graphe(fichier_metro), lire_traces(fichier_points)
+            return lire_pospoints(fichier_points, traces), construire_geometrie(graphe, traces)
+
+        texte = mesurer(lire_texte, args.repetitions)
+        instantane = mesurer(lambda: lire_instantane(fichier), args.repetitions)
+        verifie = mesurer(lambda: lire_instantane(fichier, fichier_metro, fichier_points), args.repetitions)
+        print(f"texte (regex)              : {texte * 1000:8.2f} ms")
+        print(f"instantané (mmap)          : {instantane * 1000:8.2f} ms (x{texte / instantane:.1f})")
+        print(f"instantané + fraîcheur     : {verifie * 1000:8.2f} ms (x{texte / verifie:.1f})")
+
+        if args.froid:
+            froid_texte = mesurer_froid(FROID_TEXTE.format(d=dossier), args.froid)
+            froid_instantane = mesurer_froid(FROID_INSTANTANE.format(f=fichier), args.froid)
+            print(f"à froid, texte             : {froid_texte * 1000:8.2f} ms")
+            print(f"à froid, instantané        : {froid_instantane * 1000:8.2f} ms "
+                  f"(x{froid_texte / froid_instantane:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+# Comparaison mémoire / vitesse : ancienne représentation (dictionnaires de listes
+# de tuples, clés chaînes) contre MetroGraph (CSR, identifiants entiers).
+# La mémoire de MetroGraph comprend son index des noms (src/noms.py), que les
+# dictionnaires n'avaient pas : il est aussi mesuré à part.
+#
+# Usage : python benchmarks/bench_graphe.py [--repetitions N]
+import os
+import sys
+import time
+import heapq
+import argparse
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.chargement import lire_graphe
+from src.noms import IndexNoms
+from src.graph import prim, est_connexe
+from src.routage import dijkstra
+
+FICHIER_METRO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'metro.txt')
+
+
+# --- Ancienne représentation, reconstruite à l'identique depuis le MetroGraph ---
+
+def construire_dictionnaires(graphe):
+    sommets, dict_graphe, aretes, noms_station_to_num, lignes_station = {}, {}, [], {}, {}
+    for station in graphe.stations:
+        num = str(station.num)
+        noms_station_to_num[num] = station.nom
+        lignes_station[num] = [station.ligne]
+        sommets[num] = {
+            'nom': station.nom,
+            'ligne_num': station.ligne,
+            'terminus': station.terminus,
+            'branchements': station.branchements,
+        }
+        dict_graphe[num] = []
+    for sommet1, sommet2, temps in graphe.aretes():
+        num1, num2 = str(graphe.stations[sommet1].num), str(graphe.stations[sommet2].num)
+        dict_graphe[num1].append((num2, temps))
+        dict_graphe[num2].append((num1, temps))
+        aretes.append((num1, num2, temps))
+    return sommets, dict_graphe, aretes, noms_station_to_num, lignes_station
+
+
+def dijkstra_dict(graphe, start, end=None):
+    distances = {station: float('inf') for station in graphe}
+    pred = {station: None for station in graphe}
+    distances[start] = 0
+    tas = [(0, start)]
+    visites = set()
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if sommet in visites:
+            continue
+        visites.add(sommet)
+        if sommet == end:
+            break
+        for voisin, temps in graphe[sommet]:
+            if distance + temps < distances[voisin]:
+                distances[voisin] = distance + temps
+                pred[voisin] = sommet
+                heapq.heappush(tas, (distance + temps, voisin))
+    return distances, pred
+
+
+def prim_dict(graphe):
+    acpm, total_weight, visited, edges = [], 0, set(), []
+    start_node = next(iter(graphe))
+    visited.add(start_node)
+    for voisin, poids in graphe[start_node]:
+        heapq.heappush(edges, (poids, start_node, voisin))
+    while edges:
+        poids, parent, enfant = heapq.heappop(edges)
+        if enfant not in visited:
+            visited.add(enfant)
+            acpm.append((parent, enfant, poids))
+            total_weight += poids
+            for voisin, poids_voisin in graphe[enfant]:
+                if voisin not in visited:
+                    heapq.heappush(edges, (poids_voisin, enfant, voisin))
+    return acpm, total_weight
+
+
+def est_connexe_dict(graphe):
+    visited = set()
+    queue = deque([next(iter(graphe))])
+    while queue:
+        current = queue.popleft()
+        if current not in visited:
+            visited.add(current)
+            for voisin, _ in graphe[current]:
+                if voisin not in visited:
+                    queue.append(voisin)
+    return len(visited) == len(graphe)
+
+
+# --- Mesures ---
+
+def memoire(construction):
+    tracemalloc.start()
+    resultat = construction()
+    taille, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, taille
+
+
+# "(xN plus compact)" ou "(xN plus volumineux)" par rapport aux dictionnaires
+def comparer_memoire(taille_dict, taille):
+    if taille <= taille_dict:
+        return f"(x{taille_dict / taille:.1f} plus compact)"
+    return f"(x{taille / taille_dict:.1f} plus volumineux)"
+
+
+def chrono(fonction, repetitions):
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return (time.perf_counter() - t0) / repetitions * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dictionnaires et MetroGraph (CSR)")
+    parser.add_argument('--fichier', default=FICHIER_METRO)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    graphe, taille_csr = memoire(lambda: lire_graphe(args.fichier))
+    dictionnaires, taille_dict = memoire(lambda: construire_dictionnaires(graphe))
+    dict_graphe = dictionnaires[1]
+
+    _, taille_index = memoire(lambda: IndexNoms(graphe.stations))
+
+    print(f"{len(graphe)} sommets, {len(graphe.aretes_u)} arêtes")
+    print(f"mémoire    dictionnaires : {taille_dict / 1024:8.1f} Kio")
+    print(f"mémoire    MetroGraph    : {taille_csr / 1024:8.1f} Kio {comparer_memoire(taille_dict, taille_csr)}")
+    print(f"  dont index des noms    : {taille_index / 1024:8.1f} Kio")
+    print(f"  hors index des noms    : {(taille_csr - taille_index) / 1024:8.1f} Kio "
+          f"{comparer_memoire(taille_dict, taille_csr - taille_index)}")
+
+    r = args.repetitions
+    sources = range(len(graphe))
+    cles = list(dict_graphe)
+    mesures = [
+        ("dijkstra (toutes sources)",
+         lambda: [dijkstra_dict(dict_graphe, s) for s in cles],
+         lambda: [dijkstra(graphe, s) for s in sources]),
+        ("prim", lambda: prim_dict(dict_graphe), lambda: prim(graphe)),
+        ("est_connexe", lambda: est_connexe_dict(dict_graphe), lambda: est_connexe(graphe)),
+    ]
+    for nom, ancien, nouveau in mesures:
+        t_ancien = chrono(ancien, r)
+        t_nouveau = chrono(nouveau, r)
+        print(f"{nom:26}: {t_ancien:9.3f} ms -> {t_nouveau:9.3f} ms (x{t_ancien / t_nouveau:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Benchmark : bellman_ford (ancienne implémentation de /chemin) contre Dijkstra
+# et Dijkstra bidirectionnel, sur toutes les paires de stations de data/metro.txt.
+#
+# Usage : python benchmarks/bench_routage.py [--sources N]
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.chargement import lire_graphe
+from src.graph import bellman_ford, reconstruire_chemin
+from src.routage import dijkstra, dijkstra_bidirectionnel
+
+FICHIER_METRO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'metro.txt')
+
+
+def longueur_chemin(graphe, chemin):
+    return sum(graphe.temps(station1, station2) for station1, station2 in zip(chemin, chemin[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bellman_ford et Dijkstra sur metro.txt")
+    parser.add_argument('--fichier', default=FICHIER_METRO)
+    parser.add_argument('--sources', type=int, default=None,
+                        help="Limiter le nombre de stations de départ (toutes par défaut)")
+    args = parser.parse_args()
+
+    graphe = lire_graphe(args.fichier)
+    stations = range(len(graphe))
+    sources = stations[:args.sources] if args.sources else stations
+    print(f"{len(graphe)} sommets, {len(graphe.cibles)} arcs, "
+          f"{len(sources)} sources x {len(stations)} destinations")
+
+    temps_bf = temps_dij = temps_bidir = 0.0
+    paires = 0
+
+    for start in sources:
+        # Avant : un bellman_ford complet par requête /chemin
+        t0 = time.perf_counter()
+        reference, _ = bellman_ford(graphe, start)
+        temps_bf += time.perf_counter() - t0
+
+        for end in stations:
+            t0 = time.perf_counter()
+            distances, pred = dijkstra(graphe, start, end)
+            temps_dij += time.perf_counter() - t0
+            assert distances[end] == reference[end], (start, end)
+
+            t0 = time.perf_counter()
+            distances, pred = dijkstra_bidirectionnel(graphe, start, end)
+            temps_bidir += time.perf_counter() - t0
+            assert distances[end] == reference[end], (start, end)
+            if distances[end] != float('inf'):
+                chemin = reconstruire_chemin(pred, start, end)
+                assert longueur_chemin(graphe, chemin) == reference[end], (start, end)
+
+            paires += 1
+
+    # Une requête /chemin coûtait un bellman_ford complet, quelle que soit la destination
+    par_requete_bf = temps_bf / len(sources)
+    print(f"bellman_ford            : {par_requete_bf * 1000:9.3f} ms / requête")
+    print(f"dijkstra (arrêt cible)  : {temps_dij / paires * 1000:9.3f} ms / requête "
+          f"(x{par_requete_bf / (temps_dij / paires):.0f})")
+    print(f"dijkstra bidirectionnel : {temps_bidir / paires * 1000:9.3f} ms / requête "
+          f"(x{par_requete_bf / (temps_bidir / paires):.0f})")
+    print(f"{paires} paires vérifiées")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+# Suite de benchmarks du cœur de routage sur des réseaux synthétiques de taille croissante
+# (benchmarks/generer_reseau.py) : lecture de metro.txt, bellman_ford, prim, est_connexe,
+# Kruskal, Dijkstra bidirectionnel, index de repères (construction et A* guidé, avec les
+# sommets fixés par requête), criticité (intermédiarité et fermetures), chargement complet et /chemin de bout en bout par le client
+# de test Flask.
+#
+# Les résultats sont écrits en JSON (--sortie) avec le commit et la machine ; --reference
+# compare avec un fichier d'un autre commit (rapport > 1 : plus lent qu'avant).
+#
+# Usage : python benchmarks/bench_suite.py [--tailles 1000 10000 100000] [--sortie resultats.json]
+#                                          [--reference ancien.json]
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generer_reseau import generer
+from src.chargement import lire_graphe
+from src.graph import bellman_ford, prim, est_connexe
+from src.analyse import foret_couvrante
+from src.routage import dijkstra_bidirectionnel
+from src.reperes import calculer_reperes, plus_court_chemin_alt
+from src.criticite import criticite
+
+
+# Meilleur temps et médiane sur `repetitions` appels, en millisecondes
+def chrono(fonction, repetitions):
+    temps = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        fonction()
+        temps.append((time.perf_counter() - t0) * 1000)
+    return {'ms': min(temps), 'mediane_ms': statistics.median(temps), 'repetitions': repetitions}
+
+
+# Temps moyen et 95e centile d'une requête, en millisecondes
+def chrono_requetes(fonction, arguments):
+    temps = []
+    for argument in arguments:
+        t0 = time.perf_counter()
+        fonction(argument)
+        temps.append((time.perf_counter() - t0) * 1000)
+    temps.sort()
+    return {'ms': statistics.fmean(temps), 'p95_ms': temps[int(len(temps) * 0.95)], 'requetes': len(temps)}
+
+
+def commit_courant():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def mesurer_taille(client, app, taille, args):
+    aleatoire = random.Random(args.graine)
+    with tempfile.TemporaryDirectory() as dossier:
+        nb_sommets, nb_aretes = generer(dossier, taille, args.graine)
+        fichier_metro = os.path.join(dossier, 'metro.txt')
+        mesures = {}
+
+        mesures['lire_graphe'] = chrono(lambda: lire_graphe(fichier_metro), args.repetitions)
+        graphe = lire_graphe(fichier_metro)
+        n = len(graphe)
+
+        if n <= args.max_bellman_ford:
+            mesures['bellman_ford'] = chrono(lambda: bellman_ford(graphe, aleatoire.randrange(n)),
+                                             args.repetitions)
+        mesures['prim'] = chrono(lambda: prim(graphe), args.repetitions)
+        mesures['est_connexe'] = chrono(lambda: est_connexe(graphe), args.repetitions)
+        mesures['foret_couvrante'] = chrono(lambda: foret_couvrante(graphe), args.repetitions)
+
+        paires = [(aleatoire.randrange(n), aleatoire.randrange(n)) for _ in range(args.requetes)]
+        mesures['dijkstra_bidirectionnel'] = chrono_requetes(
+            lambda paire: dijkstra_bidirectionnel(graphe, *paire), paires)
+
+        index = []
+        mesures['reperes_construction'] = chrono(lambda: index.append(calculer_reperes(graphe)), 1)
+        fixes = []
+        mesures['alt'] = chrono_requetes(
+            lambda paire: fixes.append(plus_court_chemin_alt(index[0], graphe, [paire[0]], [paire[1]])[2]), paires)
+        mesures['alt']['sommets_fixes_moyen'] = statistics.fmean(fixes)
+        if n <= args.max_criticite:
+            mesures['criticite'] = chrono(lambda: criticite(graphe), 1)
+
+        # Chargement complet (lecture texte, index, écriture de l'instantané) puis /chemin
+        mesures['charger_reseau'] = chrono(lambda: app.charger_donnees(dossier), 1)
+        noms = [(graphe.nom(depart), graphe.nom(arrivee)) for depart, arrivee in paires]
+
+        def chemin(paire):
+            reponse = client.post('/chemin', json={'start': paire[0], 'end': paire[1]})
+            assert reponse.status_code == 200, reponse.status_code
+
+        mesures['chemin_http'] = chrono_requetes(chemin, noms)
+        mesures['chemin_http_cache'] = chrono_requetes(chemin, noms)
+
+    return {'taille': taille, 'sommets': nb_sommets, 'aretes': nb_aretes, 'mesures': mesures}
+
+
+def afficher(resultat, reference):
+    print(f"--- {resultat['sommets']} sommets, {resultat['aretes']} arêtes")
+    anciennes = {}
+    for ancien in (reference or {}).get('resultats', []):
+        if ancien['taille'] == resultat['taille']:
+            anciennes = ancien['mesures']
+    for nom, mesure in resultat['mesures'].items():
+        ligne = f"{nom:24}: {mesure['ms']:11.3f} ms"
+        if 'p95_ms' in mesure:
+            ligne += f"  (p95 {mesure['p95_ms']:.3f} ms)"
+        if 'sommets_fixes_moyen' in mesure:
+            ligne += f"  {mesure['sommets_fixes_moyen']:.0f} sommets fixés"
+        if nom in anciennes:
+            ligne += f"  x{mesure['ms'] / anciennes[nom]['ms']:.2f} / référence"
+        print(ligne)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du routage sur des réseaux synthétiques")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--requetes', type=int, default=200,
+                        help="Nombre de paires pour Dijkstra et /chemin")
+    # bellman_ford est en O(V·E) (environ 1 s à 1000 sommets, 1 min et demie à 10000) et la
+    # criticité en O(V²) au moins (environ 45 s à 1000 sommets) : par défaut, les deux ne
+    # sont mesurés que sur le plus petit réseau
+    parser.add_argument('--max-bellman-ford', type=int, default=2000,
+                        help="Au-delà de ce nombre de sommets, bellman_ford n'est pas mesuré")
+    parser.add_argument('--max-criticite', type=int, default=1000,
+                        help="Au-delà de ce nombre de sommets, la criticité n'est pas mesurée")
+    parser.add_argument('--graine', type=int, default=1)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    parser.add_argument('--reference', help="Résultats JSON d'un autre commit à comparer")
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = json.load(f)
+
+    # app.py charge data/ à l'import ; chaque taille recharge ensuite son propre dossier
+    import app
+    client = app.app.test_client()
+
+    resultats = {
+        'commit': commit_courant(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'graine': args.graine,
+        'resultats': [],
+    }
+    for taille in args.tailles:
+        resultat = mesurer_taille(client, app, taille, args)
+        resultats['resultats'].append(resultat)
+        afficher(resultat, reference)
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Générateur de réseaux synthétiques au format de data/metro.txt et data/pospoints.txt,
+# pour mesurer le cœur de routage bien au-delà des 376 sommets du métro.
+#
+# Les stations sont les points d'une grille ; chaque ligne part d'une station déjà
+# desservie (le réseau reste connexe) et avance presque en ligne droite, en tournant
+# de temps en temps. Comme dans metro.txt, une station desservie par plusieurs lignes
+# a un sommet par ligne, reliés deux à deux par des arêtes de correspondance ; certaines
+# lignes ont une branche (branchement 1 et 2) et leurs extrémités sont des terminus.
+#
+# Usage : python benchmarks/generer_reseau.py 100000 dossier/ [--graine 1]
+import os
+import math
+import random
+import argparse
+
+DIRECTIONS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+ECART_POINTS = 12
+
+
+# Tracé d'une ligne : tout droit, avec un virage de 45° de temps en temps ou quand la
+# station suivante est déjà desservie par deux lignes (les lignes se croisent plus
+# qu'elles ne se superposent). S'arrête au bord de la grille ou en se recoupant.
+def _trace_ligne(aleatoire, depart, cote, longueur, sommets_par_site):
+    x, y = depart
+    direction = aleatoire.randrange(len(DIRECTIONS))
+    trace = [depart]
+    vus = {depart}
+    while len(trace) < longueur:
+        if aleatoire.random() < 0.15:
+            direction = (direction + aleatoire.choice((-1, 1))) % len(DIRECTIONS)
+        candidates = (direction, (direction + 1) % len(DIRECTIONS), (direction - 1) % len(DIRECTIONS))
+        direction = min(candidates, key=lambda d: len(sommets_par_site.get(
+            (x + DIRECTIONS[d][0], y + DIRECTIONS[d][1]), ())) >= 2)
+        dx, dy = DIRECTIONS[direction]
+        x, y = x + dx, y + dy
+        if not (0 <= x < cote and 0 <= y < cote) or (x, y) in vus:
+            break
+        trace.append((x, y))
+        vus.add((x, y))
+    return trace
+
+
+# Écrit metro.txt et pospoints.txt dans `dossier` pour environ `sommets` sommets ;
+# renvoie (nombre de sommets, nombre d'arêtes)
+def generer(dossier, sommets, graine=1):
+    aleatoire = random.Random(graine)
+    # Une case de grille par sommet : les lignes se croisent sans trop se superposer
+    # (1,5 à 2 lignes par station desservie, 1,3 à 1,9 arête par sommet)
+    cote = max(4, math.ceil(math.sqrt(sommets)))
+
+    sommets_par_site = {}
+    sites = []
+    # Sommet : (site, ligne, terminus, branchement)
+    liste_sommets = []
+    aretes = []
+    numero_ligne = 0
+
+    def ajouter_sommet(site, ligne, branchement):
+        liste_sommets.append([site, ligne, False, branchement])
+        if site not in sommets_par_site:
+            sommets_par_site[site] = []
+            sites.append(site)
+        sommets_par_site[site].append(len(liste_sommets) - 1)
+        return len(liste_sommets) - 1
+
+    def ajouter_troncon(trace, ligne, branchement, precedent=None):
+        for site in trace:
+            if len(liste_sommets) >= sommets:
+                break
+            courant = ajouter_sommet(site, ligne, branchement)
+            if precedent is not None:
+                (x1, y1), (x2, y2) = liste_sommets[precedent][0], site
+                diagonale = x1 != x2 and y1 != y2
+                aretes.append((precedent, courant, aleatoire.randint(45, 110) + 25 * diagonale))
+            precedent = courant
+        if precedent is not None:
+            liste_sommets[precedent][2] = True
+        return precedent
+
+    while len(liste_sommets) < sommets:
+        numero_ligne += 1
+        ligne = str(numero_ligne)
+        if sommets_par_site:
+            # Départ depuis une station peu desservie parmi quelques tirages : le réseau
+            # s'étend vers l'extérieur au lieu de s'épaissir au centre
+            depart = min((aleatoire.choice(sites) for _ in range(4)), key=lambda site: len(sommets_par_site[site]))
+        else:
+            depart = (cote // 2, cote // 2)
+        trace = _trace_ligne(aleatoire, depart, cote, aleatoire.randint(15, 60), sommets_par_site)
+        if len(trace) < 3:
+            continue
+        debut = len(liste_sommets)
+        ajouter_troncon(trace, ligne, 0)
+        liste_sommets[debut][2] = True
+
+        # Une ligne sur cinq se divise en deux branches après sa station du milieu
+        milieu = debut + len(trace) // 2
+        if aleatoire.random() < 0.2 and milieu + 1 < len(liste_sommets):
+            branche = _trace_ligne(aleatoire, liste_sommets[milieu][0], cote, len(trace) - len(trace) // 2,
+                                   sommets_par_site)[1:]
+            if branche:
+                for sommet in range(milieu + 1, len(liste_sommets)):
+                    liste_sommets[sommet][3] = 1
+                ajouter_troncon(branche, ligne, 2, precedent=milieu)
+
+    # Correspondances : tous les sommets d'une même station, deux à deux
+    for site_sommets in sommets_par_site.values():
+        for i, sommet1 in enumerate(site_sommets):
+            for sommet2 in site_sommets[i + 1:]:
+                aretes.append((sommet1, sommet2, aleatoire.randint(120, 300)))
+
+    largeur = max(4, len(str(len(liste_sommets) - 1)))
+    os.makedirs(dossier, exist_ok=True)
+    with open(os.path.join(dossier, 'metro.txt'), 'w', encoding='utf-8') as f:
+        for num, (site, ligne, terminus, branchement) in enumerate(liste_sommets):
+            f.write(f"V {num:0{largeur}d} Station {site[0]} {site[1]} ;{ligne} ;{terminus} {branchement}\n")
+        for sommet1, sommet2, temps in aretes:
+            f.write(f"E {sommet1} {sommet2} {temps}\n")
+    with open(os.path.join(dossier, 'pospoints.txt'), 'w', encoding='utf-8') as f:
+        for x, y in sommets_par_site:
+            f.write(f"{x * ECART_POINTS};{y * ECART_POINTS};Station@{x}@{y}\n")
+
+    return len(liste_sommets), len(aretes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un réseau synthétique au format metro.txt")
+    parser.add_argument('sommets', type=int)
+    parser.add_argument('dossier')
+    parser.add_argument('--graine', type=int, default=1)
+    args = parser.parse_args()
+
+    nb_sommets, nb_aretes = generer(args.dossier, args.sommets, args.graine)
+    print(f"{nb_sommets} sommets, {nb_aretes} arêtes écrits dans {args.dossier}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,23 @@
-from geopy.geocoders import Nominatim
+import os
+import sys
+import json
 import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+DOSSIER_DONNEES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Requêtes essayées dans l'ordre pour une station, jusqu'à la première trouvée
+REQUETES = (
+    "{station}, Paris, France",
+    "Métro {station}, Paris, France",
+    "{station} station, Île-de-France, France",
+)
+# Politique de Nominatim : une requête par seconde au plus
+DEBIT = 1.0
+TRAVAILLEURS = 4
+ESSAIS = 3
 
 
 # Lire les stations uniques depuis metro.txt
@@ -12,46 +30,263 @@ def read_unique_stations(file_path):
                 if len(parts) > 2:
                     station_name = parts[2].split(";")[0].strip().replace(' - ', ', ')
                     stations.add(station_name)
-    return list(stations)
+    return sorted(stations)
 
 
-# Trouver les coordonnées GPS des stations
-def fetch_coordinates(stations):
-    geolocator = Nominatim(user_agent="metro_locator")
-    results = {}
+# Fournisseurs de géocodage : une fonction requête -> (latitude, longitude) ou None si
+# introuvable, qui lève une exception pour une erreur passagère (réseau, quota).
+# Appelée dans un thread : elle peut être bloquante.
+def nominatim_backend(user_agent="metro_locator"):
+    from geopy.geocoders import Nominatim
+    geolocator = Nominatim(user_agent=user_agent)
+
+    def geocode(query):
+        location = geolocator.geocode(query)
+        return (location.latitude, location.longitude) if location else None
+    return geocode
+
+
+# Lire un fichier au format de stations_coordinates.csv : {station: coords ou None si
+# NOT FOUND} ; un fichier absent donne un dictionnaire vide
+def read_coordinates_file(path):
+    coordinates = {}
+    if not os.path.exists(path):
+        return coordinates
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            parts = line.strip().split(';')
+            if len(parts) == 3:
+                try:
+                    coordinates[parts[0]] = (float(parts[1]), float(parts[2]))
+                except ValueError:
+                    continue
+            elif len(parts) == 2 and parts[1] == 'NOT FOUND':
+                coordinates[parts[0]] = None
+    return coordinates
+
+
+# Fournisseur local pour les essais : un fichier station;latitude;longitude (le format de
+# stations_coordinates.csv) ; la station est le plus long nom connu contenu dans la requête
+def file_backend(path):
+    known = {station: coords for station, coords in read_coordinates_file(path).items() if coords}
+
+    def geocode(query):
+        names = [name for name in known if name in query]
+        return known[max(names, key=len)] if names else None
+    return geocode
+
+
+def make_backend(spec):
+    if spec == 'nominatim':
+        return nominatim_backend()
+    if spec.startswith('file:'):
+        return file_backend(spec[len('file:'):])
+    raise ValueError(f"Fournisseur inconnu : {spec} (nominatim ou file:<chemin>)")
+
+
+# Cache persistant des réponses, par texte de requête : une ligne JSON ajoutée (et vidée
+# sur le disque) à chaque réponse, pour qu'un arrêt en cours de route ne perde rien.
+# Une dernière ligne tronquée par un arrêt brutal est ignorée à la relecture.
+class GeocodeCache:
+    def __init__(self, path):
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry['query']] = tuple(entry['coords']) if entry['coords'] else None
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, query):
+        return query in self.entries
+
+    def get(self, query):
+        return self.entries.get(query)
+
+    def add(self, query, coords):
+        self.entries[query] = coords
+        self.file.write(json.dumps({'query': query, 'coords': coords, 'time': int(time.time())},
+                                   ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
 
+# Limite de débit : les départs de requêtes sont espacés d'au moins 1 / debit seconde,
+# mais les requêtes elles-mêmes se recouvrent (la latence du fournisseur ne s'ajoute pas)
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Résultat connu sans interroger le fournisseur : (True, coords ou None) si le cache suffit
+def cached_result(station, cache, retry_not_found=False):
+    for template in REQUETES:
+        query = template.format(station=station)
+        if query not in cache or (retry_not_found and cache.get(query) is None):
+            return False, None
+        if cache.get(query):
+            return True, tuple(cache.get(query))
+    return True, None
+
+
+# Coordonnées d'une station : chaque requête de REQUETES est lue dans le cache, ou envoyée
+# au fournisseur (avec ESSAIS tentatives sur erreur, non mises en cache) puis ajoutée au cache.
+# Chaque envoi, tentative comprise, est décompté de `max_requests` avant de partir : budget
+# épuisé, la station reste non résolue (reprise au lancement suivant).
+async def geocode_station(station, backend, cache, limiter, executor, stats, retry_not_found=False,
+                          max_requests=None):
+    loop = asyncio.get_running_loop()
+    for template in REQUETES:
+        query = template.format(station=station)
+        if query in cache and not (retry_not_found and cache.get(query) is None):
+            coords = cache.get(query)
+        else:
+            coords = None
+            for attempt in range(ESSAIS):
+                # Réservé avant toute attente : les autres tâches voient le budget à jour
+                if max_requests is not None and stats['requests'] >= max_requests:
+                    return station, None, False
+                stats['requests'] += 1
+                await limiter.wait()
+                try:
+                    coords = await loop.run_in_executor(executor, backend, query)
+                    break
+                except Exception as e:
+                    print(f"Erreur pour {station} ({query}) : {e}")
+                    if attempt == ESSAIS - 1:
+                        stats['errors'] += 1
+                        return station, None, False
+                    await asyncio.sleep(2 ** attempt)
+            cache.add(query, list(coords) if coords else None)
+        if coords:
+            return station, tuple(coords), True
+    return station, None, True
+
+
+# Géocodage de toutes les stations par un pool de `workers` tâches asynchrones sous une
+# même limite de débit. Seules les stations absentes du cache (nouvelles, renommées, ou
+# requêtes modifiées) partent vers le fournisseur. Renvoie {station: coords ou None} pour
+# les stations résolues (trouvées ou introuvables) ; celles en erreur sont omises.
+async def fetch_coordinates_async(stations, backend, cache, rate=DEBIT, workers=TRAVAILLEURS,
+                                  retry_not_found=False, max_requests=None):
+    limiter = RateLimiter(rate)
+    queue = asyncio.Queue()
+    results = {}
+    stats = {'requests': 0, 'errors': 0}
     for station in stations:
-        try:
-            location = geolocator.geocode(f"{station}, Paris, France")
-            if location:
-                results[station] = (location.latitude, location.longitude)
-                print(f"Station: {station} | Coords: {location.latitude}, {location.longitude}")
-            else:
-                results[station] = None
-                print(f"Station: {station} not found.")
-            time.sleep(1)  # Pause pour éviter d'être bloqué par l'API
-        except Exception as e:
-            print(f"Erreur pour {station}: {e}")
+        resolved, coords = cached_result(station, cache, retry_not_found)
+        if resolved:
+            results[station] = coords
+        else:
+            queue.put_nowait(station)
+    print(f"{len(results)} station(s) déjà dans le cache, {queue.qsize()} à interroger")
+
+    async def worker(executor):
+        while True:
+            if max_requests is not None and stats['requests'] >= max_requests:
+                return
+            try:
+                station = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            station, coords, resolved = await geocode_station(
+                station, backend, cache, limiter, executor, stats, retry_not_found, max_requests)
+            if resolved:
+                results[station] = coords
+                print(f"Station: {station} | Coords: {coords[0]}, {coords[1]}" if coords
+                      else f"Station: {station} not found.")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        await asyncio.gather(*(worker(executor) for _ in range(workers)))
+    return results, stats
+
+
+def fetch_coordinates(stations, backend=None, cache_file=None, **options):
+    backend = backend or nominatim_backend()
+    cache = GeocodeCache(cache_file or os.path.join(DOSSIER_DONNEES, 'stations_coordinates.cache.jsonl'))
+    try:
+        results, _ = asyncio.run(fetch_coordinates_async(stations, backend, cache, **options))
+    finally:
+        cache.close()
     return results
 
 
-# Sauvegarder les coordonnées dans un fichier
+# Fusion des résultats d'un lancement dans le fichier existant : les stations trouvées
+# remplacent leur ligne, les autres (non interrogées, en erreur, hors budget) gardent la
+# leur, et une réponse introuvable n'efface pas des coordonnées déjà connues.
+# Renvoie (coordonnées fusionnées, modifiées ou non).
+def merge_coordinates(existing, results):
+    merged = dict(existing)
+    for station, coords in results.items():
+        if coords or not merged.get(station):
+            merged[station] = coords
+    return merged, merged != existing
+
+
+# Sauvegarder les coordonnées dans un fichier (fichier temporaire puis remplacement : le
+# fichier précédent reste intact jusqu'au bout)
 def save_coordinates_to_file(coordinates, output_file):
-    with open(output_file, 'w', encoding='utf-8') as file:
-        for station, coord in coordinates.items():
+    temporary = output_file + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        for station, coord in sorted(coordinates.items()):
             if coord:
                 file.write(f"{station};{coord[0]};{coord[1]}\n")
             else:
                 file.write(f"{station};NOT FOUND\n")
+    os.replace(temporary, output_file)
 
 
-if __name__ == "__main__":
-    input_file = "C:/Users/Joe/Desktop/Metro/Metro/data/metro.txt"  # Remplacez par le chemin correct
-    output_file = "C:/Users/Joe/Desktop/Metro/Metro/data/stations_coordinates.csv"
+def main():
+    parser = argparse.ArgumentParser(description="Coordonnées GPS des stations de metro.txt")
+    parser.add_argument('--metro', default=os.path.join(DOSSIER_DONNEES, 'metro.txt'))
+    parser.add_argument('--sortie', default=os.path.join(DOSSIER_DONNEES, 'stations_coordinates.csv'))
+    parser.add_argument('--cache', default=os.path.join(DOSSIER_DONNEES, 'stations_coordinates.cache.jsonl'))
+    parser.add_argument('--backend', default='nominatim', help="nominatim ou file:<chemin> (essais hors ligne)")
+    parser.add_argument('--debit', type=float, default=DEBIT, help="Requêtes par seconde au plus")
+    parser.add_argument('--travailleurs', type=int, default=TRAVAILLEURS)
+    parser.add_argument('--max-requetes', type=int, help="Arrêt après ce nombre de requêtes (reprise au lancement suivant)")
+    parser.add_argument('--reessayer-introuvables', action='store_true',
+                        help="Réinterroger les requêtes restées sans résultat")
+    args = parser.parse_args()
 
-    stations = read_unique_stations(input_file)
+    stations = read_unique_stations(args.metro)
     print(f"Stations uniques trouvées : {len(stations)}")
-    coordinates = fetch_coordinates(stations)
-    save_coordinates_to_file(coordinates, output_file)
+    cache = GeocodeCache(args.cache)
+    try:
+        results, stats = asyncio.run(fetch_coordinates_async(
+            stations, make_backend(args.backend), cache, args.debit, args.travailleurs,
+            args.reessayer_introuvables, args.max_requetes))
+    finally:
+        cache.close()
+
+    # Un lancement partiel (--max-requetes, erreurs réseau) ne complète que les stations
+    # qu'il a résolues : le fichier n'est réécrit que s'il change
+    merged, changed = merge_coordinates(read_coordinates_file(args.sortie), results)
+    if changed:
+        save_coordinates_to_file(merged, args.sortie)
+    missing = len(stations) - len(results)
+    print(f"{stats['requests']} requête(s), {stats['errors']} erreur(s) ; "
+          f"{sum(1 for c in results.values() if c)} trouvées, {sum(1 for c in results.values() if not c)} introuvables"
+          + (f", {missing} à reprendre" if missing else ""))
+    print(f"Les coordonnées ont été enregistrées dans {args.sortie}" if changed
+          else f"{args.sortie} est déjà à jour")
+    return 1 if missing else 0
 
-    print(f"Les coordonnées ont été enregistrées dans {output_file}")
+
+if __name__ == "__main__":
+    sys.exit(main())
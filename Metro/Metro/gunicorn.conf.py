@@ -0,0 +1,19 @@
+# Configuration gunicorn : gunicorn -c gunicorn.conf.py
+# Le réseau est chargé une fois dans le processus maître (preload_app), à l'import de app.py,
+# puis partagé en copie sur écriture par les workers.
+import gc
+import os
+
+wsgi_app = 'app:app'
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Plusieurs requêtes par worker : une requête lente n'en bloque plus d'autres ;
+# les calculs eux-mêmes restent bornés par le pool de app.py (METRO_CALCUL_*)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+def when_ready(server):
+    # Les objets du réseau passent dans la génération permanente du ramasse-miettes :
+    # les collectes des workers ne les touchent plus, leurs pages restent partagées.
+    gc.freeze()
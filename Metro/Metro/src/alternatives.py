@@ -0,0 +1,72 @@
+from src.routage import arbre_plus_courts_chemins, remonter_chemin
+
+DETOUR = 1.4
+PARTAGE_MAX = 0.6
+
+
+# Chemin sans boucle à l'échelle des stations : une station peut occuper plusieurs
+# sommets consécutifs (correspondance), mais on n'y revient pas plus tard
+def _sans_boucle(graphe, chemin):
+    vus = set()
+    precedent = None
+    for sommet in chemin:
+        nom = graphe.nom(sommet)
+        if nom != precedent:
+            if nom in vus:
+                return False
+            vus.add(nom)
+            precedent = nom
+    return True
+
+
+def _troncons(chemin):
+    return {(a, b) if a < b else (b, a) for a, b in zip(chemin, chemin[1:])}
+
+
+# Itinéraires alternatifs par sommets de passage, à partir de deux arbres seulement :
+# l'arbre des plus courts chemins depuis le départ et celui depuis l'arrivée (graphe non
+# orienté). Pour chaque sommet v, le meilleur chemin passant par v est la branche
+# départ -> v du premier arbre suivie de la branche v -> arrivée du second, de coût
+# d1[v] + d2[v] : aucun candidat ne demande de nouvelle recherche.
+# Les candidats sont pris par coût croissant, jusqu'à `detour` fois le plus court ; un
+# candidat est écarté s'il repasse par une station, ou si plus de `partage_max` de son
+# temps se fait sur des tronçons d'un itinéraire déjà retenu.
+# Renvoie au plus k (temps, chemin), le plus court d'abord.
+def alternatives(graphe, sources, destinations, k=3, detour=DETOUR, partage_max=PARTAGE_MAX):
+    distances_depart, pred_depart = arbre_plus_courts_chemins(graphe, sources)
+    plus_court = min(distances_depart[d] for d in destinations)
+    if plus_court == float('inf'):
+        return []
+    limite = plus_court * detour
+    distances_arrivee, pred_arrivee = arbre_plus_courts_chemins(graphe, destinations, limite)
+
+    candidats = sorted(
+        (distances_depart[v] + distances_arrivee[v], v)
+        for v in range(len(graphe))
+        if distances_depart[v] + distances_arrivee[v] <= limite
+    )
+
+    retenus = []
+    deja_vus = set()
+    for temps, v in candidats:
+        retour = remonter_chemin(pred_arrivee, v)
+        retour.reverse()
+        chemin = remonter_chemin(pred_depart, v) + retour[1:]
+        cle = tuple(chemin)
+        if cle in deja_vus:
+            continue
+        deja_vus.add(cle)
+        if not _sans_boucle(graphe, chemin):
+            continue
+
+        troncons = _troncons(chemin)
+        if any(
+            sum(graphe.temps(a, b) for a, b in troncons & troncons_retenus) > partage_max * temps
+            for _, _, troncons_retenus in retenus
+        ):
+            continue
+        retenus.append((temps, chemin, troncons))
+        if len(retenus) >= k:
+            break
+
+    return [(temps, chemin) for temps, chemin, _ in retenus]
@@ -0,0 +1,118 @@
+from array import array
+
+
+# Union-find (compression de chemin par division + union par rang)
+class UnionFind:
+    def __init__(self, n):
+        self.parent = array('i', range(n))
+        self.rang = bytearray(n)
+
+    def trouver(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # Renvoie False si x et y étaient déjà dans le même ensemble
+    def unir(self, x, y):
+        x, y = self.trouver(x), self.trouver(y)
+        if x == y:
+            return False
+        if self.rang[x] < self.rang[y]:
+            x, y = y, x
+        self.parent[y] = x
+        if self.rang[x] == self.rang[y]:
+            self.rang[x] += 1
+        return True
+
+
+# Forêt couvrante minimale (Kruskal) : un arbre par composante connexe, donc aussi
+# correcte si le réseau n'est pas connexe. Renvoie ([(u, v, poids)], poids total).
+def foret_couvrante(graphe):
+    aretes_u, aretes_v, aretes_poids = graphe.aretes_u, graphe.aretes_v, graphe.aretes_poids
+    ensembles = UnionFind(len(graphe))
+    foret = []
+    total = 0
+    for i in sorted(range(len(aretes_u)), key=aretes_poids.__getitem__):
+        u, v = aretes_u[i], aretes_v[i]
+        if ensembles.unir(u, v):
+            foret.append((u, v, aretes_poids[i]))
+            total += aretes_poids[i]
+            if len(foret) == len(graphe) - 1:
+                break
+    return foret, total
+
+
+# Composantes connexes : listes de sommets, la plus grande d'abord
+def composantes(graphe):
+    offsets, cibles = graphe.offsets, graphe.cibles
+    vu = bytearray(len(graphe))
+    resultat = []
+    for depart in range(len(graphe)):
+        if vu[depart]:
+            continue
+        vu[depart] = 1
+        composante = [depart]
+        for sommet in composante:
+            for voisin in cibles[offsets[sommet]:offsets[sommet + 1]]:
+                if not vu[voisin]:
+                    vu[voisin] = 1
+                    composante.append(voisin)
+        resultat.append(composante)
+    resultat.sort(key=len, reverse=True)
+    return resultat
+
+
+# Points d'articulation et ponts (Tarjan, parcours en profondeur itératif).
+# Seul l'arc qui ramène au parent est ignoré, une seule fois : une arête doublée
+# entre deux sommets n'est donc pas un pont.
+def articulations_et_ponts(graphe):
+    offsets, cibles = graphe.offsets, graphe.cibles
+    n = len(graphe)
+    ordre = [-1] * n
+    bas = [0] * n
+    articulations = []
+    ponts = []
+    compteur = 0
+
+    for racine in range(n):
+        if ordre[racine] != -1:
+            continue
+        ordre[racine] = bas[racine] = compteur
+        compteur += 1
+        enfants_racine = 0
+        # Pile : (sommet, parent, prochain arc à examiner, arc vers le parent déjà ignoré)
+        pile = [[racine, -1, offsets[racine], False]]
+        while pile:
+            cadre = pile[-1]
+            sommet, parent, k, parent_ignore = cadre
+            if k < offsets[sommet + 1]:
+                cadre[2] = k + 1
+                voisin = cibles[k]
+                if voisin == parent and not parent_ignore:
+                    cadre[3] = True
+                elif ordre[voisin] == -1:
+                    ordre[voisin] = bas[voisin] = compteur
+                    compteur += 1
+                    pile.append([voisin, sommet, offsets[voisin], False])
+                elif ordre[voisin] < bas[sommet]:
+                    bas[sommet] = ordre[voisin]
+                continue
+
+            pile.pop()
+            if parent == -1:
+                continue
+            if bas[sommet] < bas[parent]:
+                bas[parent] = bas[sommet]
+            if bas[sommet] > ordre[parent]:
+                ponts.append((parent, sommet))
+            if parent == racine:
+                enfants_racine += 1
+            elif bas[sommet] >= ordre[parent]:
+                articulations.append(parent)
+
+        if enfants_racine > 1:
+            articulations.append(racine)
+
+    return sorted(set(articulations)), ponts
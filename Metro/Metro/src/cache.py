@@ -0,0 +1,73 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+# Cache LRU borné, avec durée de vie optionnelle (ttl en secondes, None = illimitée).
+# Les compteurs (succès, échecs, évictions, expirations) sont exposés par stats().
+class CacheLRU:
+    def __init__(self, taille_max=1024, ttl=None):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.entrees = OrderedDict()
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, cle):
+        with self.verrou:
+            entree = self.entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return None
+            valeur, expiration = entree
+            if expiration is not None and expiration < time.monotonic():
+                del self.entrees[cle]
+                self.expirations += 1
+                self.echecs += 1
+                return None
+            self.entrees.move_to_end(cle)
+            self.succes += 1
+            return valeur
+
+    def mettre(self, cle, valeur):
+        if self.taille_max <= 0:
+            return
+        expiration = time.monotonic() + self.ttl if self.ttl else None
+        with self.verrou:
+            self.entrees[cle] = (valeur, expiration)
+            self.entrees.move_to_end(cle)
+            while len(self.entrees) > self.taille_max:
+                self.entrees.popitem(last=False)
+                self.evictions += 1
+
+    # Retire les entrées pour lesquelles predicat(cle, valeur) est vrai ; renvoie leur nombre
+    def invalider(self, predicat):
+        with self.verrou:
+            cles = [cle for cle, (valeur, _) in self.entrees.items() if predicat(cle, valeur)]
+            for cle in cles:
+                del self.entrees[cle]
+            self.invalidations += len(cles)
+        return len(cles)
+
+    def vider(self):
+        with self.verrou:
+            self.entrees.clear()
+
+    def stats(self):
+        with self.verrou:
+            total = self.succes + self.echecs
+            return {
+                'taille': len(self.entrees),
+                'taille_max': self.taille_max,
+                'ttl': self.ttl,
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'taux_succes': self.succes / total if total else 0.0,
+            }
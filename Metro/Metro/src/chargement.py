@@ -0,0 +1,244 @@
+import os
+import re
+import json
+import time
+import itertools
+import tracemalloc
+from types import MappingProxyType
+
+from src.reseau import Station, MetroGraph
+from src.mesures import mesures
+from src.perturbations import Perturbations
+from src.reperes import charger_reperes
+from src.geo import Grille, IndexGeo
+from src.geometrie import construire_geometrie
+from src.instantane import chemin_instantane, lire_instantane, ecrire_instantane, InstantaneInvalide
+
+FICHIER_METRO = 'metro.txt'
+FICHIER_POSPOINTS = 'pospoints.txt'
+FICHIER_COORDONNEES = 'stations_coordinates.csv'
+
+_versions = itertools.count(1)
+
+LIGNE_SOMMET = re.compile(r"V (\d+) (.+) ;([\w]+) ;(True|False)\s*(\d+)")
+
+
+# Fonction pour lire metro.txt et construire le graphe.
+# Lecteur unique du format, partagé par l'application et l'interface Tk (verbeux=True
+# signale les lignes ignorées).
+def lire_graphe(fichier, verbeux=False):
+    stations, aretes, index_num = [], [], {}
+    debut = time.perf_counter()
+
+    with open(fichier, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+
+            if ligne.startswith("V"):
+                match = LIGNE_SOMMET.match(ligne)
+                if match:
+                    try:
+                        num_sommet = int(match.group(1))
+                        nom_sommet = match.group(2).replace(' - ', ', ')
+                        ligne_num = match.group(3)
+                        terminus = match.group(4) == 'True'
+                        branchement = int(match.group(5))
+
+                        index_num[num_sommet] = len(stations)
+                        stations.append(Station(len(stations), num_sommet, nom_sommet,
+                                                ligne_num, terminus, branchement))
+                    except ValueError as e:
+                        if verbeux:
+                            print(f"Erreur de format dans la ligne de sommet : {ligne} ({e})")
+                elif verbeux:
+                    print(f"Erreur de format dans la ligne de sommet : {ligne}")
+
+            elif ligne.startswith("E"):
+                parts = ligne.split(" ")
+                if len(parts) == 4:
+                    try:
+                        sommet1 = int(parts[1])
+                        sommet2 = int(parts[2])
+                        temps = int(parts[3])
+
+                        if sommet1 not in index_num or sommet2 not in index_num:
+                            if verbeux:
+                                print(f"Avertissement : Le sommet {sommet1} ou {sommet2} n'a pas été défini.")
+                            continue
+
+                        aretes.append((index_num[sommet1], index_num[sommet2], temps))
+                    except ValueError as e:
+                        if verbeux:
+                            print(f"Erreur de conversion lors de la lecture d'une arête : {ligne} ({e})")
+                elif verbeux:
+                    print(f"Erreur de format dans la ligne d'arête : {ligne}")
+
+    mesures.observer('metro_phase_secondes', time.perf_counter() - debut, phase='lire_graphe.lecture')
+    with mesures.phase('lire_graphe.csr'):
+        graphe = MetroGraph(stations, aretes)
+    return graphe
+
+
+# Points de pospoints.txt (x, y, nom) dans l'ordre du fichier : les tracés des lignes
+def lire_traces(fichier):
+    points = []
+    with open(fichier, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                x, y, label = ligne.strip().split(';')
+                points.append((int(x), int(y), label.replace('@', ' ')))
+            except ValueError:
+                continue
+    return points
+
+
+# Points de la carte : (x, y, nom), sans doublons de position
+def lire_pospoints(fichier, traces=None):
+    # Supprimer les doublons en utilisant un dictionnaire
+    unique_points = {(x, y): (x, y, label) for x, y, label in (lire_traces(fichier) if traces is None else traces)}
+    return tuple(unique_points.values())
+
+
+# Coordonnées GPS écrites par generate_gps.py : nom -> (latitude, longitude), ou None si introuvable
+def lire_coordonnees_gps(fichier):
+    coordonnees = {}
+    if not os.path.exists(fichier):
+        return coordonnees
+    with open(fichier, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            parts = ligne.strip().split(';')
+            if len(parts) == 3:
+                try:
+                    coordonnees[parts[0]] = (float(parts[1]), float(parts[2]))
+                except ValueError:
+                    continue
+            elif len(parts) == 2 and parts[1] == 'NOT FOUND':
+                coordonnees[parts[0]] = None
+    return coordonnees
+
+
+# Instantané immuable du réseau chargé : tout ce que les requêtes lisent, construit une
+# seule fois par processus. Chargé avant le fork (gunicorn --preload), il est partagé
+# en copie sur écriture par les workers.
+# `graphe` est le graphe de base vu à travers les perturbations actives (le même objet que
+# `graphe_base` sans perturbation) ; appliquer des perturbations crée un nouveau Reseau de
+# même version (voir avec()).
+class Reseau:
+    __slots__ = ('version', 'dossier', 'graphe', 'graphe_base', 'perturbations', 'pos_points', 'geometrie',
+                 'coordonnees_gps', 'index_gps', 'index_carte', 'table_chemins', 'reperes', 'stations_json', 'duree_chargement', 'memoire')
+
+    def __init__(self, **valeurs):
+        for nom, valeur in valeurs.items():
+            object.__setattr__(self, nom, valeur)
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("Le réseau chargé est immuable : rechargez-le pour le modifier")
+
+    # Copie avec quelques champs remplacés
+    def avec(self, **valeurs):
+        champs = {nom: getattr(self, nom) for nom in self.__slots__}
+        champs.update(valeurs)
+        return Reseau(**champs)
+
+    def resume(self):
+        return {
+            'version': self.version,
+            'dossier': self.dossier,
+            'sommets': len(self.graphe),
+            'aretes': len(self.graphe.aretes_u),
+            'perturbations': len(self.perturbations),
+            'points': len(self.pos_points),
+            'stations_gps': len(self.index_gps),
+            'toutes_paires': self.table_chemins is not None,
+            'reperes': len(self.reperes) if self.reperes is not None else 0,
+            'duree_chargement_ms': round(self.duree_chargement * 1000, 1),
+            'memoire_kio': round(self.memoire / 1024, 1) if self.memoire is not None else None,
+        }
+
+
+# Graphe, points et géométrie de la carte depuis l'instantané binaire s'il est à jour ;
+# sinon lecture des fichiers texte, puis écriture de l'instantané pour le démarrage suivant
+# (au mieux : un dossier en lecture seule n'empêche pas de charger).
+def lire_graphe_et_points(dossier):
+    fichier_metro = os.path.join(dossier, FICHIER_METRO)
+    fichier_points = os.path.join(dossier, FICHIER_POSPOINTS)
+    fichier = chemin_instantane(dossier)
+    try:
+        return lire_instantane(fichier, fichier_metro, fichier_points)
+    except InstantaneInvalide:
+        pass
+
+    graphe = lire_graphe(fichier_metro)
+    traces = lire_traces(fichier_points)
+    pos_points = lire_pospoints(fichier_points, traces)
+    geometrie = construire_geometrie(graphe, traces)
+    try:
+        ecrire_instantane(fichier, graphe, pos_points, geometrie, fichier_metro, fichier_points)
+    except OSError:
+        pass
+    return graphe, pos_points, geometrie
+
+
+# Lit les trois fichiers du dossier de données et renvoie un Reseau.
+# La durée du chargement est gardée dans l'instantané, ainsi que la mémoire allouée si
+# mesurer_memoire (tracemalloc ralentit fortement toutes les allocations : désactivé
+# par défaut, la mémoire vaut alors None).
+# reperes : nombre de repères de l'index ALT (src/reperes.py), 0 pour s'en passer.
+def charger_reseau(dossier, toutes_paires=False, mesurer_memoire=False, reperes=0):
+    debut = time.perf_counter()
+    tracer = mesurer_memoire and not tracemalloc.is_tracing()
+    if tracer:
+        tracemalloc.start()
+    if mesurer_memoire:
+        memoire_avant, _ = tracemalloc.get_traced_memory()
+
+    fichier_metro = os.path.join(dossier, FICHIER_METRO)
+    with mesures.phase('chargement.graphe'):
+        graphe, pos_points, geometrie = lire_graphe_et_points(dossier)
+    coordonnees_gps = lire_coordonnees_gps(os.path.join(dossier, FICHIER_COORDONNEES))
+    # Stations les plus proches d'une position GPS ou d'un point de la carte
+    with mesures.phase('chargement.index_spatial'):
+        index_gps = IndexGeo({nom: position for nom, position in coordonnees_gps.items() if graphe.ids_par_nom(nom)})
+        # Un point par nom, le premier : celui que /plot dessine
+        points_carte = {}
+        for x, y, label in pos_points:
+            points_carte.setdefault(label, (x, -y))
+        index_carte = Grille([(x, y, label) for label, (x, y) in points_carte.items()])
+    with mesures.phase('chargement.table'):
+        table_chemins = None
+        if toutes_paires:
+            # numpy n'est nécessaire qu'avec la table de toutes les paires
+            from src.toutes_paires import charger_table
+            table_chemins = charger_table(fichier_metro, graphe)
+    with mesures.phase('chargement.reperes'):
+        index_reperes = charger_reperes(fichier_metro, graphe, reperes) if reperes else None
+    # /stations renvoie toujours la même liste : on la sérialise une fois
+    stations_json = json.dumps([{'x': x, 'y': y, 'label': label} for x, y, label in pos_points],
+                               ensure_ascii=False).encode('utf-8')
+
+    memoire = None
+    if mesurer_memoire:
+        memoire_apres, _ = tracemalloc.get_traced_memory()
+        memoire = memoire_apres - memoire_avant
+    if tracer:
+        tracemalloc.stop()
+
+    return Reseau(
+        version=next(_versions),
+        dossier=os.path.abspath(dossier),
+        graphe=graphe,
+        graphe_base=graphe,
+        perturbations=Perturbations(),
+        pos_points=pos_points,
+        geometrie=geometrie,
+        coordonnees_gps=MappingProxyType(coordonnees_gps),
+        index_gps=index_gps,
+        index_carte=index_carte,
+        table_chemins=table_chemins,
+        reperes=index_reperes,
+        stations_json=stations_json,
+        duree_chargement=time.perf_counter() - debut,
+        memoire=memoire,
+    )
@@ -0,0 +1,109 @@
+import heapq
+
+# Pénalité par défaut d'une correspondance (en secondes), en plus du temps de marche
+# déjà présent sur l'arête entre les deux sommets de la station
+PENALITE_CORRESPONDANCE = 120
+MAX_CORRESPONDANCES = 8
+
+
+# Un itinéraire du front de Pareto (temps, nombre de correspondances).
+# `etapes` : liste de (ligne, sommet de départ, sommet d'arrivée, temps) une par ligne empruntée.
+class Itineraire:
+    __slots__ = ('temps', 'correspondances', 'chemin', 'etapes')
+
+    def __init__(self, temps, correspondances, chemin, etapes):
+        self.temps = temps
+        self.correspondances = correspondances
+        self.chemin = chemin
+        self.etapes = etapes
+
+    def cout(self, penalite):
+        return self.temps + penalite * self.correspondances
+
+    def __repr__(self):
+        return f"Itineraire({self.temps} s, {self.correspondances} correspondance(s))"
+
+
+# Recherche multicritère sur le graphe développé par ligne de metro.txt (un sommet par
+# station et par ligne, les arêtes entre deux lignes étant les correspondances).
+# Étiquettes (temps, correspondances) traitées par temps croissant : une étiquette n'est
+# gardée que si elle fait moins de correspondances que toutes celles déjà fixées au même
+# sommet, ce qui donne exactement le front de Pareto à l'arrivée.
+# Les sommets de départ (toutes les lignes de la station) partent à 0 sans correspondance ;
+# atteindre n'importe quel sommet de la station d'arrivée suffit.
+def itineraires_pareto(graphe, sources, destinations, max_correspondances=MAX_CORRESPONDANCES):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    stations = graphe.stations
+    destinations = set(destinations)
+    min_correspondances = [max_correspondances + 1] * len(graphe)
+    min_arrivee = max_correspondances + 1
+
+    # Étiquette : (temps, correspondances, sommet, étiquette précédente)
+    etiquettes = []
+    arrivees = []
+    tas = [(0, 0, source, -1) for source in sources]
+    heapq.heapify(tas)
+
+    while tas:
+        temps, correspondances, sommet, precedente = heapq.heappop(tas)
+        if correspondances >= min_correspondances[sommet] or correspondances >= min_arrivee:
+            continue
+        min_correspondances[sommet] = correspondances
+        etiquettes.append((temps, correspondances, sommet, precedente))
+        courante = len(etiquettes) - 1
+
+        if sommet in destinations:
+            min_arrivee = correspondances
+            arrivees.append(courante)
+            continue
+
+        ligne = stations[sommet].ligne
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            suivantes = correspondances + (stations[voisin].ligne != ligne)
+            if suivantes < min_correspondances[voisin] and suivantes < min_arrivee:
+                heapq.heappush(tas, (temps + poids[k], suivantes, voisin, courante))
+
+    itineraires = [_itineraire(graphe, etiquettes, etiquette) for etiquette in arrivees]
+    itineraires.sort(key=lambda itineraire: itineraire.correspondances)
+    return itineraires
+
+
+# Reconstruit le chemin et les étapes en remontant la chaîne d'étiquettes :
+# chaque hausse du compteur de correspondances termine une étape.
+def _itineraire(graphe, etiquettes, index):
+    temps_total, correspondances, _, _ = etiquettes[index]
+    chaine = []
+    while index != -1:
+        chaine.append(etiquettes[index])
+        index = etiquettes[index][3]
+    chaine.reverse()
+
+    chemin = [sommet for _, _, sommet, _ in chaine]
+    etapes = []
+    debut = 0
+    for i in range(1, len(chaine) + 1):
+        if i == len(chaine) or chaine[i][1] != chaine[i - 1][1]:
+            depart, arrivee = chaine[debut], chaine[i - 1]
+            if arrivee[2] != depart[2]:
+                etapes.append((graphe.stations[depart[2]].ligne, depart[2], arrivee[2],
+                               arrivee[0] - depart[0]))
+            debut = i
+    return Itineraire(temps_total, correspondances, chemin, etapes)
+
+
+# Choix dans le front de Pareto : moindre coût généralisé (temps + pénalité par
+# correspondance), ou moins de correspondances puis temps le plus court.
+def meilleur_itineraire(itineraires, penalite=PENALITE_CORRESPONDANCE, moins_de_correspondances=False):
+    if not itineraires:
+        return None
+    if moins_de_correspondances:
+        return itineraires[0]
+    return min(itineraires, key=lambda itineraire: (itineraire.cout(penalite), itineraire.correspondances))
+
+
+def instructions(graphe, itineraire):
+    return [
+        f"Prenez la ligne {ligne} de {graphe.nom(depart)} jusqu'à {graphe.nom(arrivee)}."
+        for ligne, depart, arrivee, _ in itineraire.etapes
+    ]
@@ -0,0 +1,278 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+from src.execution import CONTEXTE_PROCESSUS, processus_utiles
+
+INF = float('inf')
+# Durée approximative du calcul depuis une station de départ, par sommet du graphe
+# (secondes) : arbre des plus courts chemins, dépendances et une recherche par fermeture
+DUREE_PAR_SOMMET = 4e-5
+
+
+def _cle(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+# Stations du graphe : liste des sommets de chaque station (une par nom) et numéro de
+# station de chaque sommet
+def _stations(graphe):
+    par_nom = {}
+    for sommet in range(len(graphe)):
+        par_nom.setdefault(graphe.nom(sommet), []).append(sommet)
+    stations = list(par_nom.values())
+    station_de = [0] * len(graphe)
+    for numero, sommets in enumerate(stations):
+        for sommet in sommets:
+            station_de[sommet] = numero
+    return stations, station_de
+
+
+# Contributions d'une station de départ S (tous ses sommets à distance 0) :
+# - intermédiarité (Brandes pondéré) : chaque station d'arrivée T compte une fois, au sommet
+#   de T le plus proche (partagé à parts égales entre ex aequo) ;
+# - fermetures : pour chaque arête (u, c) de l'arbre des plus courts chemins, seules les
+#   distances du sous-arbre de c peuvent changer quand on la retire. Elles sont recalculées
+#   par un Dijkstra limité au sous-arbre, amorcé depuis ses voisins extérieurs ; retirer
+#   une arête hors de l'arbre ne change aucune distance depuis S.
+# Les totaux sont ajoutés dans `cumul`.
+def _depuis_station(graphe, stations, station_de, numero, cumul):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    n = len(graphe)
+    racines = stations[numero]
+    distances = [INF] * n
+    sigma = [0] * n
+    preds = [None] * n
+    tas = []
+    for racine in racines:
+        distances[racine] = 0
+        sigma[racine] = 1
+        preds[racine] = []
+        tas.append((0, racine))
+    heapq.heapify(tas)
+    ordre = []
+    fixe = bytearray(n)
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if fixe[sommet]:
+            continue
+        fixe[sommet] = 1
+        ordre.append(sommet)
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < distances[voisin]:
+                distances[voisin] = nouvelle_distance
+                sigma[voisin] = sigma[sommet]
+                preds[voisin] = [sommet]
+                heapq.heappush(tas, (nouvelle_distance, voisin))
+            elif nouvelle_distance == distances[voisin] and not fixe[voisin]:
+                sigma[voisin] += sigma[sommet]
+                preds[voisin].append(sommet)
+
+    # Distance à chaque station et poids d'arrivée de ses sommets les plus proches
+    arrivee = [0.0] * n
+    distance_station = [INF] * len(stations)
+    for autre, sommets in enumerate(stations):
+        if autre == numero:
+            continue
+        plus_proche = min(distances[sommet] for sommet in sommets)
+        if plus_proche == INF:
+            continue
+        distance_station[autre] = plus_proche
+        ex_aequo = [sommet for sommet in sommets if distances[sommet] == plus_proche]
+        for sommet in ex_aequo:
+            arrivee[sommet] = 1.0 / len(ex_aequo)
+        cumul['distance_totale'] += plus_proche
+        cumul['paires'] += 1
+
+    # Accumulation des dépendances, du plus loin au plus proche
+    dependance = [0.0] * n
+    inter_sommets, inter_aretes = cumul['sommets'], cumul['aretes']
+    for sommet in reversed(ordre):
+        coefficient = (arrivee[sommet] + dependance[sommet]) / sigma[sommet]
+        for precedent in preds[sommet]:
+            contribution = sigma[precedent] * coefficient
+            cle = _cle(precedent, sommet)
+            inter_aretes[cle] = inter_aretes.get(cle, 0.0) + contribution
+            dependance[precedent] += contribution
+        if preds[sommet]:
+            inter_sommets[sommet] += dependance[sommet]
+
+    # Arbre des plus courts chemins (premier prédécesseur) en ordre préfixe : le sous-arbre
+    # de c occupe les positions debut[c] <= i < fin[c]
+    enfants = [[] for _ in range(n)]
+    for sommet in ordre:
+        if preds[sommet]:
+            enfants[preds[sommet][0]].append(sommet)
+    prefixe, debut, fin = [], [-1] * n, [-1] * n
+    for racine in racines:
+        pile = [(racine, False)]
+        while pile:
+            sommet, ferme = pile.pop()
+            if ferme:
+                fin[sommet] = len(prefixe)
+                continue
+            debut[sommet] = len(prefixe)
+            prefixe.append(sommet)
+            pile.append((sommet, True))
+            pile.extend((enfant, False) for enfant in enfants[sommet])
+
+    # Distances après fermeture : copie de `distances` où seul le sous-arbre est réécrit,
+    # puis restauré
+    hausses, coupees = cumul['hausses'], cumul['coupees']
+    apres = list(distances)
+    for c in ordre:
+        if not preds[c]:
+            continue
+        parent = preds[c][0]
+        bas, haut = debut[c], fin[c]
+        sous_arbre = prefixe[bas:haut]
+        for y in sous_arbre:
+            apres[y] = INF
+        # Amorces : voisins hors du sous-arbre, sauf par le tronçon retiré (le seul à
+        # relier le parent à c ; plusieurs arêtes parallèles sont retirées ensemble)
+        tas = []
+        for y in sous_arbre:
+            meilleure = INF
+            for k in range(offsets[y], offsets[y + 1]):
+                x = cibles[k]
+                if bas <= debut[x] < haut or (x == parent and y == c):
+                    continue
+                if distances[x] + poids[k] < meilleure:
+                    meilleure = distances[x] + poids[k]
+            if meilleure < INF:
+                apres[y] = meilleure
+                tas.append((meilleure, y))
+        heapq.heapify(tas)
+        while tas:
+            distance, y = heapq.heappop(tas)
+            if distance > apres[y]:
+                continue
+            for k in range(offsets[y], offsets[y + 1]):
+                x = cibles[k]
+                nouvelle_distance = distance + poids[k]
+                if nouvelle_distance < apres[x] and bas <= debut[x] < haut:
+                    apres[x] = nouvelle_distance
+                    heapq.heappush(tas, (nouvelle_distance, x))
+
+        hausse, coupe = 0, 0
+        for autre in {station_de[y] for y in sous_arbre}:
+            if autre == numero or distance_station[autre] == INF:
+                continue
+            sommets = stations[autre]
+            nouvelle = apres[sommets[0]] if len(sommets) == 1 else min(apres[s] for s in sommets)
+            if nouvelle == INF:
+                coupe += 1
+            else:
+                hausse += nouvelle - distance_station[autre]
+        for y in sous_arbre:
+            apres[y] = distances[y]
+        if hausse:
+            retiree = _cle(parent, c)
+            hausses[retiree] = hausses.get(retiree, 0) + hausse
+        if coupe:
+            retiree = _cle(parent, c)
+            coupees[retiree] = coupees.get(retiree, 0) + coupe
+
+
+def _nouveau_cumul(n):
+    return {'sommets': [0.0] * n, 'aretes': {}, 'hausses': {}, 'coupees': {}, 'distance_totale': 0, 'paires': 0}
+
+
+def _fusionner(cumul, partiel):
+    for sommet, valeur in enumerate(partiel['sommets']):
+        cumul['sommets'][sommet] += valeur
+    for nom in ('aretes', 'hausses', 'coupees'):
+        for cle, valeur in partiel[nom].items():
+            cumul[nom][cle] = cumul[nom].get(cle, 0) + valeur
+    cumul['distance_totale'] += partiel['distance_totale']
+    cumul['paires'] += partiel['paires']
+
+
+# Graphe de chaque processus du pool, transmis une seule fois à son démarrage
+_graphe_criticite = None
+
+
+def _initialiser(graphe):
+    global _graphe_criticite
+    _graphe_criticite = (graphe,) + _stations(graphe)
+
+
+def _traiter_paquet(numeros):
+    graphe, stations, station_de = _graphe_criticite
+    cumul = _nouveau_cumul(len(graphe))
+    for numero in numeros:
+        _depuis_station(graphe, stations, station_de, numero, cumul)
+    return cumul
+
+
+# Criticité du réseau, au niveau des stations (tous les sommets d'un même nom) :
+# intermédiarité des stations et des tronçons (part des trajets entre deux stations qui y
+# passent, les plus courts chemins ex aequo se partageant le trajet), et pour chaque
+# tronçon, l'effet de sa fermeture sur le temps moyen des trajets (hausse moyenne sur
+# toutes les paires de stations, paires qui ne sont plus reliées).
+# Les stations de départ sont réparties sur un pool de processus quand le calcul est assez
+# long pour en valoir le démarrage, et s'il y a plus d'un cœur (processus_utiles).
+def criticite(graphe, processus=None):
+    stations, station_de = _stations(graphe)
+    numeros = list(range(len(stations)))
+    processus = processus_utiles(len(numeros), len(graphe) * DUREE_PAR_SOMMET, processus)
+    cumul = _nouveau_cumul(len(graphe))
+    if processus > 1:
+        # Environ quatre paquets par processus pour équilibrer la charge
+        taille = max(1, len(numeros) // (processus * 4))
+        paquets = [numeros[i:i + taille] for i in range(0, len(numeros), taille)]
+        with ProcessPoolExecutor(max_workers=processus, mp_context=CONTEXTE_PROCESSUS,
+                                 initializer=_initialiser, initargs=(graphe,)) as pool:
+            for partiel in pool.map(_traiter_paquet, paquets):
+                _fusionner(cumul, partiel)
+    else:
+        for numero in numeros:
+            _depuis_station(graphe, stations, station_de, numero, cumul)
+
+    # Chaque paire de stations a été vue depuis ses deux extrémités
+    paires = len(stations) * (len(stations) - 1) / 2
+    inter_aretes = {cle: valeur / 2 for cle, valeur in cumul['aretes'].items()}
+
+    # Une station est traversée par un trajet qui passe par l'un de ses sommets ; un trajet
+    # qui y change de ligne passe par deux sommets et le tronçon de correspondance entre eux
+    par_station = [0.0] * len(stations)
+    for sommet, valeur in enumerate(cumul['sommets']):
+        par_station[station_de[sommet]] += valeur / 2
+    for (u, v), valeur in inter_aretes.items():
+        if station_de[u] == station_de[v]:
+            par_station[station_de[u]] -= valeur
+
+    classement_stations = sorted(
+        ({'station': graphe.nom(sommets[0]), 'intermediarite': round(par_station[numero], 3),
+          'part': round(par_station[numero] / paires, 6) if paires else 0.0}
+         for numero, sommets in enumerate(stations)),
+        key=lambda station: -station['intermediarite'])
+
+    troncons = []
+    for u, v in {_cle(u, v) for u, v, _ in graphe.aretes()}:
+        intermediarite = inter_aretes.get((u, v), 0.0)
+        troncon = {
+            'de': graphe.nom(u),
+            'vers': graphe.nom(v),
+            'intermediarite': round(intermediarite, 3),
+            'part': round(intermediarite / paires, 6) if paires else 0.0,
+            'hausse_moyenne': round(cumul['hausses'].get((u, v), 0) / 2 / paires, 3) if paires else 0.0,
+            'paires_coupees': cumul['coupees'].get((u, v), 0) // 2,
+        }
+        if station_de[u] == station_de[v]:
+            troncon['correspondance'] = f"{graphe.stations[u].ligne} / {graphe.stations[v].ligne}"
+        else:
+            troncon['ligne'] = graphe.stations[u].ligne
+        troncons.append(troncon)
+    troncons.sort(key=lambda troncon: (-troncon['paires_coupees'], -troncon['hausse_moyenne'],
+                                       -troncon['intermediarite']))
+
+    return {
+        'stations_total': len(stations),
+        'paires': int(paires),
+        'paires_reliees': cumul['paires'] // 2,
+        'temps_moyen': round(cumul['distance_totale'] / cumul['paires'], 1) if cumul['paires'] else None,
+        'stations': classement_stations,
+        'troncons': troncons,
+    }
@@ -0,0 +1,85 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# Contexte des pools de processus (criticité, calcul par lots) : ils sont créés depuis un
+# thread de calcul d'un serveur multi-thread, où un fork ne copierait que le thread
+# appelant, avec les verrous tenus par les autres threads (blocage possible). "spawn"
+# démarre des interpréteurs neufs, qui reçoivent le graphe par leur initialiseur.
+CONTEXTE_PROCESSUS = multiprocessing.get_context('spawn')
+
+# Chaque processus "spawn" démarre un interpréteur neuf, qui réimporte le module principal
+# (app.py, et donc le chargement du réseau, sous python app.py) et reçoit le graphe : une
+# demi-seconde environ. En dessous de cette durée estimée du calcul en série (secondes),
+# un pool coûte plus qu'il ne rapporte.
+DUREE_MIN_PARALLELE = 2.0
+
+
+# Nombre de processus pour `taches` tâches indépendantes d'environ `duree_tache` secondes
+# chacune en série : 1 (calcul dans le processus courant, sans pool) avec un seul cœur,
+# une seule tâche ou un calcul trop court ; sinon `processus` (par défaut un par cœur),
+# sans dépasser le nombre de tâches.
+def processus_utiles(taches, duree_tache, processus=None):
+    processus = min(processus or os.cpu_count() or 1, taches)
+    if processus <= 1 or taches * duree_tache < DUREE_MIN_PARALLELE:
+        return 1
+    return processus
+
+
+class PoolSature(Exception):
+    pass
+
+
+# Pool borné pour les calculs sur le graphe (itinéraires, ACPM, connexité...).
+# - au plus `travailleurs` calculs en parallèle, et au plus `file_max` calculs admis
+#   (en cours + en attente) : au-delà, PoolSature, que l'application renvoie en 429 ;
+# - une requête identique à un calcul déjà en cours (même clé) attend son résultat
+#   au lieu d'en lancer un second, et ne compte pas dans la file.
+# Les threads lisent le même réseau immuable ; le parallélisme sur plusieurs cœurs vient
+# des processus du serveur (workers gunicorn).
+class PoolCalcul:
+    def __init__(self, travailleurs=4, file_max=32):
+        self.travailleurs = travailleurs
+        self.file_max = file_max
+        self.executeur = ThreadPoolExecutor(max_workers=travailleurs, thread_name_prefix='calcul')
+        self.en_cours = {}
+        self.verrou = threading.Lock()
+        self.lances = 0
+        self.partages = 0
+        self.refuses = 0
+
+    def soumettre(self, cle, fonction, *args):
+        with self.verrou:
+            futur = self.en_cours.get(cle)
+            if futur is not None:
+                self.partages += 1
+                return futur
+            if len(self.en_cours) >= self.file_max:
+                self.refuses += 1
+                raise PoolSature(f"{len(self.en_cours)} calculs en attente")
+            futur = self.executeur.submit(fonction, *args)
+            self.en_cours[cle] = futur
+            self.lances += 1
+        futur.add_done_callback(lambda _: self._terminer(cle, futur))
+        return futur
+
+    def _terminer(self, cle, futur):
+        with self.verrou:
+            if self.en_cours.get(cle) is futur:
+                del self.en_cours[cle]
+
+    # Calcule (ou attend le calcul identique déjà lancé) et renvoie le résultat
+    def executer(self, cle, fonction, *args, delai=None):
+        return self.soumettre(cle, fonction, *args).result(timeout=delai)
+
+    def stats(self):
+        with self.verrou:
+            return {
+                'travailleurs': self.travailleurs,
+                'file_max': self.file_max,
+                'en_cours': len(self.en_cours),
+                'lances': self.lances,
+                'partages': self.partages,
+                'refuses': self.refuses,
+            }
@@ -0,0 +1,26 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+# Écriture atomique d'un fichier de données : le contenu va dans un fichier temporaire au
+# nom unique (mkstemp) du même dossier, qui remplace le fichier d'un coup une fois complet.
+# Deux processus qui écrivent le même fichier ne partagent pas de fichier temporaire, et
+# un lecteur voit l'ancien fichier ou le nouveau, jamais un fichier à moitié écrit.
+# En cas d'erreur, le fichier temporaire est supprimé et le fichier d'origine reste intact.
+@contextmanager
+def ecriture_atomique(fichier):
+    dossier, nom = os.path.split(os.path.abspath(fichier))
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, prefix=nom + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descripteur, 'wb') as f:
+            yield f
+        # mkstemp crée le fichier en 0600 : droits habituels d'un fichier de données
+        os.chmod(temporaire, 0o644)
+        os.replace(temporaire, fichier)
+    except BaseException:
+        try:
+            os.unlink(temporaire)
+        except OSError:
+            pass
+        raise
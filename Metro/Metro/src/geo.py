@@ -0,0 +1,121 @@
+import math
+import heapq
+
+RAYON_TERRE = 6371000.0
+# Marche : 1,25 m/s (4,5 km/h), avec 30 % de détour par rapport à la ligne droite
+VITESSE_MARCHE = 1.25
+DETOUR_MARCHE = 1.3
+# Accès à pied d'une position : les ACCES_MAX stations les plus proches à moins de RAYON_ACCES mètres
+ACCES_MAX = 3
+RAYON_ACCES = 1500
+
+
+def temps_marche(distance):
+    return int(round(distance * DETOUR_MARCHE / VITESSE_MARCHE))
+
+
+# Index spatial en grille uniforme : chaque point est rangé dans la cellule qui le contient,
+# et la recherche des k plus proches parcourt les cellules par anneaux autour de la
+# position demandée. Après l'anneau r, tout point non vu est à plus de r * cote : on
+# s'arrête dès que les k meilleurs sont plus proches que cela.
+# `points` : (x, y, valeur) en coordonnées planes.
+class Grille:
+    def __init__(self, points, cote=None):
+        self.points = list(points)
+        self.cellules = {}
+        if not self.points:
+            self.cote = 1.0
+            self.bornes = (0, 0, 0, 0)
+            return
+
+        xs = [x for x, _, _ in self.points]
+        ys = [y for _, y, _ in self.points]
+        if cote is None:
+            # Environ deux points par cellule
+            surface = (max(xs) - min(xs)) * (max(ys) - min(ys))
+            cote = math.sqrt(2 * surface / len(self.points)) if surface > 0 else 1.0
+        self.cote = cote
+        for index, (x, y, _) in enumerate(self.points):
+            self.cellules.setdefault(self._cellule(x, y), []).append(index)
+        i = [cellule[0] for cellule in self.cellules]
+        j = [cellule[1] for cellule in self.cellules]
+        self.bornes = (min(i), max(i), min(j), max(j))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cellule(self, x, y):
+        return int(math.floor(x / self.cote)), int(math.floor(y / self.cote))
+
+    # Les k points les plus proches de (x, y), à moins de `rayon` s'il est donné :
+    # liste de (distance, valeur) par distance croissante
+    def proches(self, x, y, k=1, rayon=None):
+        if not self.points or k <= 0:
+            return []
+        ci, cj = self._cellule(x, y)
+        imin, imax, jmin, jmax = self.bornes
+        # Hors de l'emprise des points : les anneaux intérieurs sont vides
+        anneau = max(0, imin - ci, ci - imax, jmin - cj, cj - jmax)
+        dernier = max(ci - imin, imax - ci, cj - jmin, jmax - cj)
+        # Loin de l'emprise, le premier anneau non vide compte plus de cellules que la
+        # grille n'a de points : on les parcourt tous directement
+        if 8 * anneau > len(self.points):
+            meilleurs = heapq.nsmallest(k, ((math.hypot(px - x, py - y), index)
+                                            for index, (px, py, _) in enumerate(self.points)))
+            return [(distance, self.points[index][2]) for distance, index in meilleurs
+                    if rayon is None or distance <= rayon]
+        # Tas des k meilleurs, le plus lointain en tête : (-distance², index)
+        meilleurs = []
+        while anneau <= dernier:
+            for cellule in self._anneau(ci, cj, anneau):
+                for index in self.cellules.get(cellule, ()):
+                    px, py, _ = self.points[index]
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if len(meilleurs) < k:
+                        heapq.heappush(meilleurs, (-d2, index))
+                    elif d2 < -meilleurs[0][0]:
+                        heapq.heapreplace(meilleurs, (-d2, index))
+            limite = anneau * self.cote
+            if len(meilleurs) == k and -meilleurs[0][0] <= limite * limite:
+                break
+            if rayon is not None and limite > rayon:
+                break
+            anneau += 1
+
+        resultats = sorted((math.sqrt(-d2), index) for d2, index in meilleurs)
+        return [(distance, self.points[index][2]) for distance, index in resultats
+                if rayon is None or distance <= rayon]
+
+    @staticmethod
+    def _anneau(ci, cj, r):
+        if r == 0:
+            yield ci, cj
+            return
+        for i in range(ci - r, ci + r + 1):
+            yield i, cj - r
+            yield i, cj + r
+        for j in range(cj - r + 1, cj + r):
+            yield ci - r, j
+            yield ci + r, j
+
+
+# Index des stations par position GPS (stations_coordinates.csv). Projection
+# équirectangulaire autour de la latitude moyenne : à l'échelle d'une ville, l'erreur sur
+# les distances reste bien inférieure au mètre par kilomètre.
+class IndexGeo:
+    def __init__(self, coordonnees):
+        connues = {nom: position for nom, position in coordonnees.items() if position is not None}
+        latitude = sum(lat for lat, _ in connues.values()) / len(connues) if connues else 0.0
+        self.cos_latitude = math.cos(math.radians(latitude))
+        self.coordonnees = connues
+        self.grille = Grille([(*self.projeter(lat, lon), nom) for nom, (lat, lon) in connues.items()])
+
+    def __len__(self):
+        return len(self.grille)
+
+    def projeter(self, lat, lon):
+        return (math.radians(lon) * RAYON_TERRE * self.cos_latitude, math.radians(lat) * RAYON_TERRE)
+
+    # Les k stations les plus proches : liste de (distance en mètres, nom)
+    def proches(self, lat, lon, k=1, rayon=None):
+        return self.grille.proches(*self.projeter(lat, lon), k=k, rayon=rayon)
@@ -0,0 +1,230 @@
+# Géométrie des chemins sur la carte, précalculée au chargement.
+#
+# pospoints.txt dessine les lignes : ses points se suivent ligne par ligne, et une station
+# y est une suite de points consécutifs de même nom (plusieurs points pour les grandes
+# stations : Châtelet, Gare de Lyon...), répétée sur chaque ligne qui la dessert. On
+# rattache chaque sommet de metro.txt (une station sur une ligne) à sa suite de points :
+# deux suites voisines dans le fichier forment un tracé de ligne si une même ligne relie
+# les deux stations, et le tracé appartient aux lignes communes à toutes ses paires voisines.
+#
+# Chaque arête reçoit une polyligne (suite du départ puis suite de l'arrivée ; deux points
+# pour une correspondance ou à défaut de tracé), rangée dans des tableaux plats. Le tracé
+# d'un chemin est la concaténation des polylignes de ses arêtes, sans répéter les points
+# de la station commune à deux arêtes consécutives.
+from array import array
+
+# Sommet sans point sur la carte
+ABSENT = -2 ** 31
+
+
+class Geometrie:
+    # sommets_x/sommets_y : point de chaque sommet ; arcs : arête de chaque arc du graphe
+    # (mêmes positions que graphe.cibles) ; polyligne de l'arête e dans
+    # x/y[offsets[e]:offsets[e + 1]], orientée de aretes_u[e] vers aretes_v[e], dont les
+    # tetes[e] premiers points sont au départ et les queues[e] derniers à l'arrivée.
+    # N'importe quelle séquence d'entiers indexable convient (array, vue mmap).
+    TABLEAUX = ('sommets_x', 'sommets_y', 'arcs', 'offsets', 'tetes', 'queues', 'x', 'y')
+
+    def __init__(self, graphe, sommets_x, sommets_y, arcs, offsets, tetes, queues, x, y):
+        self.graphe = graphe
+        self.sommets_x, self.sommets_y, self.arcs = sommets_x, sommets_y, arcs
+        self.offsets, self.tetes, self.queues = offsets, tetes, queues
+        self.x, self.y = x, y
+
+    def __len__(self):
+        return len(self.x)
+
+    # Arête qui relie deux sommets voisins dans le graphe de base (les graphes masqués par
+    # des perturbations gardent les mêmes sommets), ou None
+    def arete(self, a, b):
+        offsets, cibles = self.graphe.offsets, self.graphe.cibles
+        for k in range(offsets[a], offsets[a + 1]):
+            if cibles[k] == b:
+                return self.arcs[k]
+        return None
+
+    # Points (x, y) du tracé d'un chemin (suite de sommets)
+    def tracer(self, chemin):
+        xs, ys = [], []
+        if len(chemin) == 1 and self.sommets_x[chemin[0]] != ABSENT:
+            return [self.sommets_x[chemin[0]]], [self.sommets_y[chemin[0]]]
+        for a, b in zip(chemin, chemin[1:]):
+            arete = self.arete(a, b)
+            if arete is None:
+                continue
+            debut, fin = self.offsets[arete], self.offsets[arete + 1]
+            if self.graphe.aretes_u[arete] == a:
+                segment_x, segment_y, commun = self.x[debut:fin], self.y[debut:fin], self.tetes[arete]
+            else:
+                segment_x, segment_y = self.x[debut:fin][::-1], self.y[debut:fin][::-1]
+                commun = self.queues[arete]
+            # Les points du départ sont déjà à la fin de l'arête précédente
+            if xs:
+                segment_x, segment_y = segment_x[commun:], segment_y[commun:]
+            xs.extend(segment_x)
+            ys.extend(segment_y)
+        return xs, ys
+
+
+# Suites de points consécutifs de même nom : (nom, début, fin) dans `points`
+def _suites(points):
+    suites = []
+    for i, (_, _, nom) in enumerate(points):
+        if suites and suites[-1][0] == nom:
+            suites[-1][2] = i + 1
+        else:
+            suites.append([nom, i, i + 1])
+    return suites
+
+
+# Lignes qui relient directement (sans correspondance) deux ensembles de sommets
+def _lignes_communes(graphe, sommets1, sommets2):
+    cibles = set(sommets2)
+    lignes = set()
+    for sommet in sommets1:
+        ligne = graphe.stations[sommet].ligne
+        for voisin, _ in graphe.voisins(sommet):
+            if voisin in cibles and graphe.stations[voisin].ligne == ligne:
+                lignes.add(ligne)
+    return lignes
+
+
+# Jointure sommets -> points de la carte et polylignes des arêtes.
+# `points` : (x, y, nom) dans l'ordre du fichier (lire_traces), y vers le bas comme dans
+# pospoints.txt ; la géométrie est rendue y vers le haut, comme la carte de /plot.
+def construire_geometrie(graphe, points):
+    # Les points dont le nom n'est pas une station sont des coudes du tracé : ils restent
+    # dans les polylignes mais ne coupent pas le tracé
+    suites, sommets_suites = [], []
+    for suite in _suites(points):
+        sommets = graphe.ids_par_nom(suite[0])
+        if sommets:
+            suites.append(suite)
+            sommets_suites.append(sommets)
+
+    # Tracés : suites voisines reliées par au moins une ligne commune à tout le tracé
+    suites_sommet = [[] for _ in range(len(graphe))]
+    suivante = {}
+
+    def fermer(trace, lignes):
+        for position, i in enumerate(trace):
+            for sommet in sommets_suites[i]:
+                if graphe.stations[sommet].ligne in lignes:
+                    suites_sommet[sommet].append(i)
+                    if position + 1 < len(trace):
+                        suivante[(sommet, i)] = trace[position + 1]
+
+    trace, lignes = [0] if suites else [], None
+    for i in range(1, len(suites)):
+        communes = _lignes_communes(graphe, sommets_suites[i - 1], sommets_suites[i])
+        if communes and (lignes is None or lignes & communes):
+            lignes = communes if lignes is None else lignes & communes
+            trace.append(i)
+            continue
+        if lignes:
+            fermer(trace, lignes)
+        # Nouveau tracé, qui commence à la suite précédente si une autre ligne l'y relie
+        trace, lignes = ([i - 1, i], communes) if communes else ([i], None)
+    if lignes:
+        fermer(trace, lignes)
+
+    # Point d'un sommet : le milieu de sa suite ; à défaut, celui de la première suite du
+    # même nom (station dessinée hors des tracés de ses lignes)
+    premiere_suite = {}
+    for i, sommets in enumerate(sommets_suites):
+        for sommet in sommets:
+            premiere_suite.setdefault(sommet, i)
+    sommets_x, sommets_y = array('i'), array('i')
+    for sommet in range(len(graphe)):
+        i = suites_sommet[sommet][0] if suites_sommet[sommet] else premiere_suite.get(sommet)
+        if i is None:
+            sommets_x.append(ABSENT)
+            sommets_y.append(ABSENT)
+        else:
+            milieu = (suites[i][1] + suites[i][2] - 1) // 2
+            sommets_x.append(points[milieu][0])
+            sommets_y.append(-points[milieu][1])
+
+    # Arête de chaque arc, dans l'ordre où MetroGraph range les arcs
+    arcs = array('i', bytes(4 * len(graphe.cibles)))
+    position = list(graphe.offsets[:len(graphe)])
+    for arete, (u, v) in enumerate(zip(graphe.aretes_u, graphe.aretes_v)):
+        for sommet in (u, v):
+            arcs[position[sommet]] = arete
+            position[sommet] += 1
+
+    offsets, tetes, queues = array('i', [0]), array('i'), array('i')
+    xs, ys = array('i'), array('i')
+    for u, v in zip(graphe.aretes_u, graphe.aretes_v):
+        # Suites de u et de v consécutives dans un tracé, dans un sens ou dans l'autre
+        troncon = None
+        for i in suites_sommet[u]:
+            for j in suites_sommet[v]:
+                if suivante.get((u, i)) == j:
+                    troncon = (i, j, False)
+                elif suivante.get((v, j)) == i:
+                    troncon = (j, i, True)
+            if troncon:
+                break
+
+        if troncon:
+            premiere, seconde, inverse = troncon
+            indices = list(range(suites[premiere][1], suites[seconde][2]))
+            if inverse:
+                indices.reverse()
+            tete = suites[seconde if inverse else premiere][2] - suites[seconde if inverse else premiere][1]
+            queue = len(indices) - tete
+            for indice in indices:
+                xs.append(points[indice][0])
+                ys.append(-points[indice][1])
+        else:
+            # Correspondance, ou tronçon absent des tracés : segment entre les deux points
+            tete = queue = 0
+            for sommet in (u, v):
+                if sommets_x[sommet] != ABSENT:
+                    xs.append(sommets_x[sommet])
+                    ys.append(sommets_y[sommet])
+                    if sommet == u:
+                        tete = 1
+                    else:
+                        queue = 1
+        offsets.append(len(xs))
+        tetes.append(tete)
+        queues.append(queue)
+
+    return Geometrie(graphe, sommets_x, sommets_y, arcs, offsets, tetes, queues, xs, ys)
+
+
+# Encodage d'une polyligne en texte compact (algorithme des polylignes de Google, sans
+# facteur d'échelle : les coordonnées de la carte sont entières). Chaque point est codé par
+# son écart au précédent, en zigzag puis par paquets de 5 bits (caractères '?' à '~').
+def encoder_polyligne(xs, ys):
+    morceaux = []
+    precedent_x = precedent_y = 0
+    for x, y in zip(xs, ys):
+        for ecart in (x - precedent_x, y - precedent_y):
+            valeur = ~(ecart << 1) if ecart < 0 else ecart << 1
+            while valeur >= 0x20:
+                morceaux.append(chr((0x20 | (valeur & 0x1f)) + 63))
+                valeur >>= 5
+            morceaux.append(chr(valeur + 63))
+        precedent_x, precedent_y = x, y
+    return ''.join(morceaux)
+
+
+def decoder_polyligne(texte):
+    valeurs, valeur, decalage = [], 0, 0
+    for caractere in texte:
+        octet = ord(caractere) - 63
+        valeur |= (octet & 0x1f) << decalage
+        decalage += 5
+        if octet < 0x20:
+            valeurs.append(~(valeur >> 1) if valeur & 1 else valeur >> 1)
+            valeur, decalage = 0, 0
+    xs, ys, x, y = [], [], 0, 0
+    for i in range(0, len(valeurs) - 1, 2):
+        x += valeurs[i]
+        y += valeurs[i + 1]
+        xs.append(x)
+        ys.append(y)
+    return xs, ys
@@ -1,205 +1,305 @@
-import re
+import os
+import sys
 import heapq
-from tkinter import Tk, Label, Entry, Button, Text, Scrollbar, END, StringVar, OptionMenu
-from collections import deque
-
-# Fonction pour lire les données du fichier metro.txt et construire le graphe
-def lire_graphe(fichier):
-    sommets = {}
-    aretes = []
-    graphe = {}
-    noms_station_to_num = {}
-    lignes_station = {}
-
-    with open(fichier, 'r', encoding='utf-8') as f:
-        for ligne in f:
-            ligne = ligne.strip()
-            if not ligne:
-                continue
-
-            if ligne.startswith("V"):
-                match = re.match(r"V (\d+) (.+) ;([\w]+) ;(True|False)\s*(\d+)", ligne)
-                if match:
-                    try:
-                        num_sommet = str(int(match.group(1)))
-                        nom_sommet = match.group(2).replace(' - ', ', ')
-                        ligne_num = match.group(3)
-                        terminus = match.group(4) == 'True'
-                        branchement = int(match.group(5))
-
-                        noms_station_to_num[num_sommet] = nom_sommet
-                        if num_sommet not in lignes_station:
-                            lignes_station[num_sommet] = []
-                        lignes_station[num_sommet].append(ligne_num)
-
-                        sommets[num_sommet] = {
-                            'nom': nom_sommet,
-                            'ligne_num': ligne_num,
-                            'terminus': terminus,
-                            'branchements': branchement,
-                        }
-                        graphe[num_sommet] = []
-                    except ValueError as e:
-                        print(f"Erreur de format dans la ligne de sommet : {ligne} ({e})")
-                else:
-                    print(f"Erreur de format dans la ligne de sommet : {ligne}")
-
-            elif ligne.startswith("E"):
-                parts = ligne.split(" ")
-                if len(parts) == 4:
-                    try:
-                        sommet1 = str(int(parts[1]))
-                        sommet2 = str(int(parts[2]))
-                        temps = int(parts[3])
-
-                        if sommet1 not in sommets or sommet2 not in sommets:
-                            print(f"Avertissement : Le sommet {sommet1} ou {sommet2} n'a pas été défini.")
-                            continue
-
-                        graphe[sommet1].append((sommet2, temps))
-                        graphe[sommet2].append((sommet1, temps))
-                        aretes.append((sommet1, sommet2, temps))
-                    except ValueError as e:
-                        print(f"Erreur de conversion lors de la lecture d'une arête : {ligne} ({e})")
-                else:
-                    print(f"Erreur de format dans la ligne d'arête : {ligne}")
-
-    return sommets, graphe, aretes, noms_station_to_num, lignes_station
-
-
-# Algorithme de Bellman-Ford pour trouver le plus court chemin
+import argparse
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Permet de lancer ce fichier directement (python src/graph.py) tout en important le paquet src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.routage import dijkstra_bidirectionnel
+from src.analyse import foret_couvrante, composantes
+from src.chargement import lire_graphe, FICHIER_METRO
+
+# Relevé des calculs terminés (ms), pause de saisie avant les suggestions (ms) et nombre
+# de suggestions
+INTERVALLE_RELEVE = 50
+DELAI_SUGGESTIONS = 150
+SUGGESTIONS = 8
+
+
+# Algorithme de Bellman-Ford pour trouver le plus court chemin.
+# Implémentation d'origine de /chemin, seulement portée sur le graphe CSR : elle sert de
+# référence aux tests et aux benchmarks et ne doit pas être optimisée.
 def bellman_ford(graphe, start):
-    distances = {station: float('inf') for station in graphe}
-    pred = {station: None for station in graphe}
+    distances = [float('inf')] * len(graphe)
+    pred = [None] * len(graphe)
     distances[start] = 0
 
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
     for _ in range(len(graphe) - 1):
-        for sommet1, voisins in graphe.items():
-            for sommet2, temps in voisins:
-                if distances[sommet1] + temps < distances[sommet2]:
-                    distances[sommet2] = distances[sommet1] + temps
+        for sommet1 in range(len(graphe)):
+            for k in range(offsets[sommet1], offsets[sommet1 + 1]):
+                sommet2 = cibles[k]
+                if distances[sommet1] + poids[k] < distances[sommet2]:
+                    distances[sommet2] = distances[sommet1] + poids[k]
                     pred[sommet2] = sommet1
 
     return distances, pred
 
 
-# Fonction pour reconstruire le chemin à partir du prédécesseur
+# Fonction pour reconstruire le chemin à partir du prédécesseur (linéaire : ajouts puis retournement)
 def reconstruire_chemin(pred, start, end):
     chemin = []
     current = end
     while current != start:
-        chemin.insert(0, current)
+        chemin.append(current)
         current = pred[current]
-    chemin.insert(0, start)
+    chemin.append(start)
+    chemin.reverse()
     return chemin
 
 
 # Fonction pour afficher l'itinéraire
-def afficher_itineraire(chemin, graphe, start, end, noms_station_to_num, lignes_station):
+def afficher_itineraire(chemin, graphe, start, end):
     total_time = 0
-    result = f"Itinéraire de {noms_station_to_num[start]} à {noms_station_to_num[end]}:\n"
+    result = f"Itinéraire de {graphe.nom(start)} à {graphe.nom(end)}:\n"
 
     ligne_active = None
     trajet_direct = True
 
     for i in range(len(chemin) - 1):
-        station1 = chemin[i]
-        station2 = chemin[i + 1]
-
-        for voisin, temps in graphe[station1]:
-            if voisin == station2:
-                total_time += temps
-
-                lignes_communes = set(lignes_station[station1]) & set(lignes_station[station2])
-                if lignes_communes:
-                    ligne = list(lignes_communes)[0]
-                    if ligne_active is None:
-                        ligne_active = ligne
-                    elif ligne != ligne_active:
-                        trajet_direct = False
-                break
+        station1 = graphe.stations[chemin[i]]
+        station2 = graphe.stations[chemin[i + 1]]
+        total_time += graphe.temps(station1.id, station2.id)
+
+        if station1.ligne == station2.ligne:
+            ligne = station1.ligne
+            if ligne_active is None:
+                ligne_active = ligne
+            elif ligne != ligne_active:
+                trajet_direct = False
 
     minutes = total_time // 60
     secondes = total_time % 60
 
     if trajet_direct:
-        result += f"- Prenez la ligne {ligne_active} de {noms_station_to_num[start]} jusqu'à {noms_station_to_num[end]}.\n"
+        result += f"- Prenez la ligne {ligne_active} de {graphe.nom(start)} jusqu'à {graphe.nom(end)}.\n"
     else:
         result += "- Trajet avec changement (détails non implémentés).\n"
 
-    result += f"- Vous devriez arriver à {noms_station_to_num[chemin[-1]]} dans environ {minutes} minutes et {secondes} secondes.\n"
+    result += f"- Vous devriez arriver à {graphe.nom(chemin[-1])} dans environ {minutes} minutes et {secondes} secondes.\n"
     return result
 
 
-# Algorithme de Prim pour trouver l'ACPM
+# Algorithme de Prim pour trouver l'ACPM.
+# Les tableaux CSR sont copiés en listes une fois (en C, et le parcours lit chaque arc de
+# toute façon) : lire un array ou une vue mmap crée un nouvel entier à chaque accès, ce
+# qui rendait les boucles plus lentes qu'avec les anciens dictionnaires.
 def prim(graphe):
     acpm = []
     total_weight = 0
-    visited = set()
+    visited = [False] * len(graphe)
+    offsets, cibles, poids = graphe.offsets.tolist(), graphe.cibles.tolist(), graphe.poids.tolist()
     edges = []
+    heappush, heappop = heapq.heappush, heapq.heappop
 
-    start_node = next(iter(graphe))
-    visited.add(start_node)
+    start_node = 0
+    visited[start_node] = True
 
-    for voisin, poids in graphe[start_node]:
-        heapq.heappush(edges, (poids, start_node, voisin))
+    for k in range(offsets[start_node], offsets[start_node + 1]):
+        heappush(edges, (poids[k], start_node, cibles[k]))
 
     while edges:
-        poids, parent, enfant = heapq.heappop(edges)
-        if enfant not in visited:
-            visited.add(enfant)
-            acpm.append((parent, enfant, poids))
-            total_weight += poids
+        poids_arete, parent, enfant = heappop(edges)
+        if not visited[enfant]:
+            visited[enfant] = True
+            acpm.append((parent, enfant, poids_arete))
+            total_weight += poids_arete
 
-            for voisin, poids_voisin in graphe[enfant]:
-                if voisin not in visited:
-                    heapq.heappush(edges, (poids_voisin, enfant, voisin))
+            for k in range(offsets[enfant], offsets[enfant + 1]):
+                voisin = cibles[k]
+                if not visited[voisin]:
+                    heappush(edges, (poids[k], enfant, voisin))
 
     return acpm, total_weight
 
 
-# Interface Graphique
-def lancer_interface():
+# Parcours en largeur pour vérifier la connexité (tableaux copiés en listes comme dans
+# prim) ; la liste des sommets atteints sert de file, parcourue pendant qu'elle grandit
+def est_connexe(graphe):
+    visited = [False] * len(graphe)
+    offsets, cibles = graphe.offsets.tolist(), graphe.cibles.tolist()
+
+    visited[0] = True
+    atteints = [0]
+    for current in atteints:
+        for voisin in cibles[offsets[current]:offsets[current + 1]]:
+            if not visited[voisin]:
+                visited[voisin] = True
+                atteints.append(voisin)
+
+    return len(atteints) == len(graphe)
+
+
+# Calculs de l'interface, exécutés par le pool hors du thread de Tk : chacun renvoie le
+# texte à afficher, les widgets n'étant modifiés que par le thread de Tk
+def texte_itineraire(graphe, depart, arrivee):
+    start_ids = graphe.ids_par_nom(depart)
+    end_ids = graphe.ids_par_nom(arrivee)
+    if not start_ids or not end_ids:
+        return "Une ou les deux stations ne sont pas dans le réseau.\n"
+
+    start_station, end_station = start_ids[0], end_ids[0]
+    distances, pred = dijkstra_bidirectionnel(graphe, start_station, end_station)
+    if distances[end_station] == float('inf'):
+        return "Il n'y a pas de chemin entre ces deux stations.\n"
+    chemin = reconstruire_chemin(pred, start_station, end_station)
+    return afficher_itineraire(chemin, graphe, start_station, end_station) + "\n"
+
+
+def texte_connexite(graphe):
+    nombre = len(composantes(graphe))
+    if nombre <= 1:
+        return "Le graphe est connexe.\n"
+    return f"Le graphe n'est pas connexe ({nombre} composantes).\n"
+
+
+# Forêt couvrante (Kruskal) plutôt que prim : un arbre par composante si le réseau n'est
+# pas connexe, et le texte est construit en une fois pour une seule insertion
+def texte_acpm(graphe):
+    acpm, total_weight = foret_couvrante(graphe)
+    lignes = ["\nArbre Couvrant de Poids Minimum (ACPM):\n"]
+    lignes.extend(f"- {graphe.nom(parent)} -> {graphe.nom(enfant)} (poids : {poids})\n"
+                  for parent, enfant, poids in acpm)
+    lignes.append(f"Poids total de l'ACPM : {total_weight}\n")
+    return ''.join(lignes)
+
+
+# Calculs en arrière-plan pour l'interface Tk, qui n'est pas thread-safe :
+# - lancer(genre, ...) soumet le calcul au pool ; une nouvelle demande du même genre
+#   remplace la précédente, annulée si elle n'a pas commencé, ignorée sinon ;
+# - les résultats arrivent dans une file que relever() vide depuis root.after.
+class CalculsInterface:
+    def __init__(self, travailleurs=2):
+        self.executeur = ThreadPoolExecutor(max_workers=travailleurs, thread_name_prefix='interface')
+        self.termines = queue.Queue()
+        self.courants = {}
+        self.numeros = {}
+
+    def lancer(self, genre, fonction, *args):
+        precedent = self.courants.get(genre)
+        if precedent is not None:
+            precedent.cancel()
+        numero = self.numeros.get(genre, 0) + 1
+        self.numeros[genre] = numero
+        futur = self.executeur.submit(fonction, *args)
+        self.courants[genre] = futur
+        futur.add_done_callback(lambda futur: self.termines.put((genre, numero, futur)))
+
+    def en_cours(self):
+        return sorted(self.courants)
+
+    # Résultats arrivés depuis le dernier relevé, sans ceux des demandes remplacées :
+    # [(genre, texte)] ; une erreur du calcul est rendue comme texte
+    def relever(self):
+        resultats = []
+        while True:
+            try:
+                genre, numero, futur = self.termines.get_nowait()
+            except queue.Empty:
+                return resultats
+            if futur.cancelled() or numero != self.numeros[genre]:
+                continue
+            del self.courants[genre]
+            erreur = futur.exception()
+            resultats.append((genre, futur.result() if erreur is None else f"Erreur : {erreur}\n"))
+
+    def arreter(self):
+        self.executeur.shutdown(wait=False, cancel_futures=True)
+
+
+# Interface Graphique. tkinter n'est importé qu'ici : les algorithmes de ce module
+# (bellman_ford, prim, est_connexe) servent aussi aux tests et aux benchmarks, sur des
+# machines sans affichage ni tkinter.
+def lancer_interface(graphe):
+    from tkinter import Tk, Label, Entry, Button, Text, Scrollbar, Listbox, END, StringVar
+
+    calculs = CalculsInterface()
+
+    def afficher_etat():
+        genres = calculs.en_cours()
+        etat.set(f"Calcul en cours : {', '.join(genres)}" if genres else "")
+
+    def lancer(genre, fonction, *args):
+        calculs.lancer(genre, fonction, graphe, *args)
+        afficher_etat()
+
+    # Relevé périodique des résultats, dans le thread de Tk
+    def relever():
+        for _, texte in calculs.relever():
+            result_text.insert(END, texte)
+            result_text.see(END)
+        afficher_etat()
+        root.after(INTERVALLE_RELEVE, relever)
+
     def verifier_connexite():
-        if est_connexe(graphe):
-            result_text.insert(END, "Le graphe est connexe.\n")
-        else:
-            result_text.insert(END, "Le graphe n'est pas connexe.\n")
+        lancer("connexité", texte_connexite)
 
     def trouver_chemin_court():
-        start = station_depart.get().strip().lower()
-        end = station_arrivee.get().strip().lower()
-
-        start_station = None
-        end_station = None
-
-        for num_sommet, nom_sommet in noms_station_to_num.items():
-            if nom_sommet.lower() == start:
-                start_station = num_sommet
-            if nom_sommet.lower() == end:
-                end_station = num_sommet
-
-        if not start_station or not end_station:
-            result_text.insert(END, "Une ou les deux stations ne sont pas dans le réseau.\n")
-        else:
-            distances, pred = bellman_ford(graphe, start_station)
-            if distances[end_station] == float('inf'):
-                result_text.insert(END, "Il n'y a pas de chemin entre ces deux stations.\n")
-            else:
-                chemin = reconstruire_chemin(pred, start_station, end_station)
-                itineraire = afficher_itineraire(chemin, graphe, start_station, end_station, noms_station_to_num, lignes_station)
-                result_text.insert(END, itineraire + "\n")
+        lancer("itinéraire", texte_itineraire, station_depart.get().strip(), station_arrivee.get().strip())
 
     def calculer_acpm():
-        acpm, total_weight = prim(graphe)
-        result_text.insert(END, "\nArbre Couvrant de Poids Minimum (ACPM):\n")
-        for parent, enfant, poids in acpm:
-            result_text.insert(END, f"- {noms_station_to_num[parent]} -> {noms_station_to_num[enfant]} (poids : {poids})\n")
-        result_text.insert(END, f"Poids total de l'ACPM : {total_weight}\n")
+        lancer("ACPM", texte_acpm)
+
+    def fermer():
+        calculs.arreter()
+        root.destroy()
+
+    # Autocomplétion des stations par l'index des noms du graphe (préfixes, mots, fautes
+    # de frappe), rafraîchie après une courte pause de saisie
+    def autocompletion(champ, ligne):
+        suggestions = Listbox(root, height=0)
+        attente = [None]
+
+        def proposer():
+            attente[0] = None
+            cles = graphe.noms.rechercher(champ.get(), limite=SUGGESTIONS)
+            noms = [graphe.noms.nom(cle) for cle in cles]
+            if not noms or noms == [champ.get().strip()]:
+                suggestions.grid_remove()
+                return
+            suggestions.delete(0, END)
+            suggestions.insert(END, *noms)
+            suggestions.config(height=len(noms))
+            suggestions.grid(row=ligne, column=1, padx=10, sticky="new")
+            suggestions.lift()
+
+        def saisie(evenement):
+            if evenement.keysym == "Down" and suggestions.winfo_ismapped():
+                suggestions.focus_set()
+                suggestions.selection_set(0)
+                return
+            if evenement.keysym == "Escape":
+                suggestions.grid_remove()
+                return
+            if attente[0] is not None:
+                root.after_cancel(attente[0])
+            attente[0] = root.after(DELAI_SUGGESTIONS, proposer)
+
+        def choisir(_):
+            selection = suggestions.curselection()
+            if selection:
+                champ.delete(0, END)
+                champ.insert(0, suggestions.get(selection[0]))
+            suggestions.grid_remove()
+            champ.focus_set()
+            champ.icursor(END)
+
+        # Le clic dans la liste retire le focus du champ : on ne masque qu'ensuite
+        def masquer():
+            if root.focus_get() is not suggestions:
+                suggestions.grid_remove()
+
+        champ.bind("<KeyRelease>", saisie)
+        champ.bind("<FocusOut>", lambda _: root.after(DELAI_SUGGESTIONS, masquer))
+        suggestions.bind("<<ListboxSelect>>", choisir)
+        suggestions.bind("<Return>", choisir)
 
     # Interface principale
     root = Tk()
     root.title("Interface Métro")
+    root.protocol("WM_DELETE_WINDOW", fermer)
 
     # Formulaire pour trouver le chemin
     Label(root, text="Station de départ:").grid(row=0, column=0, padx=10, pady=5, sticky="w")
@@ -227,11 +327,35 @@ def lancer_interface():
     scrollbar.grid(row=5, column=2, sticky="ns")
     result_text.config(yscrollcommand=scrollbar.set)
 
+    # Calculs en cours
+    etat = StringVar()
+    Label(root, textvariable=etat).grid(row=6, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+    # Listes de suggestions sous chaque champ, par-dessus les boutons (créées en dernier)
+    autocompletion(station_depart, 1)
+    autocompletion(station_arrivee, 2)
+
+    root.after(INTERVALLE_RELEVE, relever)
     root.mainloop()
 
 
-# Charger les données et lancer l'interface
+# Charger les données et lancer l'interface : python src/graph.py [dossier], par défaut
+# METRO_DONNEES ou le dossier data/ du projet, comme app.py
+def main():
+    parser = argparse.ArgumentParser(description="Interface de bureau du métro")
+    parser.add_argument('dossier', nargs='?',
+                        default=os.environ.get('METRO_DONNEES', os.path.join(
+                            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')))
+    args = parser.parse_args()
+
+    fichier_metro = os.path.join(args.dossier, FICHIER_METRO)
+    if not os.path.exists(fichier_metro):
+        print(f"Fichier introuvable : {fichier_metro}")
+        return 1
+    graphe = lire_graphe(fichier_metro, verbeux=True)
+    lancer_interface(graphe)
+    return 0
+
+
 if __name__ == "__main__":
-    fichier_metro = "C:/Users/Joe/Desktop/Metro/Metro/data/metro.txt"
-    sommets, graphe, aretes, noms_station_to_num, lignes_station = lire_graphe(fichier_metro)
-    lancer_interface()
+    sys.exit(main())
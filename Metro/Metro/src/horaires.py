@@ -0,0 +1,334 @@
+import os
+import re
+import csv
+import math
+import bisect
+from array import array
+from collections import defaultdict
+
+# Dossier d'un flux GTFS local (stops.txt, stop_times.txt, trips.txt, routes.txt)
+DOSSIER_GTFS = 'gtfs'
+# Fréquences par ligne : ligne;debut;fin;intervalle_minutes (ligne "*" pour toutes)
+FICHIER_FREQUENCES = 'frequences.csv'
+
+# Fréquences par défaut d'une ligne, au départ de chaque terminus (heures de 0 à 26 :
+# le service de la soirée continue après minuit, comme dans GTFS)
+FREQUENCES = (
+    ('05:30', '07:00', 8),
+    ('07:00', '09:30', 3),
+    ('09:30', '16:30', 5),
+    ('16:30', '19:30', 3),
+    ('19:30', '22:00', 6),
+    ('22:00', '24:40', 10),
+)
+# Un départ avant cette heure est compté dans le service de la veille (00:30 -> 24:30)
+FIN_DE_SERVICE = 4 * 3600
+INF = float('inf')
+
+HEURE = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?')
+
+
+# Heures des fichiers d'horaires, au-delà de 24:00 comme dans GTFS (25:10 : 1 h 10 le
+# lendemain) ; pour une heure saisie, voir lire_heure
+def en_secondes(heure):
+    morceaux = [int(morceau) for morceau in heure.strip().split(':')]
+    heures, minutes, secondes = (morceaux + [0, 0])[:3]
+    return heures * 3600 + minutes * 60 + secondes
+
+
+# Heure saisie par l'utilisateur, HH:MM ou HH:MM:SS dans une journée (00:00 à 23:59:59).
+# Lève ValueError avec le message d'erreur.
+def lire_heure(texte):
+    correspondance = HEURE.fullmatch(texte.strip())
+    if correspondance:
+        heures, minutes = int(correspondance[1]), int(correspondance[2])
+        secondes = int(correspondance[3] or 0)
+        if heures < 24 and minutes < 60 and secondes < 60:
+            return heures * 3600 + minutes * 60 + secondes
+    raise ValueError(f"Heure de départ invalide : {texte} (HH:MM ou HH:MM:SS, de 00:00 à 23:59).")
+
+
+# Heure dans la journée de service : avant FIN_DE_SERVICE, c'est encore la veille
+def heure_de_service(secondes):
+    return secondes + 24 * 3600 if secondes < FIN_DE_SERVICE else secondes
+
+
+def en_heure(secondes):
+    secondes = int(secondes) % (24 * 3600)
+    return f"{secondes // 3600:02d}:{secondes % 3600 // 60:02d}"
+
+
+# Horaires sous forme de connexions (un train entre deux arrêts consécutifs), triées
+# par heure de départ dans des tableaux parallèles. Chaque course suit un motif
+# (suite de sommets) ; rangs[i] est la position du départ de la connexion i dans
+# le motif de sa course, pour retrouver les stations intermédiaires d'un trajet.
+class Horaires:
+    def __init__(self, graphe, connexions, motifs, motif_course, source):
+        connexions.sort()
+        self.departs = array('i', (c[0] for c in connexions))
+        self.arrivees = array('i', (c[1] for c in connexions))
+        self.de = array('i', (c[2] for c in connexions))
+        self.vers = array('i', (c[3] for c in connexions))
+        self.courses = array('i', (c[4] for c in connexions))
+        self.rangs = array('i', (c[5] for c in connexions))
+        self.motifs = motifs
+        self.motif_course = array('i', motif_course)
+        self.source = source
+        # Correspondances à pied : arêtes du graphe entre deux lignes différentes
+        # (complètes dans chaque station de metro.txt, une seule relaxation suffit)
+        self.marches = [
+            [(voisin, temps) for voisin, temps in graphe.voisins(sommet)
+             if graphe.stations[voisin].ligne != graphe.stations[sommet].ligne]
+            for sommet in range(len(graphe))
+        ]
+
+    def __len__(self):
+        return len(self.departs)
+
+    def resume(self):
+        return {
+            'source': self.source,
+            'connexions': len(self.departs),
+            'courses': len(self.motif_course),
+            'premier_depart': en_heure(self.departs[0]) if len(self.departs) else None,
+            'dernier_depart': en_heure(self.departs[-1]) if len(self.departs) else None,
+        }
+
+
+# Motifs d'une ligne : tous les chemins simples d'un terminus à un autre dans le
+# sous-graphe de la ligne (deux sens, chaque branche, chaque côté d'une boucle)
+def motifs_ligne(graphe, sommets):
+    ligne = graphe.stations[sommets[0]].ligne
+    voisins = {
+        sommet: [voisin for voisin, _ in graphe.voisins(sommet) if graphe.stations[voisin].ligne == ligne]
+        for sommet in sommets
+    }
+    terminus = [sommet for sommet in sommets if len(voisins[sommet]) == 1 or graphe.stations[sommet].terminus]
+    motifs = []
+    for depart in terminus:
+        pile = [(depart, [depart])]
+        while pile:
+            sommet, chemin = pile.pop()
+            if sommet != depart and sommet in terminus:
+                motifs.append(tuple(chemin))
+                continue
+            for voisin in voisins[sommet]:
+                if voisin not in chemin:
+                    pile.append((voisin, chemin + [voisin]))
+    return motifs
+
+
+# Fréquences de frequences.csv ; les lignes mal formées sont ignorées, dont celles dont
+# l'intervalle n'est pas un nombre de minutes strictement positif et fini
+def lire_frequences(fichier):
+    frequences = defaultdict(list)
+    if not os.path.exists(fichier):
+        return frequences
+    with open(fichier, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            parts = ligne.strip().split(';')
+            if len(parts) != 4 or parts[0].startswith('#'):
+                continue
+            try:
+                en_secondes(parts[1]), en_secondes(parts[2])
+                intervalle = float(parts[3])
+            except ValueError:
+                continue
+            if not math.isfinite(intervalle) or intervalle <= 0:
+                continue
+            frequences[parts[0]].append((parts[1], parts[2], intervalle))
+    return frequences
+
+
+# Horaires générés : pour chaque motif, des départs du terminus selon les fréquences de
+# la ligne (partagées entre les motifs qui partent du même terminus), puis les temps
+# de metro.txt d'un arrêt au suivant
+def generer_horaires(graphe, frequences=None):
+    frequences = frequences or {}
+    par_ligne = defaultdict(list)
+    for station in graphe.stations:
+        par_ligne[station.ligne].append(station.id)
+
+    connexions, motifs, motif_course = [], [], []
+    for ligne, sommets in par_ligne.items():
+        plages = frequences.get(ligne) or frequences.get('*') or FREQUENCES
+        motifs_de_la_ligne = motifs_ligne(graphe, sommets)
+        par_terminus = defaultdict(int)
+        for motif in motifs_de_la_ligne:
+            par_terminus[motif[0]] += 1
+
+        for motif in motifs_de_la_ligne:
+            numero_motif = len(motifs)
+            motifs.append(motif)
+            temps = [graphe.temps(a, b) for a, b in zip(motif, motif[1:])]
+            for debut, fin, intervalle in plages:
+                pas = max(1, int(intervalle * 60 * par_terminus[motif[0]]))
+                for depart in range(en_secondes(debut), en_secondes(fin), pas):
+                    course = len(motif_course)
+                    motif_course.append(numero_motif)
+                    for rang, duree in enumerate(temps):
+                        connexions.append((depart, depart + duree, motif[rang], motif[rang + 1], course, rang))
+                        depart += duree
+
+    return Horaires(graphe, connexions, motifs, motif_course, 'frequences')
+
+
+def _cle(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+# Course d'un flux GTFS, suite de (sommet, arrivée, départ), vue à travers les perturbations
+# ({tronçon: None si fermé, ou (facteur, secondes)}, voir src/perturbations.py) : elle est
+# coupée à chaque tronçon fermé, et un tronçon ralenti (temps * facteur + secondes)
+# retarde toute la suite de la course. Renvoie les morceaux d'au moins deux arrêts.
+def perturber_course(arrets, changements):
+    morceaux, morceau, retard = [], [], 0
+    for i, (sommet, arrivee, depart) in enumerate(arrets):
+        if i:
+            changement = changements.get(_cle(arrets[i - 1][0], sommet), ())
+            if changement is None:
+                morceaux.append(morceau)
+                morceau = []
+            elif changement:
+                facteur, secondes = changement
+                duree = arrivee - arrets[i - 1][2]
+                retard += int(round(duree * facteur + secondes)) - duree
+        morceau.append((sommet, arrivee + retard, depart + retard))
+    morceaux.append(morceau)
+    return [morceau for morceau in morceaux if len(morceau) >= 2]
+
+
+# Flux GTFS : chaque arrêt est rattaché au sommet de même nom sur la ligne de la course
+# (route_short_name), ou au premier sommet de ce nom ; les arrêts inconnus du graphe
+# coupent la course, comme les tronçons fermés par les perturbations actives (changements).
+def lire_gtfs(dossier, graphe, changements=None):
+    def lire(nom):
+        with open(os.path.join(dossier, nom), 'r', encoding='utf-8-sig', newline='') as f:
+            return list(csv.DictReader(f))
+
+    noms_arrets = {arret['stop_id']: arret['stop_name'] for arret in lire('stops.txt')}
+    lignes_routes = {}
+    if os.path.exists(os.path.join(dossier, 'routes.txt')):
+        lignes_routes = {route['route_id']: route.get('route_short_name', '') for route in lire('routes.txt')}
+    lignes_courses = {}
+    if os.path.exists(os.path.join(dossier, 'trips.txt')):
+        lignes_courses = {course['trip_id']: lignes_routes.get(course['route_id'], '') for course in lire('trips.txt')}
+
+    def sommet(stop_id, ligne):
+        ids = graphe.ids_par_nom(noms_arrets.get(stop_id, ''))
+        for i in ids:
+            if graphe.stations[i].ligne == ligne:
+                return i
+        return ids[0] if ids else None
+
+    arrets_par_course = defaultdict(list)
+    for arret in lire('stop_times.txt'):
+        arrets_par_course[arret['trip_id']].append(
+            (int(arret['stop_sequence']), arret['stop_id'], arret['arrival_time'], arret['departure_time']))
+
+    connexions, motifs, motif_course = [], [], []
+    for trip_id, arrets in arrets_par_course.items():
+        arrets.sort()
+        ligne = lignes_courses.get(trip_id, '')
+        troncon = []
+        for _, stop_id, arrivee, depart in arrets + [(None, None, None, None)]:
+            s = sommet(stop_id, ligne) if stop_id is not None else None
+            if s is None:
+                # Fin de course ou arrêt inconnu : on ferme le tronçon en cours
+                for morceau in perturber_course(troncon, changements) if changements else [troncon]:
+                    if len(morceau) < 2:
+                        continue
+                    course = len(motif_course)
+                    motif_course.append(len(motifs))
+                    motifs.append(tuple(t[0] for t in morceau))
+                    for rang, (a, b) in enumerate(zip(morceau, morceau[1:])):
+                        connexions.append((a[2], b[1], a[0], b[0], course, rang))
+                troncon = []
+                continue
+            troncon.append((s, en_secondes(arrivee or depart), en_secondes(depart or arrivee)))
+
+    return Horaires(graphe, connexions, motifs, motif_course, 'gtfs')
+
+
+# Flux GTFS du dossier s'il existe, sinon horaires générés (frequences.csv ou défaut).
+# `graphe` est le graphe vu à travers les perturbations actives : les horaires générés
+# en suivent les temps ; un flux GTFS a ses propres temps, auxquels on applique les
+# `changements` des perturbations (Perturbations.changements).
+def charger_horaires(dossier, graphe, changements=None):
+    dossier_gtfs = os.path.join(dossier, DOSSIER_GTFS)
+    if os.path.exists(os.path.join(dossier_gtfs, 'stop_times.txt')):
+        return lire_gtfs(dossier_gtfs, graphe, changements)
+    return generer_horaires(graphe, lire_frequences(os.path.join(dossier, FICHIER_FREQUENCES)))
+
+
+# Arrivée au plus tôt (Connection Scan Algorithm) : un seul passage sur les connexions
+# triées, à partir de la première qui part après `depart`, arrêté dès qu'une connexion
+# part après la meilleure arrivée connue. À arrivée égale, on monte dans une course là
+# où on l'attrape avec le moins de trajets déjà faits (attendre le train à la station de
+# départ plutôt que remonter la ligne pour le prendre plus tôt).
+# Renvoie (arrivée, étapes) ou (inf, []) ;
+# une étape est (course ou -1 à pied, sommet de départ, sommet d'arrivée, départ,
+# arrivée, sommets parcourus).
+def arrivee_au_plus_tot(horaires, sources, destinations, depart):
+    depart = heure_de_service(depart)
+    departs, arrivees_c, de, vers = horaires.departs, horaires.arrivees, horaires.de, horaires.vers
+    courses, marches = horaires.courses, horaires.marches
+    destinations = set(destinations)
+
+    arrivee = [INF] * len(marches)
+    # Nombre de trajets en train pour atteindre chaque sommet
+    trajets = [0] * len(marches)
+    # Comment chaque sommet a été atteint : (connexion de montée, connexion de descente)
+    # pour un train, (-1, sommet précédent) à pied
+    entree = [None] * len(marches)
+    montee = array('i', [-1]) * len(horaires.motif_course)
+    meilleure = INF
+    for source in sources:
+        arrivee[source] = depart
+        if source in destinations:
+            meilleure = depart
+
+    for i in range(bisect.bisect_left(departs, depart), len(departs)):
+        heure = departs[i]
+        if heure >= meilleure:
+            break
+        course = courses[i]
+        u = de[i]
+        if montee[course] == -1:
+            if arrivee[u] > heure:
+                continue
+            montee[course] = i
+        elif arrivee[u] <= heure and trajets[u] < trajets[de[montee[course]]]:
+            montee[course] = i
+        a, v = arrivees_c[i], vers[i]
+        if a < arrivee[v]:
+            arrivee[v] = a
+            entree[v] = (montee[course], i)
+            trajets[v] = trajets[de[montee[course]]] + 1
+            if v in destinations and a < meilleure:
+                meilleure = a
+            for w, marche in marches[v]:
+                if a + marche < arrivee[w]:
+                    arrivee[w] = a + marche
+                    entree[w] = (-1, v)
+                    trajets[w] = trajets[v]
+                    if w in destinations and a + marche < meilleure:
+                        meilleure = a + marche
+
+    if meilleure == INF:
+        return INF, []
+    sommet = min(destinations, key=arrivee.__getitem__)
+    etapes = []
+    while entree[sommet] is not None:
+        premiere, derniere = entree[sommet]
+        if premiere == -1:
+            etapes.append((-1, derniere, sommet, arrivee[derniere], arrivee[sommet], [derniere, sommet]))
+            sommet = derniere
+        else:
+            motif = horaires.motifs[horaires.motif_course[courses[premiere]]]
+            parcours = list(motif[horaires.rangs[premiere]:horaires.rangs[derniere] + 2])
+            etapes.append((courses[premiere], de[premiere], vers[derniere],
+                           departs[premiere], arrivees_c[derniere], parcours))
+            sommet = de[premiere]
+    etapes.reverse()
+    return meilleure, etapes
@@ -0,0 +1,246 @@
+# Instantané binaire du réseau (metro.txt + pospoints.txt, et la géométrie des chemins
+# sur la carte qui en est tirée), chargé par mmap.
+#
+# Format (petit-boutiste) : un en-tête fixe puis des sections d'entiers 32 bits
+# contiguës, et enfin une table de chaînes UTF-8. Au chargement, les tableaux CSR
+# sont des vues memoryview directement sur le fichier projeté : aucune copie.
+#
+#   python -m src.instantane construire [dossier]
+#   python -m src.instantane verifier [dossier]
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import argparse
+
+from src.reseau import Station, MetroGraph
+from src.geometrie import Geometrie
+from src.fichiers import ecriture_atomique
+
+FICHIER_INSTANTANE = 'metro.snap'
+MAGIQUE = b'METROSNP'
+VERSION_FORMAT = 2
+
+# magique, version, sommets, arcs, arêtes, points, chaînes, points des polylignes, puis
+# pour chacun des deux fichiers sources : empreinte SHA-256, mtime (ns) et taille
+EN_TETE = struct.Struct('<8sIIIIIII32s32sqqqq')
+
+# Sections d'entiers, dans l'ordre du fichier, avec leur longueur en fonction des compteurs
+SECTIONS = (
+    ('offsets', lambda n, arcs, aretes, points, chaines, traces: n + 1),
+    ('cibles', lambda n, arcs, aretes, points, chaines, traces: arcs),
+    ('poids', lambda n, arcs, aretes, points, chaines, traces: arcs),
+    ('aretes_u', lambda n, arcs, aretes, points, chaines, traces: aretes),
+    ('aretes_v', lambda n, arcs, aretes, points, chaines, traces: aretes),
+    ('aretes_poids', lambda n, arcs, aretes, points, chaines, traces: aretes),
+    ('nums', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('noms', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('lignes', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('terminus', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('branchements', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('points_x', lambda n, arcs, aretes, points, chaines, traces: points),
+    ('points_y', lambda n, arcs, aretes, points, chaines, traces: points),
+    ('points_noms', lambda n, arcs, aretes, points, chaines, traces: points),
+    ('geometrie_sommets_x', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('geometrie_sommets_y', lambda n, arcs, aretes, points, chaines, traces: n),
+    ('geometrie_arcs', lambda n, arcs, aretes, points, chaines, traces: arcs),
+    ('geometrie_offsets', lambda n, arcs, aretes, points, chaines, traces: aretes + 1),
+    ('geometrie_tetes', lambda n, arcs, aretes, points, chaines, traces: aretes),
+    ('geometrie_queues', lambda n, arcs, aretes, points, chaines, traces: aretes),
+    ('geometrie_x', lambda n, arcs, aretes, points, chaines, traces: traces),
+    ('geometrie_y', lambda n, arcs, aretes, points, chaines, traces: traces),
+    ('chaines', lambda n, arcs, aretes, points, chaines, traces: chaines + 1),
+)
+
+
+class InstantaneInvalide(Exception):
+    pass
+
+
+def chemin_instantane(dossier):
+    return os.path.join(dossier, FICHIER_INSTANTANE)
+
+
+def _empreinte(fichier):
+    with open(fichier, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def _signature(fichier):
+    stat = os.stat(fichier)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Écrit l'instantané du graphe, des points et de la géométrie de la carte (fichier
+# temporaire au nom unique puis os.replace : plusieurs workers peuvent l'écrire en même temps)
+def ecrire_instantane(fichier, graphe, pos_points, geometrie, fichier_metro, fichier_points):
+    chaines, index_chaines = [], {}
+
+    def chaine(texte):
+        if texte not in index_chaines:
+            index_chaines[texte] = len(chaines)
+            chaines.append(texte)
+        return index_chaines[texte]
+
+    stations = graphe.stations
+    colonnes = {
+        'offsets': graphe.offsets, 'cibles': graphe.cibles, 'poids': graphe.poids,
+        'aretes_u': graphe.aretes_u, 'aretes_v': graphe.aretes_v, 'aretes_poids': graphe.aretes_poids,
+        'nums': [station.num for station in stations],
+        'noms': [chaine(station.nom) for station in stations],
+        'lignes': [chaine(station.ligne) for station in stations],
+        'terminus': [int(station.terminus) for station in stations],
+        'branchements': [station.branchements for station in stations],
+        'points_x': [x for x, _, _ in pos_points],
+        'points_y': [y for _, y, _ in pos_points],
+        'points_noms': [chaine(label) for _, _, label in pos_points],
+    }
+    for nom in Geometrie.TABLEAUX:
+        colonnes['geometrie_' + nom] = getattr(geometrie, nom)
+    blob = bytearray()
+    positions = [0]
+    for texte in chaines:
+        blob += texte.encode('utf-8')
+        positions.append(len(blob))
+    colonnes['chaines'] = positions
+
+    mtime_metro, taille_metro = _signature(fichier_metro)
+    mtime_points, taille_points = _signature(fichier_points)
+    en_tete = EN_TETE.pack(MAGIQUE, VERSION_FORMAT, len(stations), len(graphe.cibles),
+                           len(graphe.aretes_u), len(pos_points), len(chaines), len(geometrie),
+                           _empreinte(fichier_metro), _empreinte(fichier_points),
+                           mtime_metro, taille_metro, mtime_points, taille_points)
+
+    with ecriture_atomique(fichier) as f:
+        f.write(en_tete)
+        for nom, _ in SECTIONS:
+            f.write(struct.pack(f'<{len(colonnes[nom])}i', *colonnes[nom]))
+        f.write(blob)
+
+
+# L'instantané correspond-il encore aux fichiers sources ?
+# Même mtime et même taille : oui sans relire ; sinon on compare les empreintes.
+def est_a_jour(valeurs, fichier_metro, fichier_points):
+    for fichier, empreinte, mtime, taille in ((fichier_metro, valeurs[8], valeurs[10], valeurs[11]),
+                                              (fichier_points, valeurs[9], valeurs[12], valeurs[13])):
+        if _signature(fichier) != (mtime, taille) and _empreinte(fichier) != empreinte:
+            return False
+    return True
+
+
+# Charge l'instantané par mmap et renvoie (graphe, pos_points, geometrie).
+# Lève InstantaneInvalide si le fichier est absent, d'un autre format ou périmé.
+def lire_instantane(fichier, fichier_metro=None, fichier_points=None):
+    if sys.byteorder != 'little':
+        raise InstantaneInvalide("instantané petit-boutiste uniquement")
+    try:
+        with open(fichier, 'rb') as f:
+            projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise InstantaneInvalide(str(e))
+
+    vue = memoryview(projection)
+    if len(vue) < EN_TETE.size:
+        raise InstantaneInvalide("fichier tronqué")
+    valeurs = EN_TETE.unpack_from(vue)
+    if valeurs[0] != MAGIQUE or valeurs[1] != VERSION_FORMAT:
+        raise InstantaneInvalide("format inconnu")
+    if fichier_metro and fichier_points and not est_a_jour(valeurs, fichier_metro, fichier_points):
+        raise InstantaneInvalide("fichiers sources modifiés")
+
+    compteurs = valeurs[2:8]
+    tableaux = {}
+    position = EN_TETE.size
+    for nom, longueur in SECTIONS:
+        taille = 4 * longueur(*compteurs)
+        if position + taille > len(vue):
+            raise InstantaneInvalide("fichier tronqué")
+        tableaux[nom] = vue[position:position + taille].cast('i')
+        position += taille
+
+    blob = vue[position:]
+    positions = tableaux['chaines']
+    chaines = [str(blob[positions[i]:positions[i + 1]], 'utf-8') for i in range(len(positions) - 1)]
+
+    noms, lignes = tableaux['noms'], tableaux['lignes']
+    terminus, branchements, nums = tableaux['terminus'], tableaux['branchements'], tableaux['nums']
+    stations = [
+        Station(i, nums[i], chaines[noms[i]], chaines[lignes[i]], bool(terminus[i]), branchements[i])
+        for i in range(compteurs[0])
+    ]
+    graphe = MetroGraph.depuis_tableaux(stations, *(tableaux[nom] for nom in MetroGraph.TABLEAUX))
+
+    points_noms = tableaux['points_noms']
+    pos_points = tuple(zip(tableaux['points_x'].tolist(), tableaux['points_y'].tolist(),
+                           (chaines[i] for i in points_noms)))
+    geometrie = Geometrie(graphe, *(tableaux['geometrie_' + nom] for nom in Geometrie.TABLEAUX))
+    return graphe, pos_points, geometrie
+
+
+# Vérifie qu'un instantané est à jour et identique à ce que donne la lecture des fichiers texte
+def verifier_instantane(dossier):
+    from src.chargement import lire_graphe, lire_traces, lire_pospoints, FICHIER_METRO, FICHIER_POSPOINTS
+    from src.geometrie import construire_geometrie
+    fichier_metro = os.path.join(dossier, FICHIER_METRO)
+    fichier_points = os.path.join(dossier, FICHIER_POSPOINTS)
+    graphe, pos_points, geometrie = lire_instantane(chemin_instantane(dossier), fichier_metro, fichier_points)
+    reference = lire_graphe(fichier_metro)
+    traces = lire_traces(fichier_points)
+
+    erreurs = []
+    for nom in MetroGraph.TABLEAUX:
+        if list(getattr(graphe, nom)) != list(getattr(reference, nom)):
+            erreurs.append(f"tableau {nom} différent")
+    champs = ('num', 'nom', 'ligne', 'terminus', 'branchements')
+    for station, attendue in zip(graphe.stations, reference.stations):
+        if any(getattr(station, c) != getattr(attendue, c) for c in champs):
+            erreurs.append(f"sommet {attendue.num} différent")
+    if len(graphe.stations) != len(reference.stations):
+        erreurs.append("nombre de sommets différent")
+    if pos_points != lire_pospoints(fichier_points, traces):
+        erreurs.append("points de la carte différents")
+    geometrie_attendue = construire_geometrie(reference, traces)
+    for nom in Geometrie.TABLEAUX:
+        if list(getattr(geometrie, nom)) != list(getattr(geometrie_attendue, nom)):
+            erreurs.append(f"géométrie {nom} différente")
+    return erreurs
+
+
+def construire_instantane(dossier):
+    from src.chargement import lire_graphe, lire_traces, lire_pospoints, FICHIER_METRO, FICHIER_POSPOINTS
+    from src.geometrie import construire_geometrie
+    fichier_metro = os.path.join(dossier, FICHIER_METRO)
+    fichier_points = os.path.join(dossier, FICHIER_POSPOINTS)
+    fichier = chemin_instantane(dossier)
+    graphe, traces = lire_graphe(fichier_metro), lire_traces(fichier_points)
+    ecrire_instantane(fichier, graphe, lire_pospoints(fichier_points, traces), construire_geometrie(graphe, traces),
+                      fichier_metro, fichier_points)
+    return fichier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantané binaire du réseau")
+    parser.add_argument('commande', choices=['construire', 'verifier'])
+    parser.add_argument('dossier', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+    args = parser.parse_args()
+
+    if args.commande == 'construire':
+        fichier = construire_instantane(args.dossier)
+        print(f"Instantané écrit : {fichier} ({os.path.getsize(fichier)} octets)")
+        return 0
+
+    try:
+        erreurs = verifier_instantane(args.dossier)
+    except InstantaneInvalide as e:
+        print(f"Instantané invalide : {e}")
+        return 1
+    for erreur in erreurs:
+        print(f"- {erreur}")
+    print("Instantané valide" if not erreurs else f"{len(erreurs)} différence(s)")
+    return 1 if erreurs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
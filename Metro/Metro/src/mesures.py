@@ -0,0 +1,122 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Bornes des histogrammes de latence (secondes), celles des clients Prometheus
+# resserrées vers le bas : la plupart des phases durent moins d'une milliseconde
+BORNES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+          0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogramme:
+    __slots__ = ('comptes', 'somme', 'nombre')
+
+    def __init__(self):
+        self.comptes = [0] * len(BORNES)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        for i, borne in enumerate(BORNES):
+            if valeur <= borne:
+                self.comptes[i] += 1
+                break
+        self.somme += valeur
+        self.nombre += 1
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquettes(etiquettes):
+    return ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in etiquettes)
+
+
+# Registre des mesures du processus : histogrammes de latence par nom et étiquettes,
+# compteurs, et export au format texte de Prometheus. Sous gunicorn, chaque worker a
+# le sien (chaque /metrics décrit le worker qui répond).
+class Mesures:
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.histogrammes = {}
+        self.compteurs = {}
+        self.aides = {}
+
+    def decrire(self, nom, aide):
+        self.aides[nom] = aide
+
+    def observer(self, nom, secondes, **etiquettes):
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self.verrou:
+            histogramme = self.histogrammes.get(cle)
+            if histogramme is None:
+                histogramme = self.histogrammes[cle] = Histogramme()
+            histogramme.observer(secondes)
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self.verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    # Durée d'un bloc : with mesures.phase('chemin.recherche'): ...
+    @contextmanager
+    def phase(self, nom):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer('metro_phase_secondes', time.perf_counter() - debut, phase=nom)
+
+    # Texte d'exposition Prometheus ; `jauges` : [(nom, {étiquettes}, valeur)] lues à l'appel
+    def prometheus(self, jauges=()):
+        lignes = []
+        with self.verrou:
+            histogrammes = sorted((cle, list(h.comptes), h.somme, h.nombre) for cle, h in self.histogrammes.items())
+            compteurs = sorted(self.compteurs.items())
+
+        deja = set()
+
+        def entete(nom, type_mesure):
+            if nom not in deja:
+                deja.add(nom)
+                if nom in self.aides:
+                    lignes.append(f"# HELP {nom} {self.aides[nom]}")
+                lignes.append(f"# TYPE {nom} {type_mesure}")
+
+        for (nom, etiquettes), comptes, somme, nombre in histogrammes:
+            entete(nom, 'histogram')
+            prefixe = _etiquettes(etiquettes)
+            prefixe = prefixe + ',' if prefixe else ''
+            cumul = 0
+            for borne, compte in zip(BORNES, comptes):
+                cumul += compte
+                lignes.append(f'{nom}_bucket{{{prefixe}le="{borne}"}} {cumul}')
+            lignes.append(f'{nom}_bucket{{{prefixe}le="+Inf"}} {nombre}')
+            suffixe = f'{{{_etiquettes(etiquettes)}}}' if etiquettes else ''
+            lignes.append(f'{nom}_sum{suffixe} {somme}')
+            lignes.append(f'{nom}_count{suffixe} {nombre}')
+
+        for (nom, etiquettes), valeur in compteurs:
+            entete(nom, 'counter')
+            suffixe = f'{{{_etiquettes(etiquettes)}}}' if etiquettes else ''
+            lignes.append(f'{nom}{suffixe} {valeur}')
+
+        # Tri stable par nom : les séries d'une même mesure restent groupées sous leur en-tête
+        for nom, etiquettes, valeur in sorted(jauges, key=lambda jauge: jauge[0]):
+            entete(nom, 'counter' if nom.endswith('_total') else 'gauge')
+            suffixe = f'{{{_etiquettes(sorted(etiquettes.items()))}}}' if etiquettes else ''
+            lignes.append(f'{nom}{suffixe} {valeur}')
+
+        return '\n'.join(lignes) + '\n'
+
+
+# Registre partagé par l'application et les modules de src/
+mesures = Mesures()
+mesures.decrire('metro_phase_secondes', "Durée des phases internes (lecture, recherche, tracé...)")
+mesures.decrire('metro_requete_secondes', "Durée des requêtes HTTP par route")
+mesures.decrire('metro_requetes_total', "Requêtes HTTP par route et statut")
+mesures.decrire('metro_alt_requetes_total', "Recherches point à point guidées par l'index de repères")
+mesures.decrire('metro_alt_sommets_fixes_total', "Sommets fixés par ces recherches (moyenne : rapport des deux)")
+mesures.decrire('metro_profils_total', "Profils cProfile écrits pour des requêtes lentes")
+mesures.decrire('metro_rechargements_total', "Rechargements à chaud du réseau, par statut et origine")
@@ -0,0 +1,115 @@
+import re
+import bisect
+import unicodedata
+from collections import defaultdict
+
+SEPARATEURS = re.compile(r"[\s\-,'’.]+")
+
+
+# Clé de recherche d'un nom : sans accents, sans casse, ponctuation ramenée à un espace
+# ("Château d'Eau" -> "chateau d eau", "Aubervilliers-Pantin" -> "aubervilliers pantin")
+def normaliser(nom):
+    decompose = unicodedata.normalize('NFKD', nom)
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return SEPARATEURS.sub(' ', sans_accents.casefold()).strip()
+
+
+def trigrammes(cle):
+    cle = f"  {cle} "
+    return {cle[i:i + 3] for i in range(len(cle) - 2)}
+
+
+# Index des noms de stations, construit une fois au chargement du graphe.
+# - recherche exacte insensible à la casse et aux accents, qui renvoie tous les sommets
+#   portant le nom (une station par ligne dans metro.txt, ex. les trois Bastille) ;
+# - préfixes par recherche dichotomique dans des listes triées (nom complet et début de mot) ;
+# - sous-chaînes, puis correspondance approchée par trigrammes pour les fautes de frappe.
+class IndexNoms:
+    def __init__(self, stations):
+        self.ids_par_cle = {}
+        self.nom_par_cle = {}
+        for station in stations:
+            cle = normaliser(station.nom)
+            if cle not in self.ids_par_cle:
+                self.ids_par_cle[cle] = []
+                self.nom_par_cle[cle] = station.nom
+            self.ids_par_cle[cle].append(station.id)
+
+        self.cles = sorted(self.ids_par_cle)
+        # Chaque suffixe commençant à un début de mot : "de vincennes", "vincennes", ...
+        self.mots = sorted(
+            (cle[debut.start():], cle)
+            for cle in self.cles
+            for debut in re.finditer(r'(?<= )\S', cle)
+        )
+        self.trigrammes = defaultdict(list)
+        self.nb_trigrammes = {}
+        for cle in self.cles:
+            trigrammes_cle = trigrammes(cle)
+            self.nb_trigrammes[cle] = len(trigrammes_cle)
+            for trigramme in trigrammes_cle:
+                self.trigrammes[trigramme].append(cle)
+
+    def __len__(self):
+        return len(self.cles)
+
+    def ids(self, nom):
+        return self.ids_par_cle.get(normaliser(nom), [])
+
+    def nom(self, cle):
+        return self.nom_par_cle[cle]
+
+    # Renvoie au plus `limite` clés, les meilleures d'abord :
+    # nom exact, début du nom, début d'un mot, sous-chaîne, puis nom approché.
+    def rechercher(self, requete, limite=10, approx=True):
+        requete = normaliser(requete)
+        if not requete or limite <= 0:
+            return []
+
+        resultats = []
+        vus = set()
+
+        def ajouter(cles):
+            for cle in cles:
+                if cle not in vus:
+                    vus.add(cle)
+                    resultats.append(cle)
+                    if len(resultats) >= limite:
+                        return True
+            return False
+
+        if requete in self.ids_par_cle and ajouter([requete]):
+            return resultats
+
+        debut = bisect.bisect_left(self.cles, requete)
+        fin = bisect.bisect_left(self.cles, requete + '\uffff')
+        if ajouter(sorted(self.cles[debut:fin], key=len)):
+            return resultats
+
+        debut = bisect.bisect_left(self.mots, (requete,))
+        fin = bisect.bisect_left(self.mots, (requete + '\uffff',))
+        if ajouter(sorted((cle for _, cle in self.mots[debut:fin]), key=len)):
+            return resultats
+
+        if ajouter(cle for cle in self.cles if requete in cle):
+            return resultats
+
+        if approx:
+            ajouter(self.approches(requete))
+        return resultats
+
+    # Correspondance approchée : coefficient de Dice sur les trigrammes
+    def approches(self, requete, seuil=0.4):
+        trigrammes_requete = trigrammes(requete)
+        communs = defaultdict(int)
+        for trigramme in trigrammes_requete:
+            for cle in self.trigrammes.get(trigramme, ()):
+                communs[cle] += 1
+
+        scores = []
+        for cle, nombre in communs.items():
+            score = 2 * nombre / (len(trigrammes_requete) + self.nb_trigrammes[cle])
+            if score >= seuil:
+                scores.append((-score, cle))
+        scores.sort()
+        return [cle for _, cle in scores]
@@ -0,0 +1,323 @@
+import itertools
+import math
+from array import array
+from collections import deque
+
+from src.routage import arbre_plus_courts_chemins
+
+INF = float('inf')
+# Au-delà de ce nombre d'extrémités de tronçons rouverts ou accélérés, on ne calcule plus
+# un arbre par extrémité : tous les chemins en cache sont invalidés
+MAX_ARBRES_INVALIDATION = 32
+
+_identifiants = itertools.count(1)
+_generations = itertools.count(1)
+
+
+class PerturbationInvalide(ValueError):
+    pass
+
+
+def _cle(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+# Une perturbation : des tronçons (arêtes non orientées du graphe de base, par paire de
+# sommets) fermés, ou ralentis (temps * facteur + secondes). `donnees` garde la demande
+# d'origine, pour la résoudre à nouveau sur un réseau rechargé (reporter).
+class Perturbation:
+    __slots__ = ('id', 'type', 'description', 'aretes', 'facteur', 'secondes', 'donnees')
+
+    def __init__(self, type, description, aretes, facteur=1.0, secondes=0, donnees=None):
+        self.id = next(_identifiants)
+        self.type = type
+        self.description = description
+        self.aretes = frozenset(aretes)
+        self.facteur = facteur
+        self.secondes = secondes
+        self.donnees = dict(donnees or {})
+
+    def resume(self):
+        resume = {'id': self.id, 'type': self.type, 'description': self.description, 'troncons': len(self.aretes)}
+        if self.type == 'ralentissement':
+            resume['facteur'] = self.facteur
+            resume['secondes'] = self.secondes
+        return resume
+
+
+# Perturbations actives, immuables comme le Reseau qui les porte : ajouter ou retirer
+# en crée un nouvel ensemble, de génération nouvelle. `changements` associe à chaque
+# tronçon touché None (fermé) ou (facteur, secondes) cumulés dans l'ordre d'ajout.
+class Perturbations:
+    __slots__ = ('liste', 'changements', 'generation')
+
+    def __init__(self, liste=(), generation=0):
+        self.liste = tuple(liste)
+        self.generation = generation
+        changements = {}
+        for perturbation in self.liste:
+            for cle in perturbation.aretes:
+                if perturbation.type == 'fermeture':
+                    changements[cle] = None
+                elif cle not in changements:
+                    changements[cle] = (perturbation.facteur, perturbation.secondes)
+                elif changements[cle] is not None:
+                    facteur, secondes = changements[cle]
+                    changements[cle] = (facteur * perturbation.facteur,
+                                        secondes * perturbation.facteur + perturbation.secondes)
+        self.changements = changements
+
+    def __len__(self):
+        return len(self.liste)
+
+    def ajouter(self, perturbation):
+        return Perturbations(self.liste + (perturbation,), next(_generations))
+
+    def retirer(self, identifiant):
+        liste = tuple(p for p in self.liste if p.id != identifiant)
+        if len(liste) == len(self.liste):
+            raise KeyError(identifiant)
+        return Perturbations(liste, next(_generations))
+
+    def vider(self):
+        return Perturbations((), next(_generations))
+
+    def resume(self):
+        return [perturbation.resume() for perturbation in self.liste]
+
+
+def _poids_perturbe(poids, changement):
+    facteur, secondes = changement
+    return int(round(poids * facteur + secondes))
+
+
+# Graphe de base vu à travers les perturbations : mêmes stations et mêmes index, tableaux
+# CSR recopiés par blocs entre les sommets touchés (les autres lignes ne sont pas relues).
+# Les algorithmes de routage et d'analyse s'en servent sans rien savoir des perturbations.
+def graphe_perturbe(base, changements):
+    if not changements:
+        return base
+    touches = sorted({sommet for cle in changements for sommet in cle})
+    offsets, cibles, poids = base.offsets, base.cibles, base.poids
+    n = len(base)
+
+    nouveaux_offsets = array('i')
+    nouvelles_cibles = array('i')
+    nouveaux_poids = array('i')
+    precedent = 0
+    decalage = 0
+    for sommet in touches + [n]:
+        # Lignes intactes : copie en bloc, décalées du nombre d'entrées retirées avant elles
+        nouveaux_offsets.extend(o - decalage for o in offsets[precedent:sommet])
+        nouvelles_cibles.extend(cibles[offsets[precedent]:offsets[sommet]])
+        nouveaux_poids.extend(poids[offsets[precedent]:offsets[sommet]])
+        if sommet == n:
+            break
+        nouveaux_offsets.append(len(nouvelles_cibles))
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            changement = changements.get(_cle(sommet, voisin), ())
+            if changement is None:
+                decalage += 1
+                continue
+            nouvelles_cibles.append(voisin)
+            nouveaux_poids.append(_poids_perturbe(poids[k], changement) if changement else poids[k])
+        precedent = sommet + 1
+    nouveaux_offsets.append(len(nouvelles_cibles))
+
+    aretes_u, aretes_v, aretes_poids = array('i'), array('i'), array('i')
+    for u, v, t in base.aretes():
+        changement = changements.get(_cle(u, v), ())
+        if changement is None:
+            continue
+        aretes_u.append(u)
+        aretes_v.append(v)
+        aretes_poids.append(_poids_perturbe(t, changement) if changement else t)
+
+    return base.variante(nouveaux_offsets, nouvelles_cibles, nouveaux_poids, aretes_u, aretes_v, aretes_poids)
+
+
+# Sommets d'une station, éventuellement restreints à une ligne
+def _sommets(graphe, nom, ligne=None):
+    sommets = [s for s in graphe.ids_par_nom(nom) if ligne is None or graphe.stations[s].ligne == ligne]
+    if not sommets:
+        raise PerturbationInvalide(f"Station inconnue : {nom}" + (f" (ligne {ligne})" if ligne else "") + ".")
+    return sommets
+
+
+# Tronçons d'une ligne entre deux stations : le plus court parcours (en nombre d'arrêts)
+# dans le sous-graphe de la ligne, ce qui couvre aussi un tronçon de plusieurs interstations
+def _troncons_entre(graphe, de, vers, ligne):
+    departs = _sommets(graphe, de, ligne)
+    arrivees = set(_sommets(graphe, vers, ligne))
+    pred = {sommet: None for sommet in departs}
+    file = deque(departs)
+    while file:
+        sommet = file.popleft()
+        if sommet in arrivees:
+            aretes = []
+            while pred[sommet] is not None:
+                aretes.append(_cle(pred[sommet], sommet))
+                sommet = pred[sommet]
+            return aretes
+        for voisin, _ in graphe.voisins(sommet):
+            if voisin not in pred and graphe.stations[voisin].ligne == graphe.stations[sommet].ligne:
+                pred[voisin] = sommet
+                file.append(voisin)
+    return None
+
+
+# Perturbation décrite en JSON, rattachée aux tronçons du graphe de base :
+#   {"type": "fermeture" | "ralentissement", puis
+#    "station": nom [, "ligne": l]                 tous les tronçons de la station,
+#    "de": nom, "vers": nom [, "ligne": l]         tronçons d'une ligne entre deux stations,
+#    ou "ligne": l seule                           toute la ligne ;
+#    ralentissement : "facteur" (>= 1) et/ou "secondes" (>= 0) par tronçon}
+def creer_perturbation(graphe, donnees):
+    type_perturbation = donnees.get('type', 'fermeture')
+    if type_perturbation not in ('fermeture', 'ralentissement'):
+        raise PerturbationInvalide(f"Type de perturbation inconnu : {type_perturbation}.")
+    ligne = donnees.get('ligne')
+    ligne = str(ligne) if ligne not in (None, '') else None
+
+    if donnees.get('station'):
+        station = str(donnees['station'])
+        aretes = {_cle(sommet, voisin) for sommet in _sommets(graphe, station, ligne)
+                  for voisin, _ in graphe.voisins(sommet)}
+        description = station + (f" (ligne {ligne})" if ligne else "")
+    elif donnees.get('de') and donnees.get('vers'):
+        de, vers = str(donnees['de']), str(donnees['vers'])
+        lignes = [ligne] if ligne else sorted(
+            {graphe.stations[s].ligne for s in _sommets(graphe, de)}
+            & {graphe.stations[s].ligne for s in _sommets(graphe, vers)})
+        aretes = None
+        for candidate in lignes:
+            aretes = _troncons_entre(graphe, de, vers, candidate)
+            if aretes is not None:
+                ligne = candidate
+                break
+        if not aretes:
+            raise PerturbationInvalide(f"Aucune ligne ne relie {de} à {vers}.")
+        description = f"{de} - {vers} (ligne {ligne})"
+    elif ligne:
+        aretes = {(u, v) if u < v else (v, u) for u, v, _ in graphe.aretes()
+                  if graphe.stations[u].ligne == ligne and graphe.stations[v].ligne == ligne}
+        if not aretes:
+            raise PerturbationInvalide(f"Ligne inconnue : {ligne}.")
+        description = f"ligne {ligne}"
+    else:
+        raise PerturbationInvalide("Indiquez une station, deux stations (de, vers) ou une ligne.")
+
+    if type_perturbation == 'fermeture':
+        return Perturbation(type_perturbation, description, aretes, donnees=donnees)
+    try:
+        facteur = float(donnees.get('facteur', 1))
+        secondes = float(donnees.get('secondes', 0))
+    except (TypeError, ValueError):
+        raise PerturbationInvalide("Facteur ou secondes invalides.")
+    if not math.isfinite(facteur) or not math.isfinite(secondes):
+        raise PerturbationInvalide("Facteur ou secondes invalides.")
+    secondes = int(secondes)
+    if facteur < 1 or secondes < 0 or (facteur == 1 and secondes == 0):
+        raise PerturbationInvalide("Un ralentissement demande un facteur > 1 ou des secondes > 0.")
+    return Perturbation(type_perturbation, description, aretes, facteur, secondes, donnees)
+
+
+# Les mêmes perturbations sur un autre graphe de base (réseau rechargé, dont les sommets
+# ont pu être renumérotés) : chacune est résolue à nouveau depuis sa demande d'origine et
+# garde son identifiant. Renvoie (perturbations, écartées) ; sont écartées celles qui ne
+# s'appliquent plus (station ou ligne disparue).
+def reporter(perturbations, graphe):
+    gardees, ecartees = [], []
+    for perturbation in perturbations.liste:
+        try:
+            nouvelle = creer_perturbation(graphe, perturbation.donnees)
+        except PerturbationInvalide:
+            ecartees.append(perturbation)
+            continue
+        nouvelle.id = perturbation.id
+        gardees.append(nouvelle)
+    return Perturbations(gardees, next(_generations)), ecartees
+
+
+# Tronçons dont le temps a augmenté (ou fermés) et ceux dont le temps a baissé (ou rouverts)
+# entre deux jeux de changements
+def comparer(avant, apres):
+    hausses, baisses = set(), set()
+    for cle in avant.keys() | apres.keys():
+        ancien, nouveau = avant.get(cle, (1.0, 0)), apres.get(cle, (1.0, 0))
+        if ancien == nouveau:
+            continue
+        if nouveau is None:
+            hausses.add(cle)
+        elif ancien is None:
+            baisses.add(cle)
+        else:
+            if nouveau[0] > ancien[0] or nouveau[1] > ancien[1]:
+                hausses.add(cle)
+            if nouveau[0] < ancien[0] or nouveau[1] < ancien[1]:
+                baisses.add(cle)
+    return hausses, baisses
+
+
+# Trace d'un résultat de routage mis en cache : tronçons empruntés (par tous les chemins
+# rendus), sommets de départ et d'arrivée, et temps le plus long rendu (inf sans chemin)
+def trace_chemins(chemins, sources, destinations, temps):
+    aretes = frozenset(_cle(a, b) for chemin in chemins for a, b in zip(chemin, chemin[1:]) if a != b)
+    return aretes, tuple(sources), tuple(destinations), temps
+
+
+# Ce qu'un changement de perturbations rend faux parmi les résultats déjà calculés.
+# Un chemin reste le plus court si aucun de ses tronçons n'a augmenté (les autres chemins
+# n'ont pu que s'allonger) et si aucun tronçon qui a baissé n'ouvre un chemin plus court :
+# pour un tronçon (u, v) de temps t, le meilleur chemin qui l'emprunte coûte
+# d(départ, u) + t + d(v, arrivée), lu dans les arbres des plus courts chemins depuis u et
+# v sur le nouveau graphe (non orienté : d(départ, u) = d(u, départ)).
+class Invalidation:
+    def __init__(self, graphe, hausses, baisses):
+        self.graphe = graphe
+        self.hausses = frozenset(hausses)
+        self.baisses = [(u, v, graphe.temps(u, v)) for u, v in baisses]
+        # Un tronçon rouvert peut rester coupé par une autre fermeture (temps None)
+        self.baisses = [(u, v, t) for u, v, t in self.baisses if t is not None]
+        self.tout = len({s for u, v, _ in self.baisses for s in (u, v)}) > MAX_ARBRES_INVALIDATION
+        self.arbres = {}
+
+    def __bool__(self):
+        return bool(self.hausses or self.baisses)
+
+    def _distances(self, sommet):
+        if sommet not in self.arbres:
+            self.arbres[sommet], _ = arbre_plus_courts_chemins(self.graphe, [sommet])
+        return self.arbres[sommet]
+
+    def raccourci(self, sources, destinations, temps):
+        if self.tout and self.baisses:
+            return True
+        for u, v, t in self.baisses:
+            depuis_u, depuis_v = self._distances(u), self._distances(v)
+            vers_u = min(depuis_u[s] for s in sources)
+            vers_v = min(depuis_v[s] for s in sources)
+            u_arrivee = min(depuis_u[d] for d in destinations)
+            v_arrivee = min(depuis_v[d] for d in destinations)
+            if min(vers_u + t + v_arrivee, vers_v + t + u_arrivee) < temps:
+                return True
+        return False
+
+    # Résultat de routage en cache (trace_chemins) à retirer ; sans trace, toujours
+    def chemin_touche(self, trace):
+        if trace is None:
+            return True
+        aretes, sources, destinations, temps = trace
+        return not self.hausses.isdisjoint(aretes) or self.raccourci(sources, destinations, temps)
+
+    # Arbre des plus courts chemins en cache à retirer : une de ses arêtes a augmenté, ou un
+    # tronçon qui a baissé améliore la distance d'une de ses extrémités
+    def arbre_touche(self, distances, pred):
+        for u, v in self.hausses:
+            if pred[v] == u or pred[u] == v:
+                return True
+        for u, v, t in self.baisses:
+            if distances[u] + t < distances[v] or distances[v] + t < distances[u]:
+                return True
+        return False
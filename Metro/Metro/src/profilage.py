@@ -0,0 +1,58 @@
+import os
+import time
+import pstats
+import cProfile
+import threading
+
+
+# Profil cProfile d'une requête : le thread de la requête et, pour les calculs envoyés
+# au pool, le thread qui les exécute (chacun son profileur, fusionnés à l'écriture).
+class ProfilRequete:
+    def __init__(self):
+        self.profils = []
+        self.verrou = threading.Lock()
+        self.principal = None
+
+    def _nouveau(self):
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError:
+            # Un seul profileur actif à la fois à partir de Python 3.12 : on s'en passe
+            return None
+        with self.verrou:
+            self.profils.append(profil)
+        return profil
+
+    def demarrer(self):
+        self.principal = self._nouveau()
+
+    def arreter(self):
+        if self.principal is not None:
+            self.principal.disable()
+
+    # Exécute fonction sous un profileur propre au thread appelant (threads du pool de calcul)
+    def executer(self, fonction, *args):
+        profil = self._nouveau()
+        try:
+            return fonction(*args)
+        finally:
+            if profil is not None:
+                profil.disable()
+
+    # Écrit les statistiques fusionnées (lisibles avec pstats ou snakeviz) et renvoie le
+    # chemin du fichier, ou None si rien n'a pu être profilé
+    def ecrire(self, dossier, route):
+        with self.verrou:
+            profils = list(self.profils)
+        if not profils:
+            return None
+        statistiques = pstats.Stats(profils[0])
+        for profil in profils[1:]:
+            statistiques.add(profil)
+
+        os.makedirs(dossier, exist_ok=True)
+        nom = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'index'
+        fichier = os.path.join(dossier, f"{time.strftime('%Y%m%d-%H%M%S')}-{nom}-{os.getpid()}-{id(self):x}.prof")
+        statistiques.dump_stats(fichier)
+        return fichier
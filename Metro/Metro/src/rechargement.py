@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+
+from src.mesures import mesures
+
+# Fichiers du dossier de données dont dépend le réseau (les instantanés metro.snap et
+# metro.alt en sont tirés : ils ne déclenchent rien)
+FICHIERS_DONNEES = ('metro.txt', 'pospoints.txt', 'stations_coordinates.csv', 'frequences.csv')
+DOSSIER_GTFS = 'gtfs'
+
+
+# (nom, mtime en ns, taille) des fichiers de données présents, GTFS compris
+def signature_donnees(dossier):
+    noms = list(FICHIERS_DONNEES)
+    dossier_gtfs = os.path.join(dossier, DOSSIER_GTFS)
+    if os.path.isdir(dossier_gtfs):
+        noms += sorted(os.path.join(DOSSIER_GTFS, nom) for nom in os.listdir(dossier_gtfs))
+    signature = []
+    for nom in noms:
+        try:
+            stat = os.stat(os.path.join(dossier, nom))
+        except OSError:
+            continue
+        signature.append((nom, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+# Rechargement du réseau en arrière-plan, un seul à la fois :
+# - construire() charge le nouveau réseau complet (index, carte...) sans bloquer les
+#   requêtes, qui continuent sur l'ancien ;
+# - publier(construit) le rend actif d'une seule affectation et renvoie un rapport.
+# Une demande pendant un rechargement rejoint celui en cours. Un échec (fichier illisible,
+# réseau vide) laisse l'ancien réseau actif ; le rapport garde l'erreur.
+class Rechargeur:
+    def __init__(self, construire, publier):
+        self.construire = construire
+        self.publier = publier
+        self.verrou = threading.Lock()
+        self.en_cours = None
+        self.dernier = None
+        self.reussis = 0
+        self.echecs = 0
+
+    # Lance un rechargement, ou rejoint celui en cours : renvoie (événement levé à la fin,
+    # lancé ou non). Le rapport est ensuite dans self.dernier.
+    def demander(self, raison):
+        with self.verrou:
+            if self.en_cours is not None:
+                return self.en_cours, False
+            fini = threading.Event()
+            self.en_cours = fini
+        threading.Thread(target=self._executer, args=(raison, fini), name='rechargement', daemon=True).start()
+        return fini, True
+
+    def _executer(self, raison, fini):
+        debut = time.perf_counter()
+        rapport = {'raison': raison, 'debut': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        try:
+            with mesures.phase('rechargement.construction'):
+                construit = self.construire()
+            rapport['construction_ms'] = round((time.perf_counter() - debut) * 1000, 1)
+            with mesures.phase('rechargement.publication'):
+                rapport.update(self.publier(construit))
+            rapport['statut'] = 'ok'
+        except Exception as erreur:
+            rapport['statut'] = 'echec'
+            rapport['erreur'] = f"{type(erreur).__name__}: {erreur}"
+        rapport['duree_ms'] = round((time.perf_counter() - debut) * 1000, 1)
+        mesures.incrementer('metro_rechargements_total', statut=rapport['statut'], raison=raison)
+
+        with self.verrou:
+            self.dernier = rapport
+            if rapport['statut'] == 'ok':
+                self.reussis += 1
+            else:
+                self.echecs += 1
+            self.en_cours = None
+        fini.set()
+
+    def etat(self):
+        with self.verrou:
+            return {
+                'en_cours': self.en_cours is not None,
+                'reussis': self.reussis,
+                'echecs': self.echecs,
+                'dernier': self.dernier,
+            }
+
+
+# Surveillance du dossier de données par relevés périodiques (mtime et taille) : un
+# changement déclenche rappel() une fois la signature stable sur deux relevés (fichier
+# en cours d'écriture). Si rappel() renvoie False (rechargement déjà en cours, lancé sur
+# des fichiers plus anciens), le changement est repris au relevé suivant.
+class Surveillance(threading.Thread):
+    def __init__(self, dossier, intervalle, rappel):
+        super().__init__(name='surveillance', daemon=True)
+        self.dossier = dossier
+        self.intervalle = intervalle
+        self.rappel = rappel
+        self.pid = os.getpid()
+        self.signature = signature_donnees(dossier)
+        self.arret = threading.Event()
+
+    def run(self):
+        candidate = None
+        while not self.arret.wait(self.intervalle):
+            signature = signature_donnees(self.dossier)
+            if signature == self.signature:
+                candidate = None
+                continue
+            if signature != candidate:
+                candidate = signature
+                continue
+            if self.rappel():
+                self.signature = signature
+                candidate = None
+
+    def arreter(self):
+        self.arret.set()
@@ -0,0 +1,273 @@
+# Index de repères (ALT : A*, landmarks, triangle inequality) pour les requêtes point à point.
+#
+# Prétraitement : quelques sommets repères L, et pour chacun la distance d(L, v) à tous les
+# sommets. Par l'inégalité triangulaire, |d(L, t) - d(L, v)| <= d(v, t) : le maximum sur
+# les repères est une borne inférieure admissible et cohérente, qui guide un A* vers
+# l'arrivée. Les bornes restent valables quand des tronçons sont fermés ou ralentis
+# (src/perturbations.py) : les distances ne font alors qu'augmenter.
+#
+# Format du fichier (petit-boutiste, lu par mmap) : un en-tête, les sommets repères, puis
+# les distances repère par repère (INACCESSIBLE si le sommet n'est pas atteint).
+#
+#   python -m src.reperes construire [dossier] [--reperes 16]
+#   python -m src.reperes mesurer [dossier] [--requetes 500]
+import os
+import sys
+import mmap
+import time
+import heapq
+import random
+import struct
+import hashlib
+import argparse
+from array import array
+
+from src.fichiers import ecriture_atomique
+from src.routage import arbre_plus_courts_chemins, dijkstra
+
+MAGIQUE = b'METROALT'
+VERSION_FORMAT = 1
+REPERES = 16
+# Repères utilisés par requête : les plus discriminants pour la paire demandée
+ACTIFS = 4
+INACCESSIBLE = -1
+INF = float('inf')
+
+# magique, version, sommets, repères, puis empreinte SHA-256, mtime (ns) et taille de metro.txt
+EN_TETE = struct.Struct('<8sIII32sqq')
+
+
+class IndexReperes:
+    def __init__(self, reperes, distances, n):
+        self.reperes = list(reperes)
+        # Une séquence d'entiers de n distances par repère (array ou vue mmap)
+        self.distances = [distances[i * n:(i + 1) * n] for i in range(len(self.reperes))]
+        self.n = n
+
+    def __len__(self):
+        return len(self.reperes)
+
+    # Les `actifs` repères qui donnent la plus forte borne entre un départ et une arrivée
+    def choisir(self, source, destination, actifs=ACTIFS):
+        def borne(distances):
+            ds, dt = distances[source], distances[destination]
+            if ds == INACCESSIBLE or dt == INACCESSIBLE:
+                return -1
+            return abs(ds - dt)
+        return sorted(self.distances, key=borne, reverse=True)[:actifs]
+
+
+# Repères les plus éloignés : chaque nouveau repère est le sommet le plus loin de tous ceux
+# déjà choisis (une recherche multi-sources par repère). Un sommet qu'aucun repère
+# n'atteint passe avant tout autre : chaque composante reçoit ainsi son repère.
+def choisir_reperes(graphe, nombre=REPERES, graine=0):
+    n = len(graphe)
+    if n == 0:
+        return []
+    distances, _ = arbre_plus_courts_chemins(graphe, [random.Random(graine).randrange(n)])
+    reperes = []
+    for _ in range(min(nombre, n)):
+        candidat = max(range(n), key=lambda v: (distances[v] == INF, distances[v] if distances[v] != INF else 0))
+        if candidat in reperes:
+            break
+        reperes.append(candidat)
+        distances, _ = arbre_plus_courts_chemins(graphe, reperes)
+    return reperes
+
+
+def calculer_reperes(graphe, nombre=REPERES):
+    n = len(graphe)
+    reperes = choisir_reperes(graphe, nombre)
+    distances = array('i')
+    for repere in reperes:
+        arbre, _ = arbre_plus_courts_chemins(graphe, [repere])
+        distances.extend(INACCESSIBLE if d == INF else d for d in arbre)
+    return IndexReperes(reperes, distances, n)
+
+
+def chemin_reperes(fichier_metro):
+    return os.path.splitext(fichier_metro)[0] + '.alt'
+
+
+def _empreinte(fichier):
+    with open(fichier, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def sauvegarder_reperes(index, fichier, fichier_metro):
+    stat = os.stat(fichier_metro)
+    with ecriture_atomique(fichier) as f:
+        f.write(EN_TETE.pack(MAGIQUE, VERSION_FORMAT, index.n, len(index), _empreinte(fichier_metro),
+                             stat.st_mtime_ns, stat.st_size))
+        f.write(array('i', index.reperes).tobytes())
+        for distances in index.distances:
+            f.write(array('i', distances).tobytes())
+
+
+# Index lu par mmap, ou None s'il est absent, d'un autre format ou si metro.txt a changé
+def lire_reperes(fichier, fichier_metro):
+    if sys.byteorder != 'little':
+        return None
+    try:
+        with open(fichier, 'rb') as f:
+            projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    vue = memoryview(projection)
+    if len(vue) < EN_TETE.size:
+        return None
+    magique, version, n, nombre, empreinte, mtime, taille = EN_TETE.unpack_from(vue)
+    if magique != MAGIQUE or version != VERSION_FORMAT or len(vue) != EN_TETE.size + 4 * nombre * (n + 1):
+        return None
+    stat = os.stat(fichier_metro)
+    # Même mtime et même taille : on fait confiance au fichier ; sinon on compare le contenu
+    if (stat.st_mtime_ns, stat.st_size) != (mtime, taille) and _empreinte(fichier_metro) != empreinte:
+        return None
+    reperes = vue[EN_TETE.size:EN_TETE.size + 4 * nombre].cast('i')
+    return IndexReperes(reperes.tolist(), vue[EN_TETE.size + 4 * nombre:].cast('i'), n)
+
+
+# Charge l'index à côté de metro.txt, ou le recalcule (et le sauvegarde au mieux) s'il
+# est absent, périmé, ou d'un autre nombre de repères
+def charger_reperes(fichier_metro, graphe, nombre=REPERES):
+    fichier = chemin_reperes(fichier_metro)
+    index = lire_reperes(fichier, fichier_metro)
+    if index is not None and index.n == len(graphe) and len(index) == min(nombre, len(graphe)):
+        return index
+
+    index = calculer_reperes(graphe, nombre)
+    try:
+        sauvegarder_reperes(index, fichier, fichier_metro)
+    except OSError as e:
+        print(f"Impossible d'écrire l'index {fichier} : {e}")
+    return index
+
+
+# A* guidé par les repères, d'un ensemble de sommets de départ vers un ensemble d'arrivée
+# (les sommets d'une station). La borne d'un sommet est le minimum, sur les arrivées, du
+# maximum sur les repères actifs de |d(L, t) - d(L, v)|, calculée une fois par sommet.
+# Renvoie (temps, chemin, sommets explorés) ; (inf, None, explorés) sans chemin.
+def plus_court_chemin_alt(index, graphe, sources, destinations, actifs=ACTIFS):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    arrivees = set(destinations)
+    tables = index.choisir(sources[0], destinations[0], actifs)
+    # Par arrivée : (table, d(L, t)) des repères qui l'atteignent
+    cibles_reperes = [[(table, table[t]) for table in tables if table[t] != INACCESSIBLE] for t in destinations]
+
+    bornes = {}
+
+    def borne(sommet):
+        meilleure = INF
+        for reperes_t in cibles_reperes:
+            b = 0
+            for table, dt in reperes_t:
+                dv = table[sommet]
+                if dv == INACCESSIBLE:
+                    # Le repère atteint l'arrivée mais pas ce sommet : composantes différentes
+                    b = INF
+                    break
+                ecart = dv - dt if dv > dt else dt - dv
+                if ecart > b:
+                    b = ecart
+            if b < meilleure:
+                meilleure = b
+        bornes[sommet] = meilleure
+        return meilleure
+
+    distances = {}
+    pred = {}
+    tas = []
+    for source in sources:
+        distances[source] = 0
+        pred[source] = None
+        h = borne(source)
+        if h != INF:
+            tas.append((h, 0, source))
+    heapq.heapify(tas)
+    fixes = set()
+
+    while tas:
+        _, distance, sommet = heapq.heappop(tas)
+        if sommet in fixes:
+            continue
+        fixes.add(sommet)
+        if sommet in arrivees:
+            chemin = [sommet]
+            while pred[chemin[-1]] is not None:
+                chemin.append(pred[chemin[-1]])
+            chemin.reverse()
+            return distance, chemin, len(fixes)
+
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < distances.get(voisin, INF):
+                h = bornes[voisin] if voisin in bornes else borne(voisin)
+                if h == INF:
+                    continue
+                distances[voisin] = nouvelle_distance
+                pred[voisin] = sommet
+                heapq.heappush(tas, (nouvelle_distance + h, nouvelle_distance, voisin))
+
+    return INF, None, len(fixes)
+
+
+# Compare l'A* à Dijkstra (arrêté à l'arrivée) sur des paires aléatoires : sommets fixés
+# par requête et durée, les deux devant donner le même temps
+def mesurer(graphe, index, requetes=500, graine=1):
+    aleatoire = random.Random(graine)
+    n = len(graphe)
+    paires = [(aleatoire.randrange(n), aleatoire.randrange(n)) for _ in range(requetes)]
+    resultats = {}
+    for nom in ('dijkstra', 'alt'):
+        explores, duree = 0, 0.0
+        for depart, arrivee in paires:
+            debut = time.perf_counter()
+            if nom == 'alt':
+                temps, _, fixes = plus_court_chemin_alt(index, graphe, [depart], [arrivee])
+            else:
+                distances, _ = dijkstra(graphe, depart, arrivee)
+                temps = distances[arrivee]
+                # Fixés avant l'arrivée : tous les sommets à distance inférieure ou égale
+                fixes = sum(1 for d in distances if d <= temps)
+            duree += time.perf_counter() - debut
+            explores += fixes
+            resultats.setdefault(nom + '_temps', []).append(temps)
+        resultats[nom] = {'explores_moyen': explores / requetes, 'ms_moyen': duree * 1000 / requetes}
+    resultats['identiques'] = resultats.pop('dijkstra_temps') == resultats.pop('alt_temps')
+    return resultats
+
+
+def main():
+    from src.chargement import lire_graphe, FICHIER_METRO
+    parser = argparse.ArgumentParser(description="Index de repères (ALT)")
+    parser.add_argument('commande', choices=['construire', 'mesurer'])
+    parser.add_argument('dossier', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+    parser.add_argument('--reperes', type=int, default=REPERES)
+    parser.add_argument('--requetes', type=int, default=500)
+    args = parser.parse_args()
+
+    fichier_metro = os.path.join(args.dossier, FICHIER_METRO)
+    graphe = lire_graphe(fichier_metro)
+    debut = time.perf_counter()
+    if args.commande == 'construire':
+        index = calculer_reperes(graphe, args.reperes)
+        sauvegarder_reperes(index, chemin_reperes(fichier_metro), fichier_metro)
+    else:
+        index = charger_reperes(fichier_metro, graphe, args.reperes)
+    print(f"{len(index)} repères sur {len(graphe)} sommets en {(time.perf_counter() - debut) * 1000:.1f} ms "
+          f"({chemin_reperes(fichier_metro)})")
+
+    if args.commande == 'mesurer':
+        resultats = mesurer(graphe, index, args.requetes)
+        for nom in ('dijkstra', 'alt'):
+            print(f"{nom:9}: {resultats[nom]['explores_moyen']:9.1f} sommets fixés, "
+                  f"{resultats[nom]['ms_moyen']:.3f} ms par requête")
+        print("Temps identiques" if resultats['identiques'] else "TEMPS DIFFÉRENTS")
+        return 0 if resultats['identiques'] else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+from array import array
+
+from src.noms import IndexNoms
+
+
+# Un sommet du fichier metro.txt (une station sur une ligne donnée).
+# __slots__ : pas de dictionnaire par instance, environ 4 fois plus compact qu'un dict.
+class Station:
+    __slots__ = ('id', 'num', 'nom', 'ligne', 'terminus', 'branchements')
+
+    def __init__(self, id, num, nom, ligne, terminus, branchements):
+        self.id = id
+        self.num = num
+        self.nom = nom
+        self.ligne = ligne
+        self.terminus = terminus
+        self.branchements = branchements
+
+    def __repr__(self):
+        return f"Station({self.id}, {self.nom!r}, ligne {self.ligne})"
+
+
+# Graphe du métro en représentation CSR (compressed sparse row).
+# Les sommets sont numérotés 0..n-1 ; les voisins du sommet v sont
+# cibles[offsets[v]:offsets[v + 1]] avec les temps correspondants dans poids.
+# Chaque arête du fichier est stockée dans les deux sens, comme dans l'ancien dictionnaire.
+class MetroGraph:
+    TABLEAUX = ('offsets', 'cibles', 'poids', 'aretes_u', 'aretes_v', 'aretes_poids')
+
+    def __init__(self, stations, aretes):
+        self._indexer(stations)
+
+        n = len(stations)
+        degres = [0] * (n + 1)
+        for sommet1, sommet2, _ in aretes:
+            degres[sommet1 + 1] += 1
+            degres[sommet2 + 1] += 1
+        for i in range(n):
+            degres[i + 1] += degres[i]
+
+        self.offsets = array('i', degres)
+        self.cibles = array('i', bytes(4 * degres[n]))
+        self.poids = array('i', bytes(4 * degres[n]))
+        position = degres[:n]
+        for sommet1, sommet2, temps in aretes:
+            for a, b in ((sommet1, sommet2), (sommet2, sommet1)):
+                k = position[a]
+                self.cibles[k] = b
+                self.poids[k] = temps
+                position[a] = k + 1
+
+        # Liste des arêtes non orientées, en trois colonnes
+        self.aretes_u = array('i', (a for a, _, _ in aretes))
+        self.aretes_v = array('i', (b for _, b, _ in aretes))
+        self.aretes_poids = array('i', (t for _, _, t in aretes))
+
+    # Construction à partir de tableaux CSR déjà prêts (ex. vues mmap d'un instantané binaire) :
+    # n'importe quelle séquence d'entiers indexable convient (array, memoryview 'i').
+    @classmethod
+    def depuis_tableaux(cls, stations, offsets, cibles, poids, aretes_u, aretes_v, aretes_poids):
+        graphe = cls.__new__(cls)
+        graphe._indexer(stations)
+        graphe.offsets, graphe.cibles, graphe.poids = offsets, cibles, poids
+        graphe.aretes_u, graphe.aretes_v, graphe.aretes_poids = aretes_u, aretes_v, aretes_poids
+        return graphe
+
+    # Mêmes stations et mêmes index, autres tableaux (ex. graphe masqué par des perturbations)
+    def variante(self, offsets, cibles, poids, aretes_u, aretes_v, aretes_poids):
+        graphe = self.__class__.__new__(self.__class__)
+        graphe.__dict__.update(self.__dict__)
+        graphe.offsets, graphe.cibles, graphe.poids = offsets, cibles, poids
+        graphe.aretes_u, graphe.aretes_v, graphe.aretes_poids = aretes_u, aretes_v, aretes_poids
+        return graphe
+
+    def _indexer(self, stations):
+        self.stations = stations
+        # Numéro du fichier (0016 -> 16) vers identifiant dense
+        self.index_num = {station.num: station.id for station in stations}
+        # Nom (sans casse ni accents) vers tous les sommets qui le portent
+        self.noms = IndexNoms(stations)
+
+    # Les vues mmap ne se sérialisent pas : on les copie en array pour pickle (pool de processus)
+    def __getstate__(self):
+        etat = dict(self.__dict__)
+        for nom in self.TABLEAUX:
+            if not isinstance(etat[nom], array):
+                etat[nom] = array('i', etat[nom])
+        return etat
+
+    def __len__(self):
+        return len(self.stations)
+
+    def voisins(self, sommet):
+        debut, fin = self.offsets[sommet], self.offsets[sommet + 1]
+        return zip(self.cibles[debut:fin], self.poids[debut:fin])
+
+    def aretes(self):
+        return zip(self.aretes_u, self.aretes_v, self.aretes_poids)
+
+    def nom(self, sommet):
+        return self.stations[sommet].nom
+
+    def ids_par_nom(self, nom):
+        return self.noms.ids(nom)
+
+    def temps(self, sommet1, sommet2):
+        return min((t for v, t in self.voisins(sommet1) if v == sommet2), default=None)
@@ -0,0 +1,291 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+from src.execution import CONTEXTE_PROCESSUS, processus_utiles
+
+# Durée approximative d'un arbre des plus courts chemins complet, par sommet du graphe
+# (secondes) : estimation du calcul d'un lot, une recherche par station de départ
+DUREE_PAR_SOMMET = 2.5e-6
+
+
+# Algorithme de Dijkstra avec un tas binaire, sur un MetroGraph (sommets 0..n-1).
+# Les poids (temps de trajet en secondes) sont positifs, donc un sommet sorti du tas
+# a sa distance définitive : si `end` est fourni, on s'arrête dès qu'il est atteint.
+# Renvoie (distances, pred) comme bellman_ford, pour rester compatible avec reconstruire_chemin.
+def dijkstra(graphe, start, end=None):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    n = len(graphe)
+    distances = [float('inf')] * n
+    pred = [None] * n
+    distances[start] = 0
+
+    tas = [(0, start)]
+    visites = bytearray(n)
+
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if visites[sommet]:
+            continue
+        visites[sommet] = 1
+
+        if sommet == end:
+            break
+
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < distances[voisin]:
+                distances[voisin] = nouvelle_distance
+                pred[voisin] = sommet
+                heapq.heappush(tas, (nouvelle_distance, voisin))
+
+    return distances, pred
+
+
+# Dijkstra bidirectionnel : une recherche depuis le départ, une depuis l'arrivée.
+# Le graphe du métro est non orienté (chaque arête est stockée dans les deux sens),
+# la recherche arrière utilise donc les mêmes listes d'adjacence.
+# On s'arrête quand la somme des deux sommets de tas dépasse le meilleur chemin connu.
+def dijkstra_bidirectionnel(graphe, start, end):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    n = len(graphe)
+    distances = [float('inf')] * n
+    pred = [None] * n
+    distances[start] = 0
+    if start == end:
+        return distances, pred
+
+    dist_avant = {start: 0}
+    dist_arriere = {end: 0}
+    pred_avant = {start: None}
+    pred_arriere = {end: None}
+    tas_avant = [(0, start)]
+    tas_arriere = [(0, end)]
+    visites_avant = bytearray(n)
+    visites_arriere = bytearray(n)
+
+    meilleur = float('inf')
+    rencontre = None
+
+    while tas_avant and tas_arriere:
+        if tas_avant[0][0] + tas_arriere[0][0] >= meilleur:
+            break
+
+        # On avance du côté dont le tas est le plus petit
+        if len(tas_avant) <= len(tas_arriere):
+            tas, dist, pred_cote, visites = tas_avant, dist_avant, pred_avant, visites_avant
+            dist_autre = dist_arriere
+        else:
+            tas, dist, pred_cote, visites = tas_arriere, dist_arriere, pred_arriere, visites_arriere
+            dist_autre = dist_avant
+
+        distance, sommet = heapq.heappop(tas)
+        if visites[sommet]:
+            continue
+        visites[sommet] = 1
+
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < dist.get(voisin, float('inf')):
+                dist[voisin] = nouvelle_distance
+                pred_cote[voisin] = sommet
+                heapq.heappush(tas, (nouvelle_distance, voisin))
+            if voisin in dist_autre:
+                total = dist[voisin] + dist_autre[voisin]
+                if total < meilleur:
+                    meilleur = total
+                    rencontre = voisin
+
+    if rencontre is None:
+        return distances, pred
+
+    # Côté départ : on recopie les étiquettes de la recherche avant
+    for sommet, distance in dist_avant.items():
+        distances[sommet] = distance
+        pred[sommet] = pred_avant[sommet]
+
+    # Côté arrivée : on retourne les prédécesseurs de la recherche arrière
+    # pour que reconstruire_chemin(pred, start, end) parcoure tout le chemin.
+    sommet = rencontre
+    while sommet != end:
+        suivant = pred_arriere[sommet]
+        pred[suivant] = sommet
+        distances[suivant] = meilleur - dist_arriere[suivant]
+        sommet = suivant
+    distances[rencontre] = meilleur - dist_arriere[rencontre]
+
+    return distances, pred
+
+
+# Arbre des plus courts chemins depuis un ou plusieurs sommets de départ (ex. les
+# sommets d'une même station sur plusieurs lignes, tous à distance 0).
+# Avec `limite` (en secondes), on s'arrête dès que le tas dépasse ce temps :
+# les sommets au-delà gardent une distance infinie.
+def arbre_plus_courts_chemins(graphe, sources, limite=None):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    n = len(graphe)
+    distances = [float('inf')] * n
+    pred = [None] * n
+    tas = []
+    for source in sources:
+        distances[source] = 0
+        tas.append((0, source))
+    visites = bytearray(n)
+
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if visites[sommet]:
+            continue
+        if limite is not None and distance > limite:
+            break
+        visites[sommet] = 1
+
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < distances[voisin]:
+                distances[voisin] = nouvelle_distance
+                pred[voisin] = sommet
+                heapq.heappush(tas, (nouvelle_distance, voisin))
+
+    # Sommets restés dans le tas au-delà de la limite : distance non définitive
+    if limite is not None:
+        for sommet in range(n):
+            if not visites[sommet]:
+                distances[sommet] = float('inf')
+                pred[sommet] = None
+
+    return distances, pred
+
+
+# Dijkstra avec un temps propre à chaque sommet de départ (ex. la marche jusqu'à la
+# station) et à chaque sommet d'arrivée (la marche depuis la station) : `departs` et
+# `arrivees` associent un sommet à ce temps. On s'arrête dès que le tas atteint le meilleur
+# total connu, les temps de marche étant positifs.
+# Renvoie (temps total, chemin) ; (inf, None) sans chemin.
+def plus_court_chemin_acces(graphe, departs, arrivees):
+    offsets, cibles, poids = graphe.offsets, graphe.cibles, graphe.poids
+    distances = {}
+    pred = {}
+    tas = []
+    for sommet, temps in departs.items():
+        if temps < distances.get(sommet, float('inf')):
+            distances[sommet] = temps
+            pred[sommet] = None
+            tas.append((temps, sommet))
+    heapq.heapify(tas)
+    visites = set()
+
+    meilleur = float('inf')
+    fin = None
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if distance >= meilleur:
+            break
+        if sommet in visites:
+            continue
+        visites.add(sommet)
+        if sommet in arrivees and distance + arrivees[sommet] < meilleur:
+            meilleur = distance + arrivees[sommet]
+            fin = sommet
+
+        for k in range(offsets[sommet], offsets[sommet + 1]):
+            voisin = cibles[k]
+            nouvelle_distance = distance + poids[k]
+            if nouvelle_distance < distances.get(voisin, float('inf')):
+                distances[voisin] = nouvelle_distance
+                pred[voisin] = sommet
+                heapq.heappush(tas, (nouvelle_distance, voisin))
+
+    if fin is None:
+        return float('inf'), None
+    return meilleur, remonter_chemin(pred, fin)
+
+
+# Chemin depuis la racine de l'arbre (le sommet sans prédécesseur) jusqu'à `sommet`
+def remonter_chemin(pred, sommet):
+    chemin = [sommet]
+    while pred[sommet] is not None:
+        sommet = pred[sommet]
+        chemin.append(sommet)
+    chemin.reverse()
+    return chemin
+
+
+# Calcul par lots : une liste de paires (départ, arrivée) données par leurs noms.
+# Les paires sont regroupées par station de départ pour ne faire qu'une recherche par
+# origine ; les groupes ne sont répartis sur un pool de processus que si ces recherches
+# durent assez longtemps pour amortir son démarrage (processus_utiles) : jamais sur le
+# métro, dont toutes les origines se calculent en une fraction de seconde.
+# Les résultats sont rendus dans l'ordre des paires, avec une erreur par paire plutôt
+# qu'un échec du lot entier.
+def chemins_par_lot(graphe, paires, avec_chemins=True, processus=None):
+    resultats = [None] * len(paires)
+    groupes = {}
+    for index, (start_name, end_name) in enumerate(paires):
+        sources = graphe.ids_par_nom(start_name)
+        destinations = graphe.ids_par_nom(end_name)
+        if not sources or not destinations:
+            resultats[index] = {'start': start_name, 'end': end_name,
+                                'error': "Une ou les deux stations ne sont pas dans le réseau."}
+            continue
+        groupes.setdefault(tuple(sources), []).append((index, destinations))
+
+    groupes = list(groupes.items())
+    processus = processus_utiles(len(groupes), len(graphe) * DUREE_PAR_SOMMET, processus)
+    if processus > 1:
+        # Environ quatre paquets par processus pour équilibrer la charge
+        taille = max(1, len(groupes) // (processus * 4))
+        paquets = [groupes[i:i + taille] for i in range(0, len(groupes), taille)]
+        with ProcessPoolExecutor(max_workers=processus, mp_context=CONTEXTE_PROCESSUS,
+                                 initializer=_initialiser_lot, initargs=(graphe,)) as pool:
+            for calcules in pool.map(_traiter_paquet, paquets, [avec_chemins] * len(paquets)):
+                for index, resultat in calcules:
+                    resultats[index] = resultat
+    else:
+        for groupe in groupes:
+            for index, resultat in _traiter_groupe(graphe, groupe, avec_chemins):
+                resultats[index] = resultat
+
+    for index, (start_name, end_name) in enumerate(paires):
+        resultats[index].setdefault('start', start_name)
+        resultats[index].setdefault('end', end_name)
+    return resultats
+
+
+# Graphe de chaque processus du pool, transmis une seule fois à son démarrage
+_graphe_lot = None
+
+
+def _initialiser_lot(graphe):
+    global _graphe_lot
+    _graphe_lot = graphe
+
+
+def _traiter_paquet(groupes, avec_chemins):
+    calcules = []
+    for groupe in groupes:
+        calcules.extend(_traiter_groupe(_graphe_lot, groupe, avec_chemins))
+    return calcules
+
+
+def _traiter_groupe(graphe, groupe, avec_chemins):
+    sources, demandes = groupe
+    distances, pred = arbre_plus_courts_chemins(graphe, sources)
+    calcules = []
+    for index, destinations in demandes:
+        arrivee = min(destinations, key=distances.__getitem__)
+        if distances[arrivee] == float('inf'):
+            calcules.append((index, {'error': "Il n'y a pas de chemin entre ces deux stations."}))
+            continue
+        resultat = {'time': distances[arrivee]}
+        if avec_chemins:
+            # Une correspondance relie deux sommets du même nom : on ne le répète pas
+            noms = []
+            for sommet in remonter_chemin(pred, arrivee):
+                if not noms or noms[-1] != graphe.nom(sommet):
+                    noms.append(graphe.nom(sommet))
+            resultat['stations'] = noms
+        calcules.append((index, resultat))
+    return calcules
@@ -0,0 +1,114 @@
+import os
+import hashlib
+
+import numpy as np
+
+from src.fichiers import ecriture_atomique
+
+# Distance "infinie" : assez petite pour que INF + INF tienne dans un int32
+INF = np.iinfo(np.int32).max // 2
+VERSION_FORMAT = 2
+
+
+# Table des plus courts chemins pour toutes les paires de sommets d'un MetroGraph.
+# `distances[i, j]` est le temps de i à j et `suivant[i, j]` le sommet à emprunter
+# juste après i pour aller vers j. `nums` garde les numéros du fichier pour vérifier
+# qu'un cache correspond bien au graphe chargé.
+class TableChemins:
+    def __init__(self, nums, distances, suivant):
+        self.nums = list(nums)
+        self.distances = distances
+        self.suivant = suivant
+
+    def distance(self, start, end):
+        d = int(self.distances[start, end])
+        return float('inf') if d >= INF else d
+
+    # Parcours des prochains sauts : O(longueur du chemin), sans recherche dans le graphe
+    def chemin(self, start, end):
+        if self.distances[start, end] >= INF:
+            return None
+        suivant = self.suivant
+        chemin = [start]
+        sommet = start
+        while sommet != end:
+            sommet = int(suivant[sommet, end])
+            chemin.append(sommet)
+        return chemin
+
+
+# Floyd-Warshall vectorisé : une passe NumPy sur toute la matrice par sommet intermédiaire
+def calculer_table(graphe):
+    n = len(graphe)
+
+    distances = np.full((n, n), INF, dtype=np.int32)
+    suivant = np.full((n, n), -1, dtype=np.int16 if n < np.iinfo(np.int16).max else np.int32)
+    for i, j, temps in graphe.aretes():
+        if temps < distances[i, j]:
+            distances[i, j] = distances[j, i] = temps
+            suivant[i, j] = j
+            suivant[j, i] = i
+    np.fill_diagonal(distances, 0)
+    np.fill_diagonal(suivant, np.arange(n))
+
+    for k in range(n):
+        via = distances[:, k, None] + distances[None, k, :]
+        ameliore = via < distances
+        distances[ameliore] = via[ameliore]
+        suivant[ameliore] = np.broadcast_to(suivant[:, k, None], (n, n))[ameliore]
+
+    return TableChemins([station.num for station in graphe.stations], distances, suivant)
+
+
+def empreinte_fichier(fichier):
+    with open(fichier, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def chemin_cache(fichier):
+    return os.path.splitext(fichier)[0] + '.npz'
+
+
+# Remplacement atomique : un autre processus ne lit jamais un fichier à moitié écrit
+def sauvegarder_table(table, fichier_cache, mtime, empreinte):
+    with ecriture_atomique(fichier_cache) as f:
+        np.savez(f, nums=np.array(table.nums, dtype=np.int32), distances=table.distances, suivant=table.suivant,
+                 version=VERSION_FORMAT, mtime=mtime, empreinte=empreinte)
+
+
+def lire_table(fichier_cache, mtime, empreinte_source):
+    try:
+        with np.load(fichier_cache) as donnees:
+            if int(donnees['version']) != VERSION_FORMAT:
+                return None
+            # Même mtime : on fait confiance au cache ; sinon on compare le contenu
+            if int(donnees['mtime']) != mtime and str(donnees['empreinte']) != empreinte_source():
+                return None
+            return TableChemins(donnees['nums'].tolist(), donnees['distances'], donnees['suivant'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# Charge la table depuis le .npz à côté de metro.txt, ou la recalcule (et la sauvegarde)
+# si le cache est absent, d'un autre format, ou si metro.txt a changé.
+def charger_table(fichier, graphe):
+    fichier_cache = chemin_cache(fichier)
+    mtime = os.stat(fichier).st_mtime_ns
+    empreinte = None
+
+    def empreinte_source():
+        nonlocal empreinte
+        if empreinte is None:
+            empreinte = empreinte_fichier(fichier)
+        return empreinte
+
+    table = lire_table(fichier_cache, mtime, empreinte_source)
+    if table is not None and table.nums == [station.num for station in graphe.stations]:
+        return table
+
+    table = calculer_table(graphe)
+    try:
+        sauvegarder_table(table, fichier_cache, mtime, empreinte_source())
+    except OSError as e:
+        print(f"Impossible d'écrire le cache {fichier_cache} : {e}")
+    return table
@@ -9,7 +9,7 @@ async function fetchStations(inputId) {
     }
 
     try {
-        const response = await fetch(`/search_stations?q=${query}`);
+        const response = await fetch(`/search_stations?q=${encodeURIComponent(query)}&limit=10`);
         const stations = await response.json();
 
         suggestionsDiv.innerHTML = "";
@@ -41,6 +41,9 @@ document.getElementById('end').addEventListener('input', () => fetchStations('en
 async function findShortestPath() {
     const start = document.getElementById('start').value.trim();
     const end = document.getElementById('end').value.trim();
+    const mode = document.getElementById('mode').value;
+    // Heure de départ facultative : itinéraire selon les horaires, attentes comprises
+    const depart = document.getElementById('depart').value;
 
     if (!start || !end) {
         alert("Veuillez remplir les champs de départ et d'arrivée.");
@@ -51,7 +54,7 @@ async function findShortestPath() {
         const response = await fetch('/chemin', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ start, end })
+            body: JSON.stringify(depart ? { start, end, mode, depart } : { start, end, mode })
         });
         const data = await response.json();
 
@@ -64,10 +67,13 @@ async function findShortestPath() {
                 <h3>Itinéraire :</h3>
                 <ul>${itineraireHTML}</ul>
                 <p><strong>Temps estimé :</strong> ${data.time}</p>
+                ${data.transfers !== undefined ? `<p><strong>Correspondances :</strong> ${data.transfers}</p>` : ''}
+                ${data.arrivee ? `<p><strong>Arrivée :</strong> ${data.arrivee}</p>` : ''}
+                ${data.avertissement ? `<p>${data.avertissement}</p>` : ''}
             `;
 
             // Dessiner le chemin sur la carte
-            drawPath(data.x_coords, data.y_coords);
+            drawPath(...decodePolyline(data.polyline));
         }
     } catch (error) {
         console.error("Erreur lors du calcul du chemin :", error);
@@ -83,7 +89,7 @@ async function checkConnectivity() {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = `
             <h3>Connexité :</h3>
-            <p>Le graphe est ${data.connexe ? "" : "non "}connexe.</p>
+            <p>Le graphe est ${data.connexe ? "" : "non "}connexe${data.connexe ? "" : ` (${data.composantes} composantes)`}.</p>
         `;
     } catch (error) {
         console.error("Erreur lors de la vérification de la connexité :", error);
@@ -108,19 +114,65 @@ async function calculateACPM() {
     }
 }
 
-// Fonction pour dessiner un chemin sur la carte avec Plotly
-function drawPath(x_coords, y_coords) {
+// Carte des stations : la figure de base est chargée une fois (revalidée par ETag)
+async function loadMap() {
+    const response = await fetch('/plot');
+    const figure = await response.json();
+    await Plotly.newPlot('carte-stations', figure.data, figure.layout, { responsive: true });
+}
+
+const mapLoaded = loadMap().catch(error => console.error("Erreur lors du chargement de la carte :", error));
+
+// Décodage du tracé renvoyé par /chemin (polyligne encodée, sans facteur d'échelle) :
+// écarts successifs en zigzag, par paquets de 5 bits
+function decodePolyline(encoded) {
+    const values = [];
+    let value = 0, shift = 0;
+    for (let i = 0; i < encoded.length; i++) {
+        const byte = encoded.charCodeAt(i) - 63;
+        value |= (byte & 0x1f) << shift;
+        shift += 5;
+        if (byte < 0x20) {
+            values.push(value & 1 ? ~(value >> 1) : value >> 1);
+            value = 0;
+            shift = 0;
+        }
+    }
+    const x_coords = [], y_coords = [];
+    let x = 0, y = 0;
+    for (let i = 0; i + 1 < values.length; i += 2) {
+        x += values[i];
+        y += values[i + 1];
+        x_coords.push(x);
+        y_coords.push(y);
+    }
+    return [x_coords, y_coords];
+}
+
+// Indice de la trace du chemin affiché (null si aucun)
+let pathTrace = null;
+
+// Fonction pour dessiner un chemin sur la carte avec Plotly : seule la trace du
+// chemin est ajoutée (ou remplacée), la figure de base n'est pas redessinée
+async function drawPath(x_coords, y_coords) {
+    await mapLoaded;
     const plotDiv = document.getElementById('carte-stations');
 
-    Plotly.addTraces(plotDiv, {
+    if (pathTrace !== null) {
+        await Plotly.deleteTraces(plotDiv, pathTrace);
+    }
+    await Plotly.addTraces(plotDiv, {
         x: x_coords,
         y: y_coords,
         mode: 'lines',
         line: {
             color: 'cyan',
             width: 2
-        }
+        },
+        hoverinfo: 'skip',
+        showlegend: false
     });
+    pathTrace = plotDiv.data.length - 1;
 }
 
 // Ajout des événements aux boutons
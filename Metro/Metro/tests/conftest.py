@@ -0,0 +1,48 @@
+# Données partagées par les tests : le réseau de data/metro.txt et les distances de
+# référence, calculées une fois par session avec bellman_ford (l'implémentation d'origine
+# de /chemin), contre lesquelles les chemins optimisés sont comparés.
+import os
+import random
+
+import pytest
+
+from src.chargement import lire_graphe
+from src.graph import bellman_ford
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_DONNEES = os.path.join(RACINE, 'data')
+FICHIER_METRO = os.path.join(DOSSIER_DONNEES, 'metro.txt')
+
+
+@pytest.fixture(scope='session')
+def graphe():
+    return lire_graphe(FICHIER_METRO)
+
+
+# distances[s][t] : temps de s à t selon bellman_ford, pour chaque sommet s
+@pytest.fixture(scope='session')
+def distances(graphe):
+    return [bellman_ford(graphe, sommet)[0] for sommet in range(len(graphe))]
+
+
+# Paires de sommets tirées au hasard, toujours les mêmes
+@pytest.fixture(scope='session')
+def paires(graphe):
+    aleatoire = random.Random(1)
+    return [(aleatoire.randrange(len(graphe)), aleatoire.randrange(len(graphe))) for _ in range(300)]
+
+
+# Noms de stations, triés
+@pytest.fixture(scope='session')
+def noms(graphe):
+    return sorted({graphe.nom(sommet) for sommet in range(len(graphe))})
+
+
+# Client de test de l'application (réseau de data/, chargé à l'import de app.py). Les
+# perturbations ajoutées par un test sont retirées à la fin.
+@pytest.fixture
+def client():
+    import app
+    client = app.app.test_client()
+    yield client
+    client.delete('/perturbations')
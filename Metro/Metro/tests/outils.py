@@ -0,0 +1,37 @@
+# Fonctions communes aux tests
+import heapq
+
+INF = float('inf')
+
+
+# Temps le plus court d'un ensemble de sommets à un autre, lu dans les distances de référence
+def distance_entre(distances, sources, destinations):
+    return min((distances[s][d] for s in sources for d in destinations), default=INF)
+
+
+# Temps d'un chemin (suite de sommets voisins) ; None si deux sommets consécutifs ne sont pas reliés
+def temps_chemin(graphe, chemin):
+    total = 0
+    for a, b in zip(chemin, chemin[1:]):
+        temps = graphe.temps(a, b)
+        if temps is None:
+            return None
+        total += temps
+    return total
+
+
+# Distances depuis une source par un Dijkstra à tas minimal, écrit indépendamment de
+# src/routage.py pour servir de référence rapide (bellman_ford l'est trop peu)
+def distances_depuis(graphe, source):
+    distances = [INF] * len(graphe)
+    distances[source] = 0
+    tas = [(0, source)]
+    while tas:
+        distance, sommet = heapq.heappop(tas)
+        if distance > distances[sommet]:
+            continue
+        for voisin, poids in graphe.voisins(sommet):
+            if distance + poids < distances[voisin]:
+                distances[voisin] = distance + poids
+                heapq.heappush(tas, (distance + poids, voisin))
+    return distances
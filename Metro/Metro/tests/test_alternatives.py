@@ -0,0 +1,20 @@
+# Itinéraires alternatifs (src/alternatives.py) : le premier est le plus court chemin de
+# référence, les suivants sont des chemins réels dans la limite de détour
+import random
+
+from src.alternatives import alternatives, DETOUR
+from tests.outils import distance_entre, temps_chemin
+
+
+def test_alternatives(graphe, distances, noms):
+    aleatoire = random.Random(5)
+    for _ in range(100):
+        sources = graphe.ids_par_nom(aleatoire.choice(noms))
+        destinations = graphe.ids_par_nom(aleatoire.choice(noms))
+        plus_court = distance_entre(distances, sources, destinations)
+        trouvees = alternatives(graphe, sources, destinations)
+        assert trouvees[0][0] == plus_court
+        assert [temps for temps, _ in trouvees] == sorted(temps for temps, _ in trouvees)
+        for temps, chemin in trouvees:
+            assert chemin[0] in sources and chemin[-1] in destinations
+            assert temps_chemin(graphe, chemin) == temps <= plus_court * DETOUR
@@ -0,0 +1,132 @@
+# Points d'entrée HTTP : réponses comparées aux distances de référence, et paramètres
+# invalides refusés en 400 avec un message, sans calcul
+import pytest
+
+from tests.outils import INF, distance_entre
+
+
+@pytest.mark.parametrize('max_minutes', [None, 0, 12.5])
+def test_distances(client, graphe, distances, noms, max_minutes):
+    for nom in noms[::25]:
+        parametres = {'from': nom} if max_minutes is None else {'from': nom, 'max_minutes': max_minutes}
+        reponse = client.get('/distances', query_string=parametres).get_json()
+        limite = INF if max_minutes is None else max_minutes * 60
+        sources = graphe.ids_par_nom(nom)
+        attendues = {autre: distance_entre(distances, sources, graphe.ids_par_nom(autre)) for autre in noms}
+        assert {station['name']: station['time'] for station in reponse['stations']} == \
+            {autre: temps for autre, temps in attendues.items() if temps <= limite}
+
+
+@pytest.mark.parametrize('max_minutes', ['abc', 'nan', 'inf', '-1'])
+def test_distances_invalide(client, max_minutes):
+    reponse = client.get('/distances', query_string={'from': 'Bastille', 'max_minutes': max_minutes})
+    assert reponse.status_code == 400
+    assert 'error' in reponse.get_json()
+
+
+# Une paire mal formée reçoit son erreur, les autres sont calculées
+def test_lot(client, graphe, distances):
+    paires = [['Bastille', 'Nation'], [1], {'start': 'Nation', 'end': 'Bastille'}, 'Bastille', ['Inconnue', 'Nation']]
+    reponse = client.post('/chemin/batch', json={'pairs': paires, 'paths': False})
+    assert reponse.status_code == 200
+    resultats = reponse.get_json()['results']
+    assert len(resultats) == len(paires)
+    attendu = distance_entre(distances, graphe.ids_par_nom('Bastille'), graphe.ids_par_nom('Nation'))
+    assert resultats[0] == {'start': 'Bastille', 'end': 'Nation', 'time': attendu}
+    assert resultats[2] == {'start': 'Nation', 'end': 'Bastille', 'time': attendu}
+    assert 'error' in resultats[1] and 'error' in resultats[3] and 'error' in resultats[4]
+
+
+@pytest.mark.parametrize('corps', [{'pairs': None}, {}, {'pairs': 'Bastille'}, [['Bastille', 'Nation']]])
+def test_lot_invalide(client, corps):
+    reponse = client.post('/chemin/batch', json=corps)
+    assert reponse.status_code == 400
+    assert 'error' in reponse.get_json()
+
+
+@pytest.mark.parametrize('penalite', [-1, 'nan', 'inf', True, 'dix', None])
+def test_chemin_penalite_invalide(client, penalite):
+    reponse = client.post('/chemin', json={'start': 'Bastille', 'end': 'Nation', 'mode': 'correspondances',
+                                           'penalite': penalite})
+    assert reponse.status_code == 400
+    assert 'error' in reponse.get_json()
+
+
+@pytest.mark.parametrize('penalite', [0, 120, '120', 90.5])
+def test_chemin_penalite(client, penalite):
+    reponse = client.post('/chemin', json={'start': 'Bastille', 'end': 'Nation', 'mode': 'correspondances',
+                                           'penalite': penalite})
+    assert reponse.status_code == 200
+    assert 'error' not in reponse.get_json()
+
+
+@pytest.mark.parametrize('depart', ['25:00', '12:60', 'midi', 830])
+def test_chemin_depart_invalide(client, depart):
+    reponse = client.post('/chemin', json={'start': 'Bastille', 'end': 'Nation', 'depart': depart})
+    assert reponse.status_code == 400
+    assert 'error' in reponse.get_json()
+
+
+@pytest.mark.parametrize('depart', ['00:00', '08:30', '23:59:59', ''])
+def test_chemin_depart(client, depart):
+    reponse = client.post('/chemin', json={'start': 'Bastille', 'end': 'Nation', 'depart': depart})
+    assert reponse.status_code == 200
+    assert 'error' not in reponse.get_json()
+
+
+@pytest.mark.parametrize('champs', [
+    {'k': 0}, {'k': 1.5}, {'k': True}, {'k': 'trois'}, {'detour': 'nan'}, {'detour': 'inf'}, {'detour': 0.9},
+    {'detour': None}, {'partage_max': 'nan'}, {'partage_max': 1.5}, {'partage_max': -0.1},
+])
+def test_alternatives_invalide(client, champs):
+    reponse = client.post('/chemin/alternatives', json={'start': 'Bastille', 'end': 'Nation', **champs})
+    assert reponse.status_code == 400
+    assert 'error' in reponse.get_json()
+
+
+def test_alternatives_parametres(client):
+    for champs, nombre_max in (({}, 3), ({'k': 1}, 1), ({'k': '2', 'detour': '1.5'}, 2), ({'k': 100}, 10)):
+        reponse = client.post('/chemin/alternatives', json={'start': 'Bastille', 'end': 'Nation', **champs})
+        assert reponse.status_code == 200
+        assert 1 <= len(reponse.get_json()['routes']) <= nombre_max
+
+
+@pytest.mark.parametrize('k', ['0', '-3', 'deux', '1.5'])
+def test_nearest_k_invalide(client, k):
+    assert client.get('/nearest', query_string={'x': 100, 'y': -100, 'k': k}).status_code == 400
+
+
+@pytest.mark.parametrize('k', [0, 1.5, True, 'deux'])
+def test_nearest_lot_k_invalide(client, k):
+    assert client.post('/nearest', json={'points': [{'x': 100, 'y': -100}], 'k': k}).status_code == 400
+
+
+def test_nearest_k_plafonne(client):
+    reponse = client.get('/nearest', query_string={'x': 100, 'y': -100, 'k': 1000})
+    assert reponse.status_code == 200
+    assert reponse.get_json() == client.get('/nearest', query_string={'x': 100, 'y': -100, 'k': 50}).get_json()
+
+
+@pytest.mark.parametrize('position', [
+    {'lat': 'inf', 'lon': 2}, {'lat': 48.85, 'lon': 'nan'}, {'lat': 91, 'lon': 2}, {'lat': 48.85},
+    {'x': 'inf', 'y': 0}, {'x': 0, 'y': '-inf'}, {'x': 'gauche', 'y': 0},
+])
+def test_position_invalide(client, position):
+    assert client.get('/nearest', query_string=position).status_code == 400
+    reponse = client.post('/nearest', json={'points': [position, {'x': 907, 'y': -682}]})
+    assert reponse.status_code == 200
+    erreur, valide = reponse.get_json()['results']
+    assert 'error' in erreur and valide['stations']
+    for champs in ({'start': position, 'end': 'Nation'}, {'start': 'Bastille', 'end': position}):
+        reponse = client.post('/chemin', json=champs)
+        assert reponse.status_code == 400
+        assert 'error' in reponse.get_json()
+
+
+def test_position_eloignee(client):
+    reponse = client.get('/nearest', query_string={'x': 1e300, 'y': 0, 'k': 3})
+    assert reponse.status_code == 200
+    assert len(reponse.get_json()['stations']) == 3
+    reponse = client.post('/chemin', json={'start': {'lat': 48.8530, 'lon': 2.3691}, 'end': 'Nation'})
+    assert reponse.status_code == 200
+    assert 'error' not in reponse.get_json()
@@ -0,0 +1,48 @@
+# Itinéraires avec correspondances (src/correspondances.py) : front de Pareto (temps,
+# correspondances) comparé à une recherche directe sur les couples (sommet, correspondances)
+import heapq
+import random
+
+from src.correspondances import itineraires_pareto, MAX_CORRESPONDANCES
+from tests.outils import INF, distance_entre, temps_chemin
+
+
+# Référence du front de Pareto : Dijkstra sur les couples (sommet, correspondances), une
+# correspondance par arc qui change de ligne ; meilleur temps d'arrivée pour chaque nombre
+# de correspondances, dont on garde les temps strictement meilleurs que les précédents
+def front_reference(graphe, sources, destinations):
+    meilleurs = {}
+    tas = [(0, 0, source) for source in sources]
+    vus = set()
+    while tas:
+        temps, correspondances, sommet = heapq.heappop(tas)
+        if (sommet, correspondances) in vus:
+            continue
+        vus.add((sommet, correspondances))
+        if sommet in destinations:
+            meilleurs[correspondances] = min(temps, meilleurs.get(correspondances, INF))
+            continue
+        for voisin, poids in graphe.voisins(sommet):
+            suivantes = correspondances + (graphe.stations[voisin].ligne != graphe.stations[sommet].ligne)
+            if suivantes <= MAX_CORRESPONDANCES and (voisin, suivantes) not in vus:
+                heapq.heappush(tas, (temps + poids, suivantes, voisin))
+    front, record = [], INF
+    for correspondances in sorted(meilleurs):
+        if meilleurs[correspondances] < record:
+            record = meilleurs[correspondances]
+            front.append((record, correspondances))
+    return front
+
+
+def test_pareto(graphe, distances, noms):
+    aleatoire = random.Random(4)
+    for _ in range(100):
+        sources = graphe.ids_par_nom(aleatoire.choice(noms))
+        destinations = graphe.ids_par_nom(aleatoire.choice(noms))
+        itineraires = itineraires_pareto(graphe, sources, destinations)
+        assert [(i.temps, i.correspondances) for i in itineraires] == front_reference(graphe, sources, set(destinations))
+        # Le plus rapide du front est le plus court chemin
+        assert itineraires[-1].temps == distance_entre(distances, sources, destinations)
+        for itineraire in itineraires:
+            assert itineraire.chemin[0] in sources and itineraire.chemin[-1] in destinations
+            assert temps_chemin(graphe, itineraire.chemin) == itineraire.temps
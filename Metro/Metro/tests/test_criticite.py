@@ -0,0 +1,148 @@
+# Criticité (src/criticite.py) comparée à un calcul par force brute sur un petit réseau
+# synthétique : nombres de plus courts chemins tirés des distances de référence entre
+# tous les sommets, et chaque fermeture recalculée sur un graphe sans le tronçon.
+import os
+import sys
+
+import pytest
+
+from src import execution, criticite as module_criticite
+from src.chargement import lire_graphe
+from src.criticite import criticite
+from src.reseau import MetroGraph
+from tests.conftest import RACINE
+from tests.outils import INF, distances_depuis
+
+sys.path.insert(0, os.path.join(RACINE, 'benchmarks'))
+from generer_reseau import generer  # noqa: E402
+
+
+# Réseau synthétique de 80 sommets, avec ses temps d'origine ou tous ses temps égaux (les
+# plus courts chemins ex aequo y sont alors nombreux)
+@pytest.fixture(scope='module', params=['temps', 'egaux'])
+def reseau(request, tmp_path_factory):
+    dossier = tmp_path_factory.mktemp('criticite')
+    generer(str(dossier), 80, 3)
+    graphe = lire_graphe(os.path.join(dossier, 'metro.txt'))
+    if request.param == 'egaux':
+        graphe = MetroGraph(graphe.stations, [(u, v, 60) for u, v, _ in graphe.aretes()])
+    return graphe
+
+
+def _cle(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def stations_du_graphe(graphe):
+    par_nom = {}
+    for sommet in range(len(graphe)):
+        par_nom.setdefault(graphe.nom(sommet), []).append(sommet)
+    return list(par_nom.values())
+
+
+# Distances entre stations (le plus proche des sommets de chacune) ; None pour une même station
+def distances_stations(graphe, stations):
+    distances = [distances_depuis(graphe, sommet) for sommet in range(len(graphe))]
+    return [[None if a is b else min(distances[s][t] for s in a for t in b) for b in stations] for a in stations]
+
+
+def criticite_reference(graphe):
+    n = len(graphe)
+    stations = stations_du_graphe(graphe)
+    station_de = {sommet: numero for numero, sommets in enumerate(stations) for sommet in sommets}
+    distances = [distances_depuis(graphe, sommet) for sommet in range(n)]
+    arcs = [(u, v, w) for u, v, w in graphe.aretes()] + [(v, u, w) for u, v, w in graphe.aretes()]
+
+    # nombre[a][v] : plus courts chemins de a à v, sommets pris par distance croissante
+    nombre = []
+    for a in range(n):
+        compte = [0] * n
+        compte[a] = 1
+        for v in sorted(range(n), key=lambda v: distances[a][v]):
+            if v != a and distances[a][v] != INF:
+                compte[v] = sum(compte[u] for u, x, w in arcs if x == v and distances[a][u] + w == distances[a][v])
+        nombre.append(compte)
+
+    par_sommet = [0.0] * n
+    par_arete = {}
+    for depart in stations:
+        # Depuis tous les sommets de la station de départ à la fois
+        d = [min(distances[s][v] for s in depart) for v in range(n)]
+        sigma = [sum(nombre[s][v] for s in depart if distances[s][v] == d[v]) for v in range(n)]
+        for arrivee in stations:
+            if arrivee is depart or min(d[t] for t in arrivee) == INF:
+                continue
+            ex_aequo = [t for t in arrivee if d[t] == min(d[t] for t in arrivee)]
+            for t in ex_aequo:
+                part = 1 / len(ex_aequo) / sigma[t]
+                for x in range(n):
+                    if x != t and x not in depart and d[x] + distances[x][t] == d[t]:
+                        par_sommet[x] += part * sigma[x] * nombre[t][x]
+                for u, v, w in arcs:
+                    if d[u] + w + distances[v][t] == d[t]:
+                        cle = _cle(u, v)
+                        par_arete[cle] = par_arete.get(cle, 0.0) + part * sigma[u] * nombre[t][v]
+
+    # Chaque paire vue dans les deux sens
+    par_station = [0.0] * len(stations)
+    for x, valeur in enumerate(par_sommet):
+        par_station[station_de[x]] += valeur / 2
+    for (u, v), valeur in par_arete.items():
+        if station_de[u] == station_de[v]:
+            par_station[station_de[u]] -= valeur / 2
+
+    avant = distances_stations(graphe, stations)
+    reliees = [(a, b) for a in range(len(stations)) for b in range(len(stations)) if avant[a][b] not in (None, INF)]
+    paires = len(stations) * (len(stations) - 1) / 2
+    troncons = {}
+    for u, v in {_cle(u, v) for u, v, _ in graphe.aretes()}:
+        restantes = [(a, b, w) for a, b, w in graphe.aretes() if _cle(a, b) != (u, v)]
+        apres = distances_stations(MetroGraph(graphe.stations, restantes), stations)
+        hausse = sum(apres[a][b] - avant[a][b] for a, b in reliees if apres[a][b] != INF)
+        coupees = sum(1 for a, b in reliees if apres[a][b] == INF)
+        troncons[(graphe.nom(u), graphe.nom(v), par_arete.get((u, v), 0.0) / 2)] = (hausse / 2 / paires, coupees // 2)
+
+    return {
+        'paires_reliees': len(reliees) // 2,
+        'temps_moyen': sum(avant[a][b] for a, b in reliees) / len(reliees),
+        'stations': {graphe.nom(sommets[0]): par_station[numero] for numero, sommets in enumerate(stations)},
+        'troncons': troncons,
+    }
+
+
+def test_criticite(reseau):
+    resultat = criticite(reseau, processus=1)
+    reference = criticite_reference(reseau)
+
+    assert resultat['paires_reliees'] == reference['paires_reliees']
+    assert resultat['temps_moyen'] == pytest.approx(reference['temps_moyen'], abs=0.05)
+    assert len(resultat['stations']) == len(reference['stations'])
+    for station in resultat['stations']:
+        assert station['intermediarite'] == pytest.approx(reference['stations'][station['station']], abs=1e-3)
+
+    # Tronçons rapprochés par extrémités et intermédiarité (deux lignes peuvent relier les
+    # mêmes stations)
+    attendus = sorted(reference['troncons'].items())
+    obtenus = sorted(((t['de'], t['vers'], t['intermediarite']), (t['hausse_moyenne'], t['paires_coupees']))
+                     for t in resultat['troncons'])
+    assert len(obtenus) == len(attendus)
+    for ((de, vers, inter), (hausse, coupees)), ((de_ref, vers_ref, inter_ref), (hausse_ref, coupees_ref)) \
+            in zip(obtenus, attendus):
+        assert (de, vers) == (de_ref, vers_ref)
+        assert inter == pytest.approx(inter_ref, abs=1e-3)
+        assert hausse == pytest.approx(hausse_ref, abs=1e-3)
+        assert coupees == coupees_ref
+
+
+# Les paquets de stations répartis sur le pool de processus donnent le même résultat
+def test_criticite_parallele(reseau, monkeypatch):
+    monkeypatch.setattr(execution, 'DUREE_MIN_PARALLELE', 0)
+    assert criticite(reseau, processus=2) == criticite(reseau, processus=1)
+
+
+# Sur un petit réseau, le calcul est trop court pour valoir le démarrage d'un pool
+def test_criticite_sans_pool(reseau, monkeypatch):
+    def refuser(*args, **kwargs):
+        raise AssertionError("pool de processus démarré")
+    monkeypatch.setattr(module_criticite, 'ProcessPoolExecutor', refuser)
+    assert criticite(reseau) == criticite(reseau, processus=1)
@@ -0,0 +1,21 @@
+# Grille des stations proches (src/geo.py) contre un parcours de tous les points
+import math
+import random
+
+import pytest
+
+from src.geo import Grille
+
+
+@pytest.mark.parametrize('etendue', [2000, 1e6, 1e300])
+def test_grille_proches(etendue):
+    aleatoire = random.Random(4)
+    points = [(aleatoire.uniform(0, 1000), aleatoire.uniform(0, 1000), i) for i in range(300)]
+    grille = Grille(points)
+    for _ in range(300):
+        x, y = aleatoire.uniform(-etendue, etendue), aleatoire.uniform(-etendue, etendue)
+        k, rayon = aleatoire.randint(1, 10), aleatoire.choice([None, 300.0])
+        attendus = sorted((math.hypot(px - x, py - y), valeur) for px, py, valeur in points)[:k]
+        obtenus = grille.proches(x, y, k, rayon)
+        assert [valeur for _, valeur in obtenus] == [valeur for distance, valeur in attendus
+                                                     if rayon is None or distance <= rayon]
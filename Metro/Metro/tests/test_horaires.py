@@ -0,0 +1,78 @@
+# Horaires (src/horaires.py) : heures saisies, fichier de fréquences, et flux GTFS vu à
+# travers les perturbations
+import csv
+import os
+
+import pytest
+
+from src.horaires import (lire_heure, en_secondes, lire_frequences, generer_horaires, charger_horaires,
+                          arrivee_au_plus_tot, motifs_ligne, INF)
+from src.perturbations import graphe_perturbe
+
+
+def test_lire_heure():
+    assert lire_heure('00:00') == 0
+    assert lire_heure(' 8:05 ') == 8 * 3600 + 5 * 60
+    assert lire_heure('23:59:59') == 24 * 3600 - 1
+    for texte in ('24:00', '12:60', '12:00:60', '12h00', '', '1:2'):
+        with pytest.raises(ValueError):
+            lire_heure(texte)
+
+
+# Un intervalle nul, négatif ou non fini, ou une heure illisible : la ligne est ignorée
+def test_frequences_invalides(graphe, tmp_path):
+    fichier = tmp_path / 'frequences.csv'
+    fichier.write_text('1;07:00;09:00;0\n2;07:00;09:00;-3\n3;07:00;09:00;nan\n5;07:00;09:00;inf\n'
+                       '6;7h;09:00;5\n4;07:00;08:00;10\n', encoding='utf-8')
+    frequences = lire_frequences(str(fichier))
+    assert dict(frequences) == {'4': [('07:00', '08:00', 10.0)]}
+    assert len(generer_horaires(graphe, frequences)) > 0
+
+
+# Flux GTFS d'une seule ligne : deux courses d'un terminus à l'autre, aux temps de metro.txt
+@pytest.fixture
+def gtfs(graphe, tmp_path):
+    sommets = [station.id for station in graphe.stations if station.ligne == '1']
+    motif = max(motifs_ligne(graphe, sommets), key=len)
+    dossier = tmp_path / 'gtfs'
+    dossier.mkdir()
+
+    def ecrire(nom, lignes):
+        with open(dossier / nom, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(lignes)
+
+    ecrire('stops.txt', [('stop_id', 'stop_name')] + [(sommet, graphe.nom(sommet)) for sommet in motif])
+    ecrire('routes.txt', [('route_id', 'route_short_name'), ('r1', '1')])
+    ecrire('trips.txt', [('trip_id', 'route_id'), ('t1', 'r1'), ('t2', 'r1')])
+    arrets = [('trip_id', 'stop_sequence', 'stop_id', 'arrival_time', 'departure_time')]
+    for course, depart in (('t1', 8 * 3600), ('t2', 8 * 3600 + 600)):
+        heure = depart
+        for rang, sommet in enumerate(motif):
+            if rang:
+                heure += graphe.temps(motif[rang - 1], sommet)
+            texte = f"{heure // 3600:02d}:{heure % 3600 // 60:02d}:{heure % 60:02d}"
+            arrets.append((course, rang, sommet, texte, texte))
+    ecrire('stop_times.txt', arrets)
+    return str(tmp_path), motif
+
+
+def test_gtfs_perturbations(graphe, gtfs):
+    dossier, motif = gtfs
+    depart = en_secondes('07:59')
+    trajet = sum(graphe.temps(a, b) for a, b in zip(motif, motif[1:]))
+
+    def arrivee(changements):
+        horaires = charger_horaires(dossier, graphe_perturbe(graphe, changements), changements)
+        assert horaires.source == 'gtfs'
+        return arrivee_au_plus_tot(horaires, [motif[0]], [motif[-1]], depart)[0]
+
+    troncon = (min(motif[2], motif[3]), max(motif[2], motif[3]))
+    assert arrivee({}) == 8 * 3600 + trajet
+    # Ralenti : toute la suite de la course est retardée
+    assert arrivee({troncon: (1.0, 120)}) == 8 * 3600 + trajet + 120
+    assert arrivee({troncon: (2.0, 0)}) == 8 * 3600 + trajet + graphe.temps(motif[2], motif[3])
+    # Fermé : la course est coupée, la ligne ne permet plus le trajet
+    assert arrivee({troncon: None}) == INF
+    horaires = charger_horaires(dossier, graphe_perturbe(graphe, {troncon: None}), {troncon: None})
+    assert arrivee_au_plus_tot(horaires, [motif[0]], [motif[2]], depart)[0] < INF
+    assert arrivee_au_plus_tot(horaires, [motif[3]], [motif[-1]], depart)[0] < INF
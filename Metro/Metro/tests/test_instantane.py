@@ -0,0 +1,112 @@
+# Instantané binaire (src/instantane.py) : aller-retour identique à la lecture des fichiers
+# texte, et détection d'un instantané périmé, tronqué ou d'un autre format
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.chargement import lire_graphe, lire_traces, lire_pospoints, charger_reseau
+from src.geometrie import construire_geometrie, Geometrie
+from src.instantane import (construire_instantane, verifier_instantane, lire_instantane, chemin_instantane,
+                            InstantaneInvalide)
+from src.reseau import MetroGraph
+from src.fichiers import ecriture_atomique
+from tests.conftest import DOSSIER_DONNEES
+
+
+@pytest.fixture
+def dossier(tmp_path):
+    for nom in ('metro.txt', 'pospoints.txt'):
+        shutil.copy(os.path.join(DOSSIER_DONNEES, nom), tmp_path / nom)
+    return str(tmp_path)
+
+
+def fichiers(dossier):
+    return os.path.join(dossier, 'metro.txt'), os.path.join(dossier, 'pospoints.txt')
+
+
+def test_aller_retour(dossier):
+    construire_instantane(dossier)
+    assert verifier_instantane(dossier) == []
+
+    graphe, pos_points, geometrie = lire_instantane(chemin_instantane(dossier), *fichiers(dossier))
+    reference = lire_graphe(fichiers(dossier)[0])
+    for nom in MetroGraph.TABLEAUX:
+        assert list(getattr(graphe, nom)) == list(getattr(reference, nom))
+    assert [(s.id, s.num, s.nom, s.ligne, s.terminus, s.branchements) for s in graphe.stations] == \
+           [(s.id, s.num, s.nom, s.ligne, s.terminus, s.branchements) for s in reference.stations]
+    traces = lire_traces(fichiers(dossier)[1])
+    assert pos_points == lire_pospoints(fichiers(dossier)[1], traces)
+    attendue = construire_geometrie(reference, traces)
+    for nom in Geometrie.TABLEAUX:
+        assert list(getattr(geometrie, nom)) == list(getattr(attendue, nom))
+    # L'index des noms est reconstruit à la lecture
+    assert graphe.ids_par_nom('chatelet') == reference.ids_par_nom('Châtelet')
+
+
+def test_charger_reseau_cree_puis_relit_l_instantane(dossier):
+    premier = charger_reseau(dossier)
+    assert os.path.exists(chemin_instantane(dossier))
+    second = charger_reseau(dossier)
+    assert isinstance(second.graphe.offsets, memoryview)
+    for nom in MetroGraph.TABLEAUX:
+        assert list(getattr(premier.graphe, nom)) == list(getattr(second.graphe, nom))
+
+
+# Un temps de trajet modifié dans metro.txt : l'instantané est refusé, puis reconstruit
+def test_instantane_perime(dossier):
+    construire_instantane(dossier)
+    fichier_metro = fichiers(dossier)[0]
+    with open(fichier_metro, encoding='utf-8') as f:
+        lignes = f.read().split('\n')
+    numero = next(i for i, ligne in enumerate(lignes) if ligne.startswith('E '))
+    u, v, temps = lignes[numero].split()[1:]
+    lignes[numero] = f"E {u} {v} {int(temps) + 1000}"
+    with open(fichier_metro, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lignes))
+
+    with pytest.raises(InstantaneInvalide):
+        lire_instantane(chemin_instantane(dossier), *fichiers(dossier))
+    reseau = charger_reseau(dossier)
+    assert max(reseau.graphe.aretes_poids) >= 1000
+    assert verifier_instantane(dossier) == []
+
+
+def test_instantane_tronque(dossier):
+    fichier = construire_instantane(dossier)
+    with open(fichier, 'r+b') as f:
+        f.truncate(os.path.getsize(fichier) // 2)
+    with pytest.raises(InstantaneInvalide):
+        lire_instantane(fichier)
+
+
+def test_autre_format(dossier):
+    fichier = construire_instantane(dossier)
+    with open(fichier, 'r+b') as f:
+        f.write(b'PASMETRO')
+    with pytest.raises(InstantaneInvalide):
+        lire_instantane(fichier)
+
+
+# Plusieurs écritures simultanées du même instantané : chacune a son fichier temporaire,
+# aucune ne fait échouer les autres et il n'en reste aucun
+def test_ecritures_simultanees(dossier):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: construire_instantane(dossier), range(12)))
+    assert verifier_instantane(dossier) == []
+    assert sorted(os.listdir(dossier)) == ['metro.snap', 'metro.txt', 'pospoints.txt']
+
+
+# Une écriture interrompue laisse le fichier précédent intact, sans fichier temporaire
+def test_ecriture_interrompue(dossier):
+    fichier = construire_instantane(dossier)
+    with open(fichier, 'rb') as f:
+        contenu = f.read()
+    with pytest.raises(RuntimeError):
+        with ecriture_atomique(fichier) as f:
+            f.write(b'PASMETRO')
+            raise RuntimeError
+    with open(fichier, 'rb') as f:
+        assert f.read() == contenu
+    assert sorted(os.listdir(dossier)) == ['metro.snap', 'metro.txt', 'pospoints.txt']
@@ -0,0 +1,45 @@
+# Index des noms (src/noms.py) comparé à un parcours de toutes les stations
+import pytest
+
+from src.noms import normaliser
+
+
+# Sommets de chaque station, par comparaison directe des noms normalisés
+def sommets_du_nom(graphe, nom):
+    return [sommet for sommet in range(len(graphe)) if normaliser(graphe.nom(sommet)) == normaliser(nom)]
+
+
+def test_recherche_exacte(graphe, noms):
+    for nom in noms:
+        attendus = sommets_du_nom(graphe, nom)
+        assert sorted(graphe.ids_par_nom(nom)) == attendus
+        assert sorted(graphe.ids_par_nom(nom.upper())) == attendus
+    assert graphe.ids_par_nom('chatelet') == graphe.ids_par_nom('Châtelet') != []
+    assert graphe.ids_par_nom('Station inconnue') == []
+
+
+# Sans correspondance approchée, la recherche renvoie exactement les noms qui contiennent la
+# requête : le nom exact d'abord, puis ceux qui commencent par elle, puis les autres
+@pytest.mark.parametrize('longueur', [3, 5, None])
+def test_recherche_sous_chaine(graphe, noms, longueur):
+    index = graphe.noms
+    cles = sorted({normaliser(nom) for nom in noms})
+    for nom in noms:
+        # Un début de nom peut finir par une espace, que la recherche retire aussi
+        requete = normaliser(normaliser(nom)[:longueur])
+        resultats = index.rechercher(requete, limite=len(index), approx=False)
+        assert sorted(resultats) == [cle for cle in cles if requete in cle]
+        rangs = [0 if cle == requete else 1 if cle.startswith(requete) else 2 for cle in resultats]
+        assert rangs == sorted(rangs)
+
+
+def test_recherche_limite(graphe):
+    assert len(graphe.noms.rechercher('a', limite=5)) == 5
+    assert graphe.noms.rechercher('a', limite=0) == []
+    assert graphe.noms.rechercher(' - ') == []
+
+
+def test_fautes_de_frappe(graphe):
+    for requete, attendu in (('chatlet', 'Châtelet'), ('bastile', 'Bastille'), ('republiqe', 'République')):
+        resultats = graphe.noms.rechercher(requete)
+        assert resultats and graphe.noms.nom(resultats[0]) == attendu
@@ -0,0 +1,145 @@
+# Perturbations (src/perturbations.py) et invalidation sélective des caches de app.py :
+# après chaque ajout ou retrait, les réponses servies, en cache ou non, doivent être
+# celles d'un calcul sur un graphe perturbé reconstruit indépendamment.
+import random
+
+import pytest
+
+from src.analyse import composantes, foret_couvrante
+from src.reseau import MetroGraph
+from src.perturbations import graphe_perturbe, creer_perturbation, Perturbations, PerturbationInvalide
+from tests.outils import INF, distances_depuis
+
+ETAPES = 40
+
+
+# Graphe perturbé reconstruit sans graphe_perturbe : arêtes fermées retirées, ralenties
+# recalculées, graphe CSR neuf
+def graphe_reference(base, changements):
+    aretes = []
+    for u, v, temps in base.aretes():
+        changement = changements.get((min(u, v), max(u, v)), (1.0, 0))
+        if changement is None:
+            continue
+        facteur, secondes = changement
+        aretes.append((u, v, int(round(temps * facteur + secondes))))
+    return MetroGraph(base.stations, aretes)
+
+
+# "12 minutes et 5 secondes" -> 725
+def lire_temps(texte):
+    mots = texte.split()
+    return int(mots[0]) * 60 + int(mots[3])
+
+
+# Demande de perturbation tirée au hasard : fermeture d'une station ou d'un tronçon,
+# ralentissement d'une ligne
+def perturbation_au_hasard(aleatoire, graphe):
+    choix = aleatoire.random()
+    if choix < 0.35:
+        return {'type': 'fermeture', 'station': graphe.nom(aleatoire.randrange(len(graphe)))}
+    if choix < 0.7:
+        u, v, _ = aleatoire.choice([(u, v, t) for u, v, t in graphe.aretes()
+                                    if graphe.stations[u].ligne == graphe.stations[v].ligne])
+        return {'type': 'fermeture', 'de': graphe.nom(u), 'vers': graphe.nom(v), 'ligne': graphe.stations[u].ligne}
+    facteur, secondes = aleatoire.choice([(1.5, 0), (2, 0), (1, 45), (1.5, 45)])
+    return {'type': 'ralentissement', 'ligne': aleatoire.choice(sorted({s.ligne for s in graphe.stations})),
+            'facteur': facteur, 'secondes': secondes}
+
+
+def test_graphe_perturbe(graphe):
+    aleatoire = random.Random(6)
+    for _ in range(30):
+        perturbations = Perturbations()
+        for _ in range(3):
+            try:
+                perturbations = perturbations.ajouter(creer_perturbation(graphe, perturbation_au_hasard(aleatoire, graphe)))
+            except PerturbationInvalide:
+                continue
+        obtenu = graphe_perturbe(graphe, perturbations.changements)
+        attendu = graphe_reference(graphe, perturbations.changements)
+        for sommet in range(len(graphe)):
+            assert sorted(obtenu.voisins(sommet)) == sorted(attendu.voisins(sommet))
+        assert sorted(obtenu.aretes()) == sorted(attendu.aretes())
+
+
+# Réponses de /chemin, /distances, /connexite et /acpm comparées à la référence sur le graphe
+# perturbé du moment. Les mêmes requêtes sont répétées à chaque étape : celles dont
+# l'entrée de cache a survécu à l'invalidation sont servies depuis le cache.
+def verifier_reponses(client, reseau, demandes, departs_distances):
+    graphe = reseau.graphe_base
+    reference = graphe_reference(graphe, reseau.perturbations.changements)
+    distances = {}
+
+    def depuis(sommet):
+        if sommet not in distances:
+            distances[sommet] = distances_depuis(reference, sommet)
+        return distances[sommet]
+
+    for start_name, end_name in demandes:
+        start_ids, end_ids = graphe.ids_par_nom(start_name), graphe.ids_par_nom(end_name)
+        reponse = client.post('/chemin', json={'start': start_name, 'end': end_name}).get_json()
+        attendu = depuis(start_ids[0])[end_ids[0]]
+        if attendu == INF:
+            assert 'error' in reponse
+        else:
+            assert lire_temps(reponse['time']) == attendu, (start_name, end_name)
+
+        reponse = client.post('/chemin', json={'start': start_name, 'end': end_name,
+                                               'mode': 'correspondances'}).get_json()
+        attendu = min((depuis(s)[d] for s in start_ids for d in end_ids), default=INF)
+        if attendu == INF:
+            assert 'error' in reponse
+        else:
+            assert reponse['pareto'][-1]['time'] == attendu, (start_name, end_name)
+
+    for nom in departs_distances:
+        sources = graphe.ids_par_nom(nom)
+        reponse = client.get('/distances', query_string={'from': nom}).get_json()
+        obtenues = {station['name']: station['time'] for station in reponse['stations']}
+        attendues = {}
+        for sommet in range(len(graphe)):
+            temps = min(depuis(s)[sommet] for s in sources)
+            if temps != INF:
+                attendues[graphe.nom(sommet)] = min(temps, attendues.get(graphe.nom(sommet), INF))
+        assert obtenues == attendues, nom
+
+    assert client.get('/connexite').get_json()['composantes'] == len(composantes(reference))
+    assert client.get('/acpm').get_json()['total_weight'] == foret_couvrante(reference)[1]
+
+
+def test_invalidation_des_caches(client, noms):
+    import app
+    aleatoire = random.Random(7)
+    demandes = [(aleatoire.choice(noms), aleatoire.choice(noms)) for _ in range(25)]
+    departs_distances = aleatoire.sample(noms, 3)
+    actives = []
+    succes_avant = client.get('/cache/stats').get_json()['succes']
+    verifier_reponses(client, app.reseau, demandes, departs_distances)
+    for _ in range(ETAPES):
+        if actives and (len(actives) >= 4 or aleatoire.random() < 0.4):
+            identifiant = actives.pop(aleatoire.randrange(len(actives)))
+            assert client.delete(f'/perturbations/{identifiant}').status_code == 200
+        else:
+            reponse = client.post('/perturbations', json=perturbation_au_hasard(aleatoire, app.reseau.graphe_base))
+            assert reponse.status_code == 201
+            actives.append(reponse.get_json()['perturbation']['id'])
+        verifier_reponses(client, app.reseau, demandes, departs_distances)
+    # Des réponses ont bien été servies depuis le cache entre deux changements
+    assert client.get('/cache/stats').get_json()['succes'] > succes_avant
+    # Tout retiré : retour aux réponses du réseau de base
+    client.delete('/perturbations')
+    verifier_reponses(client, app.reseau, demandes, departs_distances)
+
+
+@pytest.mark.parametrize('corps', [
+    {'type': 'ralentissement', 'ligne': '1', 'facteur': 'nan'},
+    {'type': 'ralentissement', 'ligne': '1', 'facteur': 'inf'},
+    {'type': 'ralentissement', 'ligne': '1', 'secondes': 'inf'},
+    {'type': 'ralentissement', 'ligne': '1', 'secondes': 'nan'},
+    [{'type': 'fermeture', 'ligne': '1'}],
+])
+def test_perturbation_invalide(client, corps):
+    reponse = client.post('/perturbations', json=corps)
+    assert reponse.status_code == 400
+    assert client.get('/perturbations').get_json()['perturbations'] == []
@@ -0,0 +1,38 @@
+# Index de repères (src/reperes.py) : A* guidé par les bornes contre les distances de
+# référence, et relecture de l'index sauvegardé à côté de metro.txt
+import os
+import random
+import shutil
+
+import pytest
+
+from src.reperes import calculer_reperes, charger_reperes, chemin_reperes, plus_court_chemin_alt
+from tests.conftest import FICHIER_METRO
+from tests.outils import distance_entre, temps_chemin
+
+
+@pytest.mark.parametrize('nombre', [1, 8, 16])
+def test_alt(graphe, distances, noms, nombre):
+    index = calculer_reperes(graphe, nombre)
+    aleatoire = random.Random(nombre)
+    for _ in range(200):
+        sources = graphe.ids_par_nom(aleatoire.choice(noms))
+        destinations = graphe.ids_par_nom(aleatoire.choice(noms))
+        temps, chemin, _ = plus_court_chemin_alt(index, graphe, sources, destinations)
+        assert temps == distance_entre(distances, sources, destinations)
+        assert chemin[0] in sources and chemin[-1] in destinations
+        assert temps_chemin(graphe, chemin) == temps
+
+
+def test_cache_reperes(graphe, tmp_path):
+    fichier = str(tmp_path / 'metro.txt')
+    shutil.copy(FICHIER_METRO, fichier)
+    calcule = charger_reperes(fichier, graphe, 4)
+    # Écrit sous un nom temporaire unique puis renommé : aucun fichier temporaire ne reste
+    assert sorted(os.listdir(tmp_path)) == ['metro.alt', 'metro.txt']
+
+    ecrit = os.stat(chemin_reperes(fichier)).st_mtime_ns
+    relu = charger_reperes(fichier, graphe, 4)
+    assert os.stat(chemin_reperes(fichier)).st_mtime_ns == ecrit
+    assert relu.reperes == calcule.reperes
+    assert [list(relu.distances[i]) for i in range(len(relu))] == [list(d) for d in calcule.distances]
@@ -0,0 +1,92 @@
+# Routeurs optimisés contre les distances de référence (bellman_ford) sur data/metro.txt
+import random
+
+from src.graph import reconstruire_chemin
+from src import execution
+from src.execution import processus_utiles
+from src.routage import (dijkstra, dijkstra_bidirectionnel, arbre_plus_courts_chemins, plus_court_chemin_acces,
+                         chemins_par_lot)
+from tests.outils import INF, distance_entre, temps_chemin
+
+
+def test_dijkstra_arbre_complet(graphe, distances):
+    for sommet in range(len(graphe)):
+        obtenues, pred = dijkstra(graphe, sommet)
+        assert obtenues == distances[sommet]
+
+
+def test_dijkstra_arret_a_l_arrivee(graphe, distances, paires):
+    for start, end in paires:
+        obtenues, pred = dijkstra(graphe, start, end)
+        assert obtenues[end] == distances[start][end]
+        assert temps_chemin(graphe, reconstruire_chemin(pred, start, end)) == distances[start][end]
+
+
+def test_dijkstra_bidirectionnel(graphe, distances, paires):
+    for start, end in paires:
+        obtenues, pred = dijkstra_bidirectionnel(graphe, start, end)
+        assert obtenues[end] == distances[start][end]
+        chemin = reconstruire_chemin(pred, start, end)
+        assert chemin[0] == start and chemin[-1] == end
+        assert temps_chemin(graphe, chemin) == distances[start][end]
+
+
+def test_arbre_plusieurs_departs(graphe, distances, noms):
+    for nom in noms[::7]:
+        sources = graphe.ids_par_nom(nom)
+        obtenues, pred = arbre_plus_courts_chemins(graphe, sources)
+        assert obtenues == [distance_entre(distances, sources, [sommet]) for sommet in range(len(graphe))]
+
+
+def test_arbre_limite(graphe, distances, noms):
+    sources = graphe.ids_par_nom(noms[0])
+    obtenues, _ = arbre_plus_courts_chemins(graphe, sources, limite=600)
+    for sommet, distance in enumerate(obtenues):
+        attendue = distance_entre(distances, sources, [sommet])
+        if attendue <= 600:
+            assert distance == attendue
+        else:
+            assert distance == INF or distance == attendue
+
+
+def test_chemins_par_lot(graphe, distances, noms):
+    aleatoire = random.Random(3)
+    demandes = [(aleatoire.choice(noms), aleatoire.choice(noms)) for _ in range(300)] + [('Inconnue', noms[0])]
+    resultats = chemins_par_lot(graphe, demandes)
+    for (start_name, end_name), resultat in zip(demandes[:-1], resultats):
+        assert resultat['start'] == start_name and resultat['end'] == end_name
+        assert resultat['time'] == distance_entre(distances, graphe.ids_par_nom(start_name),
+                                                  graphe.ids_par_nom(end_name))
+        assert resultat['stations'][0] == start_name and resultat['stations'][-1] == end_name
+    assert 'error' in resultats[-1]
+
+
+# Les groupes répartis sur le pool de processus donnent le même résultat
+def test_chemins_par_lot_parallele(graphe, noms, monkeypatch):
+    demandes = [(depart, arrivee) for depart in noms[:20] for arrivee in noms[::30]]
+    en_serie = chemins_par_lot(graphe, demandes, processus=1)
+    monkeypatch.setattr(execution, 'DUREE_MIN_PARALLELE', 0)
+    assert chemins_par_lot(graphe, demandes, processus=2) == en_serie
+
+
+def test_processus_utiles(monkeypatch):
+    monkeypatch.setattr(execution.os, 'cpu_count', lambda: 4)
+    # Calcul trop court pour amortir le démarrage des processus, ou une seule tâche
+    assert processus_utiles(300, 0.001) == 1
+    assert processus_utiles(1, 60) == 1
+    assert processus_utiles(100, 1) == 4
+    assert processus_utiles(3, 1) == 3
+    assert processus_utiles(100, 1, processus=2) == 2
+    monkeypatch.setattr(execution.os, 'cpu_count', lambda: 1)
+    assert processus_utiles(100, 1) == 1
+
+
+def test_acces_avec_marche(graphe, distances):
+    aleatoire = random.Random(2)
+    for _ in range(100):
+        departs = {aleatoire.randrange(len(graphe)): aleatoire.randrange(600) for _ in range(3)}
+        arrivees = {aleatoire.randrange(len(graphe)): aleatoire.randrange(600) for _ in range(3)}
+        attendu = min(departs[s] + distances[s][d] + arrivees[d] for s in departs for d in arrivees)
+        temps, chemin = plus_court_chemin_acces(graphe, departs, arrivees)
+        assert temps == attendu
+        assert departs[chemin[0]] + temps_chemin(graphe, chemin) + arrivees[chemin[-1]] == attendu
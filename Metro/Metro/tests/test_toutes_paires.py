@@ -0,0 +1,34 @@
+# Table de toutes les paires (src/toutes_paires.py) contre les distances de bellman_ford
+import os
+import shutil
+
+import numpy as np
+
+from src.toutes_paires import calculer_table, charger_table, chemin_cache
+from tests.conftest import FICHIER_METRO
+from tests.outils import temps_chemin
+
+
+def test_table_toutes_paires(graphe, distances, paires):
+    table = calculer_table(graphe)
+    for start in range(len(graphe)):
+        assert [table.distance(start, end) for end in range(len(graphe))] == distances[start]
+    for start, end in paires:
+        chemin = table.chemin(start, end)
+        assert chemin[0] == start and chemin[-1] == end
+        assert temps_chemin(graphe, chemin) == distances[start][end]
+
+
+# Le cache .npz est écrit à côté de metro.txt, sans fichier temporaire restant, puis relu
+# sans être réécrit
+def test_cache_table(graphe, tmp_path):
+    fichier = str(tmp_path / 'metro.txt')
+    shutil.copy(FICHIER_METRO, fichier)
+    calculee = charger_table(fichier, graphe)
+    assert sorted(os.listdir(tmp_path)) == ['metro.npz', 'metro.txt']
+
+    ecrit = os.stat(chemin_cache(fichier)).st_mtime_ns
+    relue = charger_table(fichier, graphe)
+    assert os.stat(chemin_cache(fichier)).st_mtime_ns == ecrit
+    assert np.array_equal(relue.distances, calculee.distances)
+    assert np.array_equal(relue.suivant, calculee.suivant)